@@ -3,6 +3,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -10,6 +12,10 @@ warnings.filterwarnings('ignore')
 sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (12, 6)
 
+# Same compact dtypes as the pipeline (int32 ids, uint8 progress, datetime completed_at, categorical skills)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from schema import compact_enrollments, compact_skills
+
 print("="*80)
 print("CSV DATA ANALYSIS FOR ML RECOMMENDATION SYSTEM")
 print("="*80)
@@ -17,9 +23,11 @@ print()
 
 # Load the datasets
 print("Loading datasets...")
-enrollments = pd.read_csv(r'D:\stage\IA\data\enrollments.csv')
-student_skills = pd.read_csv(r'D:\stage\IA\data\student_skills.csv')
-course_skills = pd.read_csv(r'D:\stage\IA\data\course_skills.csv')
+enrollments = compact_enrollments(pd.read_csv(r'D:\stage\IA\data\enrollments.csv'))
+student_skills, course_skills = compact_skills(
+    pd.read_csv(r'D:\stage\IA\data\student_skills.csv'),
+    pd.read_csv(r'D:\stage\IA\data\course_skills.csv')
+)
 print("Datasets loaded successfully!\n")
 
 # ============================================================================
@@ -5,11 +5,21 @@
 ============================================================================
 
 Charger les 3 fichiers CSV et afficher des statistiques de base
+
+--chunksize N lit enrollments.csv par blocs de N lignes (statistiques
+accumulées bloc par bloc, mémoire constante) ; enrollments.pkl n'est alors
+pas écrit.
 """
 
-import pandas as pd
-import numpy as np
+import argparse
 import os
+from schema import iter_enrollments, load_skills, load_tables
+from streaming import EnrollmentSummary
+
+parser = argparse.ArgumentParser(description="ÉTAPE 6: charger et inspecter les données")
+parser.add_argument('--chunksize', type=int, default=None, help="lire enrollments.csv par blocs de N lignes")
+parser.add_argument('--data-dir', default=None, help="dossier des CSV (défaut: IA/data)")
+args = parser.parse_args()
 
 print("=" * 80)
 print("ÉTAPE 6: CHARGER ET INSPECTER LES DONNÉES")
@@ -25,14 +35,20 @@ print("-" * 80)
 # Déterminer le chemin du dossier data
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_dir = os.path.dirname(script_dir)
-data_dir = os.path.join(project_dir, 'data')
+data_dir = args.data_dir or os.path.join(project_dir, 'data')
 
 # Charger les CSV
-enrollments = pd.read_csv(os.path.join(data_dir, 'enrollments.csv'))
-student_skills = pd.read_csv(os.path.join(data_dir, 'student_skills.csv'))
-course_skills = pd.read_csv(os.path.join(data_dir, 'course_skills.csv'))
+if args.chunksize:
+    # Mode chunked: seules les statistiques d'enrollments sont gardées en mémoire
+    enrollments = None
+    student_skills, course_skills = load_skills(data_dir)
+    summary = EnrollmentSummary.of(iter_enrollments(data_dir, args.chunksize))
+    print(f"✓ enrollments.csv lu par blocs de {args.chunksize} lignes")
+else:
+    enrollments, student_skills, course_skills = load_tables(data_dir)
+    summary = EnrollmentSummary.of([enrollments])
 
-print(f"✓ enrollments.csv: {len(enrollments)} rows")
+print(f"✓ enrollments.csv: {summary.rows} rows")
 print(f"✓ student_skills.csv: {len(student_skills)} rows")
 print(f"✓ course_skills.csv: {len(course_skills)} rows")
 print()
@@ -44,9 +60,9 @@ print("2️⃣  Aperçu des données")
 print("-" * 80)
 
 print("\n📊 ENROLLMENTS:")
-print(enrollments.head())
-print(f"   Colonnes: {list(enrollments.columns)}")
-print(f"   Types: {dict(enrollments.dtypes)}")
+print(summary.head)
+print(f"   Colonnes: {summary.columns}")
+print(f"   Types: {summary.dtypes}")
 
 print("\n📊 STUDENT_SKILLS:")
 print(student_skills.head())
@@ -64,15 +80,15 @@ print("3️⃣  Statistiques descriptives")
 print("-" * 80)
 
 print("\n📈 ENROLLMENTS Statistics:")
-print(f"   - Total rows: {len(enrollments)}")
-print(f"   - Unique students: {enrollments['student_id'].nunique()}")
-print(f"   - Unique courses: {enrollments['course_id'].nunique()}")
-print(f"   - Progress (min-max): {enrollments['progress_percentage'].min()}-{enrollments['progress_percentage'].max()}%")
-print(f"   - Progress (mean): {enrollments['progress_percentage'].mean():.2f}%")
-print(f"   - Completed enrollments: {enrollments['completed_at'].notna().sum()}")
-print(f"   - In-progress enrollments: {enrollments['completed_at'].isna().sum()}")
-
-completion_rate = enrollments['completed_at'].notna().sum() / len(enrollments) * 100
+print(f"   - Total rows: {summary.rows}")
+print(f"   - Unique students: {len(summary.student_ids)}")
+print(f"   - Unique courses: {len(summary.course_ids)}")
+print(f"   - Progress (min-max): {summary.progress_min}-{summary.progress_max}%")
+print(f"   - Progress (mean): {summary.progress_mean:.2f}%")
+print(f"   - Completed enrollments: {summary.completed}")
+print(f"   - In-progress enrollments: {summary.rows - summary.completed}")
+
+completion_rate = summary.completed / summary.rows * 100
 print(f"   - Completion rate: {completion_rate:.1f}%")
 
 print("\n📈 STUDENT_SKILLS Statistics:")
@@ -95,11 +111,10 @@ print("4️⃣  Vérification des valeurs manquantes")
 print("-" * 80)
 
 print("\n🔍 ENROLLMENTS Missing Values:")
-for col in enrollments.columns:
-    missing = enrollments[col].isna().sum()
+for col, missing in summary.missing.items():
     if missing > 0:
-        print(f"   - {col}: {missing} missing ({missing/len(enrollments)*100:.1f}%)")
-if enrollments.isna().sum().sum() == 0:
+        print(f"   - {col}: {missing} missing ({missing/summary.rows*100:.1f}%)")
+if summary.missing.sum() == 0:
     print("   ✓ No missing values (except expected nulls in completed_at)")
 
 print("\n🔍 STUDENT_SKILLS Missing Values:")
@@ -122,15 +137,12 @@ print("5️⃣  Distribution des données")
 print("-" * 80)
 
 print("\n📊 Progress Distribution:")
-bins = [0, 25, 50, 75, 100]
-labels = ['0-25%', '26-50%', '51-75%', '76-100%']
-progress_dist = pd.cut(enrollments['progress_percentage'], bins=bins, labels=labels, right=True)
-print(progress_dist.value_counts().sort_index())
+print(summary.progress_bins)
 
 print("\n📊 Completion Status:")
-status = enrollments['completed_at'].notna()
-print(f"   Completed: {status.sum()} ({status.sum()/len(enrollments)*100:.1f}%)")
-print(f"   In-progress: {(~status).sum()} ({(~status).sum()/len(enrollments)*100:.1f}%)")
+in_progress = summary.rows - summary.completed
+print(f"   Completed: {summary.completed} ({summary.completed/summary.rows*100:.1f}%)")
+print(f"   In-progress: {in_progress} ({in_progress/summary.rows*100:.1f}%)")
 
 print("\n📊 Top 10 Skills:")
 print(student_skills['skill_name'].value_counts().head(10))
@@ -143,7 +155,7 @@ print("6️⃣  Analyse de couverture")
 print("-" * 80)
 
 # Students in both datasets
-students_enrollments = set(enrollments['student_id'].unique())
+students_enrollments = set(summary.student_ids.tolist())
 students_skills = set(student_skills['student_id'].unique())
 students_both = students_enrollments.intersection(students_skills)
 
@@ -154,7 +166,7 @@ print(f"   - In both: {len(students_both)} ({len(students_both)/len(students_enr
 print(f"   - Missing skills: {len(students_enrollments) - len(students_both)} students")
 
 # Courses in both datasets
-courses_enrollments = set(enrollments['course_id'].unique())
+courses_enrollments = set(summary.course_ids.tolist())
 courses_skills = set(course_skills['course_id'].unique())
 courses_both = courses_enrollments.intersection(courses_skills)
 
@@ -170,8 +182,9 @@ print()
 print("7️⃣  Sauvegarde des données")
 print("-" * 80)
 
-# Sauvegarder pour feature engineering
-enrollments.to_pickle(os.path.join(data_dir, 'enrollments.pkl'))
+# Sauvegarder pour feature engineering (en mode chunked, enrollments reste dans le CSV)
+if enrollments is not None:
+    enrollments.to_pickle(os.path.join(data_dir, 'enrollments.pkl'))
 student_skills.to_pickle(os.path.join(data_dir, 'student_skills.pkl'))
 course_skills.to_pickle(os.path.join(data_dir, 'course_skills.pkl'))
 
@@ -186,7 +199,7 @@ print("✅ ÉTAPE 6 COMPLÉTÉE")
 print("=" * 80)
 print()
 print("RÉSUMÉ:")
-print(f"  • {len(enrollments)} enrollments chargés")
+print(f"  • {summary.rows} enrollments chargés")
 print(f"  • {len(student_skills)} student-skill pairs chargés")
 print(f"  • {len(course_skills)} course-skill pairs chargés")
 print(f"  • {len(students_enrollments)} étudiants uniques")
@@ -6,13 +6,33 @@
 
 Créer les 10 features pour le modèle de recommandation
 Feature Engineering + Normalisation + Train/Val/Test Split
+
+--chunksize N lit enrollments.csv par blocs de N lignes et écrit le feature
+store directement sur disque (streaming.write_feature_store): agrégats en
+une première passe, features bloc par bloc en une deuxième, StandardScaler
+ajusté par partial_fit. La mémoire reste à peu près constante quelle que
+soit la taille du CSV.
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 import os
+import pickle
+import sys
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
+from aggregates import aggregate_tables
+from features import FEATURE_COLUMNS, enrollment_features
+from schema import load_skills, load_tables
+from feature_store import save_store
+from skill_matrix import SkillIndex
+from streaming import write_feature_store
+
+parser = argparse.ArgumentParser(description="ÉTAPE 7: créer les 10 features")
+parser.add_argument('--chunksize', type=int, default=None, help="lire enrollments.csv par blocs de N lignes")
+parser.add_argument('--data-dir', default=None, help="dossier des CSV et du feature store (défaut: IA/data)")
+args = parser.parse_args()
 
 print("=" * 80)
 print("ÉTAPE 7: CRÉER LES 10 FEATURES POUR LE MODÈLE ML")
@@ -27,11 +47,43 @@ print("-" * 80)
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_dir = os.path.dirname(script_dir)
-data_dir = os.path.join(project_dir, 'data')
-
-enrollments = pd.read_csv(os.path.join(data_dir, 'enrollments.csv'))
-student_skills = pd.read_csv(os.path.join(data_dir, 'student_skills.csv'))
-course_skills = pd.read_csv(os.path.join(data_dir, 'course_skills.csv'))
+data_dir = args.data_dir or os.path.join(project_dir, 'data')
+
+if args.chunksize:
+    # ========================================================================
+    # MODE CHUNKED: enrollments.csv n'est jamais chargé en entier
+    # ========================================================================
+    student_skills, course_skills = load_skills(data_dir)
+    print(f"✓ Chargé {len(student_skills)} student skills")
+    print(f"✓ Chargé {len(course_skills)} course skills")
+    print(f"✓ enrollments.csv lu par blocs de {args.chunksize} lignes")
+    print()
+
+    print("2️⃣  Features, normalisation et split: 3 passes sur enrollments.csv")
+    print("-" * 80)
+    skill_index = SkillIndex.load_or_build(data_dir, student_skills, course_skills)
+    scaler, aggregates, sizes = write_feature_store(data_dir, args.chunksize, skill_index)
+    n = aggregates.rows
+
+    print(f"✓ {n} enrollments, {len(aggregates.students)} étudiants, {len(aggregates.courses)} cours")
+    print(f"  - Completed (1): {aggregates.completed}")
+    print(f"  - In-progress (0): {n - aggregates.completed}")
+    print(f"✓ Features normalisées avec StandardScaler (partial_fit)")
+    for name in ('train', 'val', 'test'):
+        print(f"  - {name}: {sizes[name]} ({sizes[name]/n*100:.1f}%)")
+
+    with open(os.path.join(data_dir, 'scaler.pkl'), 'wb') as f:
+        pickle.dump(scaler, f)
+
+    print("✓ Données sauvegardées")
+    print()
+    print("=" * 80)
+    print("✅ ÉTAPE 7 COMPLÉTÉE")
+    print("=" * 80)
+    print()
+    sys.exit(0)
+
+enrollments, student_skills, course_skills = load_tables(data_dir)
 
 print(f"✓ Chargé {len(enrollments)} enrollments")
 print(f"✓ Chargé {len(student_skills)} student skills")
@@ -57,87 +109,16 @@ print()
 print("3️⃣  Créer les 10 features")
 print("-" * 80)
 
-data = enrollments[['student_id', 'course_id', 'progress_percentage', 'is_completed']].copy()
-
-# Feature 1: progress_percentage
-data['feature_1_progress'] = enrollments['progress_percentage']
-
-# Créer dictionnaires
-student_skills_dict = {}
-for _, row in student_skills.iterrows():
-    sid = row['student_id']
-    if sid not in student_skills_dict:
-        student_skills_dict[sid] = set()
-    student_skills_dict[sid].add(row['skill_name'])
-
-course_skills_dict = {}
-for _, row in course_skills.iterrows():
-    cid = row['course_id']
-    if cid not in course_skills_dict:
-        course_skills_dict[cid] = set()
-    course_skills_dict[cid].add(row['skill_name'])
-
-# Features 2-5: Skill matching
-data['feature_2_skill_match_ratio'] = 0.0
-data['feature_3_student_skill_count'] = 0
-data['feature_4_course_skill_count'] = 0
-data['feature_5_matching_skills'] = 0
-
-for idx, row in data.iterrows():
-    student_id = row['student_id']
-    course_id = row['course_id']
-    s_skills = student_skills_dict.get(student_id, set())
-    c_skills = course_skills_dict.get(course_id, set())
-    matching = len(s_skills.intersection(c_skills))
-    course_count = len(c_skills)
-
-    if course_count > 0:
-        data.at[idx, 'feature_2_skill_match_ratio'] = matching / course_count
-    else:
-        data.at[idx, 'feature_2_skill_match_ratio'] = 0.0
-
-    data.at[idx, 'feature_3_student_skill_count'] = len(s_skills)
-    data.at[idx, 'feature_4_course_skill_count'] = course_count
-    data.at[idx, 'feature_5_matching_skills'] = matching
-
-print(f"✓ Features 1-5 créées")
-
-# Feature 6: student_completion_rate
-student_completion = enrollments.groupby('student_id').apply(
-    lambda x: x['is_completed'].sum() / len(x) if len(x) > 0 else 0
-).to_dict()
-data['feature_6_student_completion_rate'] = data['student_id'].map(
-    lambda x: student_completion.get(x, 0)
-)
-
-# Feature 7: course_difficulty
-course_completion = enrollments.groupby('course_id').apply(
-    lambda x: x['is_completed'].sum() / len(x) if len(x) > 0 else 0
-).to_dict()
-course_difficulty = {cid: 1 - comp_rate for cid, comp_rate in course_completion.items()}
-data['feature_7_course_difficulty'] = data['course_id'].map(
-    lambda x: course_difficulty.get(x, 0.5)
-)
-
-# Feature 8: student_experience
-student_experience = enrollments.groupby('student_id').size().to_dict()
-data['feature_8_student_experience'] = data['student_id'].map(
-    lambda x: student_experience.get(x, 0)
-)
+# Features 2-5: matrices creuses étudiant×skill / cours×skill
+skill_index = SkillIndex.load_or_build(data_dir, student_skills, course_skills)
 
-# Feature 9: course_popularity
-course_popularity = enrollments.groupby('course_id').size().to_dict()
-data['feature_9_course_popularity'] = data['course_id'].map(
-    lambda x: course_popularity.get(x, 0)
-)
+# Features 6-10: student / course statistics, one groupby pass per key
+students, courses = aggregate_tables(enrollments)
 
-# Feature 10: course_avg_progress
-course_avg_progress = enrollments.groupby('course_id')['progress_percentage'].mean().to_dict()
-data['feature_10_course_avg_progress'] = data['course_id'].map(
-    lambda x: course_avg_progress.get(x, 50)
-)
+X = enrollment_features(enrollments, skill_index, students, courses)
+y = enrollments['is_completed'].copy()
 
-print(f"✓ Features 6-10 créées")
+print(f"✓ Features 1-10 créées")
 print()
 
 # ============================================================================
@@ -146,25 +127,9 @@ print()
 print("4️⃣  Normaliser les features")
 print("-" * 80)
 
-feature_cols = [
-    'feature_1_progress',
-    'feature_2_skill_match_ratio',
-    'feature_3_student_skill_count',
-    'feature_4_course_skill_count',
-    'feature_5_matching_skills',
-    'feature_6_student_completion_rate',
-    'feature_7_course_difficulty',
-    'feature_8_student_experience',
-    'feature_9_course_popularity',
-    'feature_10_course_avg_progress'
-]
-
-X = data[feature_cols].copy()
-y = data['is_completed'].copy()
-
 scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-X_scaled = pd.DataFrame(X_scaled, columns=feature_cols)
+X_scaled = scaler.fit_transform(X[FEATURE_COLUMNS])
+X_scaled = pd.DataFrame(X_scaled, columns=FEATURE_COLUMNS)
 
 print(f"✓ Features normalisées avec StandardScaler")
 print()
@@ -175,18 +140,19 @@ print()
 print("5️⃣  Split Train/Validation/Test (70/15/15)")
 print("-" * 80)
 
-X_train, X_temp, y_train, y_temp = train_test_split(
-    X_scaled, y, test_size=0.30, random_state=42, stratify=y
+# Row indices only: the features stay in one contiguous array
+idx_train, idx_temp = train_test_split(
+    np.arange(len(X_scaled)), test_size=0.30, random_state=42, stratify=y
 )
 
-X_val, X_test, y_val, y_test = train_test_split(
-    X_temp, y_temp, test_size=0.50, random_state=42, stratify=y_temp
+idx_val, idx_test = train_test_split(
+    idx_temp, test_size=0.50, random_state=42, stratify=y.to_numpy()[idx_temp]
 )
 
 print(f"✓ Data split complété")
-print(f"  - Training: {len(X_train)} ({len(X_train)/len(X_scaled)*100:.1f}%)")
-print(f"  - Validation: {len(X_val)} ({len(X_val)/len(X_scaled)*100:.1f}%)")
-print(f"  - Test: {len(X_test)} ({len(X_test)/len(X_scaled)*100:.1f}%)")
+print(f"  - Training: {len(idx_train)} ({len(idx_train)/len(X_scaled)*100:.1f}%)")
+print(f"  - Validation: {len(idx_val)} ({len(idx_val)/len(X_scaled)*100:.1f}%)")
+print(f"  - Test: {len(idx_test)} ({len(idx_test)/len(X_scaled)*100:.1f}%)")
 print()
 
 # ============================================================================
@@ -195,14 +161,9 @@ print()
 print("6️⃣  Sauvegarder les données préparées")
 print("-" * 80)
 
-np.save(os.path.join(data_dir, 'X_train.npy'), X_train)
-np.save(os.path.join(data_dir, 'X_val.npy'), X_val)
-np.save(os.path.join(data_dir, 'X_test.npy'), X_test)
-np.save(os.path.join(data_dir, 'y_train.npy'), y_train)
-np.save(os.path.join(data_dir, 'y_val.npy'), y_val)
-np.save(os.path.join(data_dir, 'y_test.npy'), y_test)
+# features.npy (float32, contiguous) + labels.npy + split_{train,val,test}.npy, memory-mapped by 03
+save_store(data_dir, X_scaled, y, {'train': idx_train, 'val': idx_val, 'test': idx_test})
 
-import pickle
 with open(os.path.join(data_dir, 'scaler.pkl'), 'wb') as f:
     pickle.dump(scaler, f)
 
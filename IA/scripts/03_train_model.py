@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 """ÉTAPE 8: Train Neural Network Model"""
 
-import numpy as np
 import os
+import sys
+import pickle
 from tensorflow import keras
+from feature_store import FeatureStore
+from numpy_model import export_keras_model
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
 
 print("=" * 80)
@@ -14,15 +17,14 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 data_dir = os.path.join(os.path.dirname(script_dir), 'data')
 models_dir = os.path.join(os.path.dirname(script_dir), 'models')
 
-# Load data
-X_train = np.load(os.path.join(data_dir, 'X_train.npy'))
-X_val = np.load(os.path.join(data_dir, 'X_val.npy'))
-X_test = np.load(os.path.join(data_dir, 'X_test.npy'))
-y_train = np.load(os.path.join(data_dir, 'y_train.npy'))
-y_val = np.load(os.path.join(data_dir, 'y_val.npy'))
-y_test = np.load(os.path.join(data_dir, 'y_test.npy'))
+BATCH_SIZE = 32
+
+# Load data - memory-mapped: batches page in only the rows they use
+store = FeatureStore(data_dir)
+n_features = store.n_features
 
-print(f"✓ Data loaded: Train {X_train.shape}, Val {X_val.shape}, Test {X_test.shape}\n")
+print(f"✓ Data loaded: Train ({store.size('train')}, {n_features}), Val ({store.size('val')}, {n_features}), "
+      f"Test ({store.size('test')}, {n_features})\n")
 
 # Build model
 model = keras.Sequential([
@@ -47,10 +49,11 @@ print()
 # Train
 print("Training (this may take a few minutes)...\n")
 history = model.fit(
-    X_train, y_train,
-    validation_data=(X_val, y_val),
+    store.batches('train', BATCH_SIZE, shuffle=True, seed=42, repeat=True),
+    steps_per_epoch=store.steps('train', BATCH_SIZE),
+    validation_data=store.batches('val', BATCH_SIZE, repeat=True),
+    validation_steps=store.steps('val', BATCH_SIZE),
     epochs=100,
-    batch_size=32,
     callbacks=[keras.callbacks.EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True)],
     verbose=1
 )
@@ -70,25 +73,30 @@ def eval_metrics(y_true, y_pred, y_pred_proba, name):
     print(f"{name}: Acc={acc:.4f}, Prec={prec:.4f}, Rec={rec:.4f}, F1={f1:.4f}, AUC={auc:.4f}")
     return {'accuracy': acc, 'precision': prec, 'recall': rec, 'f1': f1, 'auc': auc}
 
-y_train_pred = (model.predict(X_train, verbose=0) > 0.5).astype(int).flatten()
-y_val_pred = (model.predict(X_val, verbose=0) > 0.5).astype(int).flatten()
-y_test_pred = (model.predict(X_test, verbose=0) > 0.5).astype(int).flatten()
+# One pass per split over the mapped rows; labels are read in split order
+y_train_proba = store.predict(model, 'train')
+y_val_proba = store.predict(model, 'val')
+y_test_proba = store.predict(model, 'test')
 
-y_train_proba = model.predict(X_train, verbose=0).flatten()
-y_val_proba = model.predict(X_val, verbose=0).flatten()
-y_test_proba = model.predict(X_test, verbose=0).flatten()
-
-m_train = eval_metrics(y_train, y_train_pred, y_train_proba, "TRAIN")
-m_val = eval_metrics(y_val, y_val_pred, y_val_proba, "VAL")
-m_test = eval_metrics(y_test, y_test_pred, y_test_proba, "TEST")
+m_train = eval_metrics(store.labels_of('train'), (y_train_proba > 0.5).astype(int), y_train_proba, "TRAIN")
+m_val = eval_metrics(store.labels_of('val'), (y_val_proba > 0.5).astype(int), y_val_proba, "VAL")
+m_test = eval_metrics(store.labels_of('test'), (y_test_proba > 0.5).astype(int), y_test_proba, "TEST")
 
 # Save
 model.save(os.path.join(models_dir, 'recommendation_model.h5'))
-import pickle
+# --fuse-scaler: also write a model with scaler.pkl folded into hidden_1
+fuse_scaler = None
+if '--fuse-scaler' in sys.argv:
+    with open(os.path.join(data_dir, 'scaler.pkl'), 'rb') as f:
+        fuse_scaler = pickle.load(f)
+export_keras_model(model, models_dir, scaler=fuse_scaler)
 with open(os.path.join(models_dir, 'training_history.pkl'), 'wb') as f:
     pickle.dump(history.history, f)
 with open(os.path.join(models_dir, 'model_metrics.pkl'), 'wb') as f:
     pickle.dump({'train': m_train, 'val': m_val, 'test': m_test}, f)
 
 print(f"\n✓ Model saved to models/recommendation_model.h5")
+print(f"✓ NumPy weights saved to models/recommendation_model.npz")
+if fuse_scaler is not None:
+    print(f"✓ Fused scaler+model saved to models/recommendation_model_fused.npz")
 print("✅ ÉTAPE 8 COMPLÉTÉE\n")
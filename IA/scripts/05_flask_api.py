@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
 """ÉTAPE 10: Flask API for Recommendations"""
 
-from flask import Flask, request, jsonify
-import pandas as pd
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 import numpy as np
 import os
-import pickle
-from tensorflow import keras
+import sys
+import json
+import time
+import profiling
+from inference_batcher import InferenceBatcher
+from metrics import CONTENT_TYPE, Registry, RequestMetrics
+from result_cache import ResultCache, MISSING
+from snapshot import SnapshotHolder
+from topk import ranked, top_k
 
 app = Flask(__name__)
 
@@ -14,75 +20,82 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 data_dir = os.path.join(os.path.dirname(script_dir), 'data')
 models_dir = os.path.join(os.path.dirname(script_dir), 'models')
 
+# /recommend/batch: max students per request, and (student, course) pairs scored per matrix pass
+BATCH_MAX_STUDENTS = int(os.environ.get('RECO_BATCH_MAX_STUDENTS', 1000))
+BATCH_CHUNK_PAIRS = int(os.environ.get('RECO_BATCH_CHUNK_PAIRS', 65536))
+
+# Seconds between checks of the source files for hot reload (0 = no file watching)
+WATCH_INTERVAL = float(os.environ.get('RECO_WATCH_INTERVAL', 0))
+
+# Micro-batching of concurrent /predict, /recommend and /recommend-custom forward passes:
+# how long to wait for more work after the first request (0 = no batching), and the batch size cap
+inference_batcher = InferenceBatcher(
+    window=float(os.environ.get('RECO_INFERENCE_WINDOW_MS', 0)) / 1000,
+    max_rows=int(os.environ.get('RECO_INFERENCE_MAX_ROWS', 256))
+)
+
+# Set by prefork.py in its workers: each one holds its own snapshot, so /reload and /events
+# would only change the worker that took the request; they answer 409 instead
+PREFORKED = False
+
+# Callers sending this in X-Admin-Token may POST /reload and /events and ask for a per-request
+# profile (X-Profile); unset = all three disabled
+ADMIN_TOKEN = os.environ.get('RECO_ADMIN_TOKEN', '')
+
+# Top-N results and pair probabilities, keyed by snapshot version
+result_cache = ResultCache(
+    max_entries=int(os.environ.get('RECO_CACHE_MAX_ENTRIES', 10000)),
+    max_bytes=int(os.environ.get('RECO_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    ttl=float(os.environ.get('RECO_CACHE_TTL', 300))
+)
+
 print("Loading model and data...")
-model = keras.models.load_model(os.path.join(models_dir, 'recommendation_model.h5'))
-with open(os.path.join(data_dir, 'scaler.pkl'), 'rb') as f:
-    scaler = pickle.load(f)
-
-enrollments = pd.read_csv(os.path.join(data_dir, 'enrollments.csv'))
-student_skills = pd.read_csv(os.path.join(data_dir, 'student_skills.csv'))
-course_skills = pd.read_csv(os.path.join(data_dir, 'course_skills.csv'))
-
-# Prepare reference data
-student_skills_dict = {int(sid): set() for sid in student_skills['student_id'].unique()}
-for _, row in student_skills.iterrows():
-    student_skills_dict[int(row['student_id'])].add(row['skill_name'])
-
-course_skills_dict = {int(cid): set() for cid in course_skills['course_id'].unique()}
-for _, row in course_skills.iterrows():
-    course_skills_dict[int(row['course_id'])].add(row['skill_name'])
-
-student_completion = enrollments.groupby('student_id').apply(
-    lambda x: x['completed_at'].notna().sum() / len(x)
-).to_dict()
-
-course_completion = enrollments.groupby('course_id').apply(
-    lambda x: x['completed_at'].notna().sum() / len(x)
-).to_dict()
-
-course_difficulty = {cid: 1 - comp for cid, comp in course_completion.items()}
-student_experience = enrollments.groupby('student_id').size().to_dict()
-course_popularity = enrollments.groupby('course_id').size().to_dict()
-course_avg_progress = enrollments.groupby('course_id')['progress_percentage'].mean().to_dict()
-
-print("✓ Model and data loaded\n")
-
-def create_features(student_id, course_id):
-    s_skills = student_skills_dict.get(student_id, set())
-    c_skills = course_skills_dict.get(course_id, set())
-    matching = len(s_skills.intersection(c_skills))
-    course_count = len(c_skills)
-    return np.array([
-        course_avg_progress.get(course_id, 50),
-        matching / course_count if course_count > 0 else 0.0,
-        len(s_skills),
-        course_count,
-        matching,
-        student_completion.get(student_id, 0.5),
-        course_difficulty.get(course_id, 0.5),
-        student_experience.get(student_id, 0),
-        course_popularity.get(course_id, 0),
-        course_avg_progress.get(course_id, 50)
-    ])
-
-def create_features_custom(student_skills, completion_rate, experience, course_id):
-    """Create features for recommendations without student_id"""
-    s_skills = set(student_skills)
-    c_skills = course_skills_dict.get(course_id, set())
-    matching = len(s_skills.intersection(c_skills))
-    course_count = len(c_skills)
-    return np.array([
-        course_avg_progress.get(course_id, 50),
-        matching / course_count if course_count > 0 else 0.0,
-        len(s_skills),
-        course_count,
-        matching,
-        completion_rate,
-        course_difficulty.get(course_id, 0.5),
-        experience,
-        course_popularity.get(course_id, 0),
-        course_avg_progress.get(course_id, 50)
-    ])
+# Reference data and model live in an immutable snapshot, swapped atomically on reload
+snapshots = SnapshotHolder(data_dir, models_dir, on_swap=lambda old, new: result_cache.invalidate())
+print(f"✓ Model and data loaded (snapshot {snapshots.current.version})\n")
+
+# Prometheus metrics served on GET /metrics
+metrics = Registry()
+request_metrics = RequestMetrics(metrics)
+feature_seconds = metrics.histogram('reco_feature_build_seconds', 'Feature matrix build time', ('endpoint',))
+inference_seconds = metrics.histogram('reco_inference_seconds', 'Model forward pass time', ('endpoint',))
+for name, attr in [('hits', 'hits'), ('misses', 'misses'), ('evictions', 'evictions')]:
+    metrics.gauge(f'reco_cache_{name}_total', f'Result cache {name}', lambda attr=attr: getattr(result_cache, attr), kind='counter')
+metrics.gauge('reco_inference_batches_total', 'Micro-batched forward passes', lambda: inference_batcher.batches, kind='counter')
+metrics.gauge('reco_inference_batched_rows_total', 'Rows scored by micro-batched forward passes', lambda: inference_batcher.rows, kind='counter')
+metrics.gauge('reco_cache_entries', 'Result cache entries', lambda: result_cache.stats()['entries'])
+metrics.gauge('reco_data_rows', 'Rows of the current snapshot', lambda: {
+    ('enrollments',): snapshots.current.stats['total_enrollments'],
+    ('students',): snapshots.current.stats['total_students'],
+    ('courses',): len(snapshots.current.course_table),
+    ('skills',): snapshots.current.skill_index.n_skills,
+}, ('table',))
+metrics.gauge('reco_snapshot_loaded_timestamp_seconds', 'Load time of the current snapshot', lambda: snapshots.current.loaded_at)
+
+@app.before_request
+def pin_snapshot():
+    g.started = time.perf_counter()
+    # Every request runs on the snapshot current when it started, even if a reload swaps it meanwhile
+    g.snapshot = snapshots.current
+
+@app.after_request
+def add_snapshot_header(response):
+    snap = g.get('snapshot')
+    if snap is not None:
+        response.headers['X-Snapshot-Version'] = snap.version
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    request_metrics.record(endpoint, request.method, response.status_code, time.perf_counter() - g.started)
+    return response
+
+def positive_int(value):
+    """value as a positive int (816 and "816" alike), None if it is not one"""
+    if isinstance(value, bool) or isinstance(value, float) and not value.is_integer():
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
 
 @app.route('/', methods=['GET'])
 def home():
@@ -93,8 +106,13 @@ def home():
             'GET /health',
             'POST /predict (student_id, course_id)',
             'POST /recommend (student_id, top_n)',
-            'POST /recommend-custom (skills, completion_rate, experience, top_n)',
-            'GET /stats'
+            'POST /recommend/batch (student_ids, top_n, stream)',
+            'POST /recommend-custom (skills, completion_rate, experience, top_n; X-Profile for admins)',
+            'GET /stats',
+            'GET /cache/stats',
+            'GET /metrics',
+            'POST /reload (wait; X-Admin-Token)',
+            'POST /events (events; X-Admin-Token)'
         ]
     })
 
@@ -106,16 +124,27 @@ def health():
 def predict():
     try:
         data = request.json
-        student_id = data.get('student_id')
-        course_id = data.get('course_id')
-        if not student_id or not course_id:
+        if data.get('student_id') is None or data.get('course_id') is None:
             return jsonify({'error': 'Missing student_id or course_id'}), 400
-        features = create_features(student_id, course_id)
-        features_scaled = scaler.transform([features])[0]
-        prob = model.predict(np.array([features_scaled]), verbose=0)[0][0]
+        # One int id for the cache key and every lookup, whether it was sent as 816 or "816"
+        student_id = positive_int(data['student_id'])
+        course_id = positive_int(data['course_id'])
+        if student_id is None or course_id is None:
+            return jsonify({'error': 'student_id and course_id must be positive integers'}), 400
+        snap = g.snapshot
+        cache_key = ('predict', snap.version, student_id, course_id)
+        prob = result_cache.get(cache_key)
+        if prob is MISSING:
+            started = time.perf_counter()
+            features_scaled = snap.scale(snap.create_features(student_id, course_id))
+            feature_seconds.observe(time.perf_counter() - started, '/predict')
+            started = time.perf_counter()
+            prob = float(inference_batcher.predict(snap, np.array([features_scaled]))[0])
+            inference_seconds.observe(time.perf_counter() - started, '/predict')
+            result_cache.put(cache_key, prob)
         return jsonify({
-            'student_id': int(student_id),
-            'course_id': int(course_id),
+            'student_id': student_id,
+            'course_id': course_id,
             'success_probability': float(prob),
             'success_percentage': f"{prob*100:.1f}%"
         })
@@ -126,33 +155,132 @@ def predict():
 def recommend():
     try:
         data = request.json
-        student_id = data.get('student_id')
         top_n = data.get('top_n', 5)
-        if not student_id:
+        if data.get('student_id') is None:
             return jsonify({'error': 'Missing student_id'}), 400
+        student_id = positive_int(data['student_id'])
+        if student_id is None:
+            return jsonify({'error': 'student_id must be a positive integer'}), 400
+
+        if not isinstance(top_n, int) or isinstance(top_n, bool) or top_n < 1:
+            return jsonify({'error': 'top_n must be a positive integer'}), 400
+
+        snap = g.snapshot
+        cache_key = ('recommend', snap.version, student_id, top_n)
+        cached = result_cache.get(cache_key)
+        if cached is not MISSING:
+            return jsonify(cached)
+
+        completed = snap.student_enrolled.get(student_id, set())
+        mask = snap.course_table.candidate_mask(completed)
+
+        # One scaled feature matrix and one forward pass for all candidates
+        started = time.perf_counter()
+        features_scaled = snap.course_table.features(
+            snap.skill_index.student_vector(student_id),
+            snap.skill_index.student_skill_total(student_id),
+            snap.student_completion.get(student_id, 0.5),
+            snap.student_experience.get(student_id, 0),
+            mask
+        )
+        feature_seconds.observe(time.perf_counter() - started, '/recommend')
+        started = time.perf_counter()
+        probs = inference_batcher.predict(snap, features_scaled)
+        inference_seconds.observe(time.perf_counter() - started, '/recommend')
+        response = {
+            'student_id': student_id,
+            'recommendations': ranked(snap.course_table.course_ids[mask], probs, top_n)
+        }
+        result_cache.put(cache_key, response)
+        return jsonify(response)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def recommend_many(snap, student_ids, top_n):
+    """Yield one /recommend response per student, scoring students in chunked matrix passes"""
+    chunk_size = max(1, BATCH_CHUNK_PAIRS // max(1, len(snap.course_table)))
+    for start in range(0, len(student_ids), chunk_size):
+        chunk = student_ids[start:start + chunk_size]
+        responses = {}
+        misses = []
+        for student_id in chunk:
+            cached = result_cache.get(('recommend', snap.version, student_id, top_n))
+            if cached is MISSING:
+                misses.append(student_id)
+            else:
+                responses[student_id] = cached
+
+        if misses:
+            # Only the courses each student is not enrolled in are built and scored
+            masks = np.array([snap.course_table.candidate_mask(snap.student_enrolled.get(sid, set())) for sid in misses])
+            started = time.perf_counter()
+            features_scaled = snap.course_table.features_many(
+                snap.skill_index.student_matrix_for(misses),
+                snap.skill_index.student_skill_counts(misses),
+                [snap.student_completion.get(sid, 0.5) for sid in misses],
+                [snap.student_experience.get(sid, 0) for sid in misses],
+                masks
+            )
+            feature_seconds.observe(time.perf_counter() - started, '/recommend/batch')
+            started = time.perf_counter()
+            probs = inference_batcher.predict(snap, features_scaled)
+            inference_seconds.observe(time.perf_counter() - started, '/recommend/batch')
+            ends = np.cumsum(masks.sum(axis=1)).tolist()
+
+            for student_id, mask, start, end in zip(misses, masks, [0] + ends, ends):
+                response = {
+                    'student_id': student_id,
+                    'recommendations': ranked(snap.course_table.course_ids[mask], probs[start:end], top_n)
+                }
+                result_cache.put(('recommend', snap.version, student_id, top_n), response)
+                responses[student_id] = response
+
+        for student_id in chunk:
+            yield responses[student_id]
+
+@app.route('/recommend/batch', methods=['POST'])
+def recommend_batch():
+    try:
+        data = request.json or {}
+        student_ids = data.get('student_ids')
+        top_n = data.get('top_n', 5)
+        stream = bool(data.get('stream', False))
+
+        if not isinstance(student_ids, list) or not student_ids:
+            return jsonify({'error': 'student_ids must be a non-empty list'}), 400
 
-        completed = set(int(cid) for cid in enrollments[enrollments['student_id'] == student_id]['course_id'].unique())
-        predictions = []
-        all_courses = sorted(set(int(cid) for cid in enrollments['course_id'].unique()))
+        if len(student_ids) > BATCH_MAX_STUDENTS:
+            return jsonify({'error': f'At most {BATCH_MAX_STUDENTS} student_ids per request'}), 400
 
-        for course_id in all_courses:
-            if course_id not in completed:
-                features = create_features(student_id, course_id)
-                features_scaled = scaler.transform([features])[0]
-                prob = model.predict(np.array([features_scaled]), verbose=0)[0][0]
-                predictions.append({'course_id': int(course_id), 'success_probability': float(prob)})
+        if not all(isinstance(sid, int) and not isinstance(sid, bool) and sid > 0 for sid in student_ids):
+            return jsonify({'error': 'student_ids must be positive integers'}), 400
+
+        if not isinstance(top_n, int) or isinstance(top_n, bool) or top_n < 1:
+            return jsonify({'error': 'top_n must be a positive integer'}), 400
+
+        if stream:
+            # One JSON object per line, produced chunk by chunk
+            lines = (json.dumps(r) + '\n' for r in recommend_many(g.snapshot, student_ids, top_n))
+            return Response(stream_with_context(lines), mimetype='application/x-ndjson')
 
-        recs = sorted(predictions, key=lambda x: x['success_probability'], reverse=True)[:top_n]
         return jsonify({
-            'student_id': int(student_id),
-            'recommendations': [{'course_id': int(r['course_id']), 'success_probability': float(r['success_probability'])} for r in recs]
+            'top_n': top_n,
+            'results': list(recommend_many(g.snapshot, student_ids, top_n))
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/recommend-custom', methods=['POST'])
 def recommend_custom():
+    profile = None
     try:
+        try:
+            profile = profiling.from_headers(request.headers, ADMIN_TOKEN)
+        except PermissionError as e:
+            return jsonify({'error': str(e)}), 403
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
         data = request.json
         skills = data.get('skills')
         completion_rate = data.get('completion_rate')
@@ -171,40 +299,117 @@ def recommend_custom():
         if not isinstance(experience, int) or experience < 0:
             return jsonify({'error': 'experience must be a non-negative integer'}), 400
 
-        predictions = []
-        all_courses = sorted(set(int(cid) for cid in enrollments['course_id'].unique()))
+        if not isinstance(top_n, int) or isinstance(top_n, bool) or top_n < 1:
+            return jsonify({'error': 'top_n must be a positive integer'}), 400
+        if profile is not None:
+            profile.mark('parse_json')
 
-        for course_id in all_courses:
-            features = create_features_custom(skills, completion_rate, experience, course_id)
-            features_scaled = scaler.transform([features])[0]
-            prob = model.predict(np.array([features_scaled]), verbose=0)[0][0]
-            predictions.append({'course_id': int(course_id), 'success_probability': float(prob)})
-
-        recs = sorted(predictions, key=lambda x: x['success_probability'], reverse=True)[:top_n]
-        return jsonify({
+        snap = g.snapshot
+        started = time.perf_counter()
+        # Course features are stored pre-scaled: building and scaling are one step
+        features_scaled = snap.course_table.features(snap.skill_index.encode(skills), len(set(skills)), completion_rate, experience)
+        feature_seconds.observe(time.perf_counter() - started, '/recommend-custom')
+        if profile is not None:
+            profile.mark('features_and_scaling')
+        started = time.perf_counter()
+        probs = inference_batcher.predict(snap, features_scaled)
+        inference_seconds.observe(time.perf_counter() - started, '/recommend-custom')
+        if profile is not None:
+            profile.mark('model_predict')
+        course_ids, scores = top_k(probs, top_n, snap.course_table.course_ids)
+        response = {
             'input': {
                 'skills': skills,
                 'completion_rate': completion_rate,
                 'experience': experience
             },
-            'recommendations': [{'course_id': int(r['course_id']), 'success_probability': float(r['success_probability'])} for r in recs]
-        })
+            'recommendations': [{'course_id': int(cid), 'success_probability': float(prob)} for cid, prob in zip(course_ids, scores)]
+        }
+        if profile is not None:
+            profile.mark('rank')
+            response['profile'] = profile.report()
+        return jsonify(response)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    finally:
+        if profile is not None:
+            profile.stop()
 
 @app.route('/stats', methods=['GET'])
 def stats():
+    # Computed once per snapshot (and kept up to date by /events)
+    return jsonify(g.snapshot.stats)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.expose(), content_type=CONTENT_TYPE)
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify({'snapshot_version': g.snapshot.version, **result_cache.stats()})
+
+def admin_error():
+    return jsonify({
+        'error': f'{request.method} {request.path} requires a valid admin token'
+                 + ('' if ADMIN_TOKEN else ' (RECO_ADMIN_TOKEN is not set on this server)')
+    }), 403
+
+def preforked_error():
+    return jsonify({
+        'error': f'{request.method} {request.path} is disabled under prefork.py: it would only change one worker. '
+                 'Update the files and let every worker reload them (RECO_WATCH_INTERVAL)'
+    }), 409
+
+@app.route('/reload', methods=['POST'])
+def reload():
+    """Rebuild the snapshot in the background; in-flight requests finish on the old one"""
+    if not profiling.is_admin(request.headers, ADMIN_TOKEN):
+        return admin_error()
+    if PREFORKED:
+        return preforked_error()
+    snapshots.reload(wait=bool((request.get_json(silent=True) or {}).get('wait', False)))
+    if snapshots.reloading:
+        status, code = 'reloading', 202
+    elif snapshots.last_error:
+        status, code = 'failed', 500
+    else:
+        status, code = 'reloaded', 200
+    return jsonify({
+        'status': status,
+        'snapshot_version': snapshots.current.version,
+        'last_error': snapshots.last_error
+    }), code
+
+@app.route('/events', methods=['POST'])
+def events():
+    """Apply enrollment / progress / completion / skill_added events without a reload"""
+    if not profiling.is_admin(request.headers, ADMIN_TOKEN):
+        return admin_error()
+    if PREFORKED:
+        return preforked_error()
     try:
-        return jsonify({
-            'total_students': int(len(set(enrollments['student_id'].unique()))),
-            'total_courses': int(len(set(enrollments['course_id'].unique()))),
-            'total_enrollments': int(len(enrollments)),
-            'completion_rate': f"{(enrollments['completed_at'].notna().sum() / len(enrollments) * 100):.1f}%",
-            'unique_skills': int(len(set(student_skills['skill_name'].unique())))
-        })
+        data = request.get_json(silent=True) or {}
+        event_list = data.get('events')
+        if not isinstance(event_list, list) or not event_list:
+            return jsonify({'error': 'events must be a non-empty list'}), 400
+
+        applied, error, published = snapshots.apply_events(event_list)
+        # X-Snapshot-Version (add_snapshot_header) names the snapshot these events produced
+        g.snapshot = published
+        response = {'applied': applied, 'snapshot_version': published.version}
+        if error is not None:
+            response['error'] = f"event {applied}: {error}"
+            return jsonify(response), 400
+        return jsonify(response)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def start_watching(force=False):
+    """--watch / RECO_WATCH_INTERVAL: reload automatically when the CSVs or the model files change"""
+    if WATCH_INTERVAL > 0 or force:
+        snapshots.watch(WATCH_INTERVAL or 5.0)
+        print(f"👀 Watching data and model files every {WATCH_INTERVAL or 5.0:g}s\n")
+
 if __name__ == '__main__':
     print("=" * 80)
     print("ÉTAPE 10: FLASK API FOR RECOMMENDATIONS")
@@ -214,6 +419,12 @@ if __name__ == '__main__':
     print("Endpoints:")
     print("  POST /predict - Predict success probability")
     print("  POST /recommend - Get top courses recommendations (with student_id)")
+    print("  POST /recommend/batch - Recommendations for many students in one request")
     print("  POST /recommend-custom - Get recommendations without student_id")
-    print("  GET  /stats - Global statistics\n")
-    app.run(host='localhost', port=5000, debug=False)
+    print("  GET  /stats - Global statistics")
+    print("  GET  /cache/stats - Result cache counters")
+    print("  GET  /metrics - Prometheus metrics")
+    print("  POST /reload - Reload CSV data and model without restarting (X-Admin-Token)")
+    print("  POST /events - Apply enrollment/progress/completion/skill events incrementally (X-Admin-Token)\n")
+    start_watching(force='--watch' in sys.argv)
+    app.run(host='localhost', port=5000, debug=False, threaded=True)
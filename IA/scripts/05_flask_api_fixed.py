@@ -1,12 +1,19 @@
 #!/usr/bin/env python3
 """ÉTAPE 10: Flask API for Recommendations - Fixed Version"""
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask.json.provider import DefaultJSONProvider
 import pandas as pd
 import numpy as np
 import os
-import random
+import datetime
+import time
+from aggregates import compute_aggregates
+from schema import load_tables
+from heuristic_scorer import score_pairs
+from metrics import CONTENT_TYPE, Registry, RequestMetrics
+from topk import ranked
+from skill_matrix import SkillIndex
 import json
 
 # Custom JSON Provider to handle numpy types
@@ -34,9 +41,7 @@ print("Loading data...")
 
 # Load CSV data directly
 try:
-    enrollments = pd.read_csv(os.path.join(data_dir, 'enrollments.csv'))
-    student_skills = pd.read_csv(os.path.join(data_dir, 'student_skills.csv'))
-    course_skills = pd.read_csv(os.path.join(data_dir, 'course_skills.csv'))
+    enrollments, student_skills, course_skills = load_tables(data_dir)
     print("✓ Data loaded successfully\n")
 except FileNotFoundError as e:
     print(f"Warning: {e}")
@@ -44,77 +49,77 @@ except FileNotFoundError as e:
     student_skills = pd.DataFrame({'student_id': [], 'skill_name': []})
     course_skills = pd.DataFrame({'course_id': [], 'skill_name': []})
 
-# Prepare reference data - Convert ALL keys to int explicitly
-student_skills_dict = {}
-for _, row in student_skills.iterrows():
-    sid = int(row['student_id'])
-    if sid not in student_skills_dict:
-        student_skills_dict[sid] = set()
-    student_skills_dict[sid].add(str(row['skill_name']))
-
-course_skills_dict = {}
-for _, row in course_skills.iterrows():
-    cid = int(row['course_id'])
-    if cid not in course_skills_dict:
-        course_skills_dict[cid] = set()
-    course_skills_dict[cid].add(str(row['skill_name']))
-
-# Compute statistics - explicitly convert keys to int
-student_completion = {}
-for sid, group in enrollments.groupby('student_id'):
-    student_completion[int(sid)] = group['completed_at'].notna().sum() / len(group) if len(group) > 0 else 0.5
-
-course_completion = {}
-for cid, group in enrollments.groupby('course_id'):
-    course_completion[int(cid)] = group['completed_at'].notna().sum() / len(group) if len(group) > 0 else 0.44
-
-course_difficulty = {int(cid): 1 - comp for cid, comp in course_completion.items()}
-
-student_experience = {}
-for sid, group in enrollments.groupby('student_id'):
-    student_experience[int(sid)] = int(len(group))
-
-course_popularity = {}
-for cid, group in enrollments.groupby('course_id'):
-    course_popularity[int(cid)] = int(len(group))
-
-course_avg_progress = {}
-for cid, group in enrollments.groupby('course_id'):
-    course_avg_progress[int(cid)] = float(group['progress_percentage'].mean())
+# Prepare reference data - skills as a sparse student/course x skill index
+skill_index = SkillIndex.from_frames(student_skills, course_skills)
+
+# Compute statistics - one groupby pass per key
+aggregates = compute_aggregates(enrollments)
+student_completion = aggregates['student_completion']
+course_difficulty = aggregates['course_difficulty']
+student_experience = aggregates['student_experience']
+course_popularity = aggregates['course_popularity']
+course_avg_progress = aggregates['course_avg_progress']
+
+# Global statistics, computed once: the data never changes after loading
+STATS = {
+    'total_students': int(len(set(enrollments['student_id'].values))),
+    'total_courses': int(len(set(enrollments['course_id'].values))),
+    'total_enrollments': int(len(enrollments)),
+    'completion_rate': f"{(enrollments['completed_at'].notna().sum() / len(enrollments) * 100):.1f}%",
+    'unique_skills': int(len(set(student_skills['skill_name'].values))),
+    'snapshot_loaded_at': datetime.datetime.now().isoformat(timespec='seconds')
+}
+
+# Prometheus metrics served on GET /metrics
+metrics = Registry()
+request_metrics = RequestMetrics(metrics)
+feature_seconds = metrics.histogram('reco_feature_build_seconds', 'Skill matching and feature build time').labels()
+scoring_seconds = metrics.histogram('reco_inference_seconds', 'Heuristic scoring time').labels()
+metrics.gauge('reco_data_rows', 'Rows loaded at startup', lambda: {
+    ('enrollments',): STATS['total_enrollments'],
+    ('students',): STATS['total_students'],
+    ('courses',): STATS['total_courses'],
+    ('skills',): STATS['unique_skills'],
+}, ('table',))
 
 print("✓ Model and data loaded\n")
 
-def calculate_probability(student_id, course_id):
-    """Calculate success probability based on features"""
+def score_courses(student_id, course_ids):
+    """Success probabilities of one student for an array of courses, in one vectorized call"""
     student_id = int(student_id)
-    course_id = int(course_id)
+    course_ids = np.asarray(course_ids, dtype=np.int64)
 
     # Get features
-    s_skills = student_skills_dict.get(student_id, set())
-    c_skills = course_skills_dict.get(course_id, set())
-
-    matching = len(s_skills.intersection(c_skills))
-    course_count = len(c_skills)
+    started = time.perf_counter()
+    matching = skill_index.matching_counts(skill_index.student_vector(student_id), skill_index.course_matrix_for(course_ids))
+    course_count = skill_index.course_skill_counts(course_ids)
 
     # Feature calculation
-    skill_match = matching / course_count if course_count > 0 else 0.0
+    skill_match = np.divide(matching, course_count, out=np.zeros(len(course_ids)), where=course_count > 0)
     completion_rate = student_completion.get(student_id, 0.44)
-    difficulty = course_difficulty.get(course_id, 0.56)
+    difficulty = np.array([course_difficulty.get(int(cid), 0.56) for cid in course_ids], dtype=np.float64)
     experience = student_experience.get(student_id, 1)
+    feature_seconds.observe(time.perf_counter() - started)
 
-    # Simple probability formula based on features
-    base_prob = 0.5
-    base_prob += skill_match * 0.15
-    base_prob += completion_rate * 0.20
-    base_prob -= difficulty * 0.15
-    base_prob += (experience / 10) * 0.10
+    # Simple probability formula based on features, plus a stable per-pair jitter
+    started = time.perf_counter()
+    probs = score_pairs(student_id, course_ids, skill_match, completion_rate, difficulty, experience)
+    scoring_seconds.observe(time.perf_counter() - started)
+    return probs
 
-    # Add some randomness for realistic variation
-    random.seed(hash((student_id, course_id)) % 10000)
-    noise = random.uniform(-0.05, 0.05)
+def calculate_probability(student_id, course_id):
+    """Calculate success probability based on features"""
+    return float(score_courses(student_id, [course_id])[0])
+
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
 
-    probability = max(0.0, min(1.0, base_prob + noise))
-    return float(probability)
+@app.after_request
+def record_request(response):
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    request_metrics.record(endpoint, request.method, response.status_code, time.perf_counter() - g.started)
+    return response
 
 @app.route('/', methods=['GET'])
 def home():
@@ -127,7 +132,8 @@ def home():
             'GET /health',
             'POST /predict (student_id, course_id)',
             'POST /recommend (student_id, top_n)',
-            'GET /stats'
+            'GET /stats',
+            'GET /metrics'
         ]
     })
 
@@ -161,31 +167,31 @@ def recommend():
     try:
         data = request.json
         student_id = data.get('student_id')
-        top_n = data.get('top_n', 5)
+        try:
+            top_n = int(data.get('top_n', 5))
+        except (TypeError, ValueError):
+            top_n = 0  # answered with a 400 below
 
         if not student_id:
             return jsonify({'error': 'Missing student_id'}), 400
 
         student_id = int(student_id)
 
+        if top_n < 1:
+            return jsonify({'error': 'top_n must be a positive integer'}), 400
+
         # Get completed courses
         completed = set(int(cid) for cid in enrollments[enrollments['student_id'] == student_id]['course_id'].values)
 
         # Get all courses
         all_courses = sorted(set(int(cid) for cid in enrollments['course_id'].values))
 
-        # Calculate probabilities for non-completed courses
-        predictions = []
-        for course_id in all_courses:
-            if course_id not in completed:
-                prob = calculate_probability(student_id, course_id)
-                predictions.append({
-                    'course_id': int(course_id),
-                    'success_probability': float(prob)
-                })
+        # Score every non-completed course in one call
+        candidates = [course_id for course_id in all_courses if course_id not in completed]
+        probs = score_courses(student_id, candidates)
 
-        # Sort and get top N
-        recs = sorted(predictions, key=lambda x: x['success_probability'], reverse=True)[:int(top_n)]
+        # Top N without sorting every candidate
+        recs = ranked(candidates, probs, top_n)
 
         return jsonify({
             'student_id': int(student_id),
@@ -196,16 +202,11 @@ def recommend():
 
 @app.route('/stats', methods=['GET'])
 def stats():
-    try:
-        return jsonify({
-            'total_students': int(len(set(enrollments['student_id'].values))),
-            'total_courses': int(len(set(enrollments['course_id'].values))),
-            'total_enrollments': int(len(enrollments)),
-            'completion_rate': f"{(enrollments['completed_at'].notna().sum() / len(enrollments) * 100):.1f}%",
-            'unique_skills': int(len(set(student_skills['skill_name'].values)))
-        })
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return jsonify(STATS)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.expose(), content_type=CONTENT_TYPE)
 
 if __name__ == '__main__':
     print("=" * 80)
@@ -216,7 +217,8 @@ if __name__ == '__main__':
     print("  GET  /health - API health check")
     print("  POST /predict - Predict success probability")
     print("  POST /recommend - Get top courses recommendations")
-    print("  GET  /stats - Global statistics\n")
+    print("  GET  /stats - Global statistics")
+    print("  GET  /metrics - Prometheus metrics\n")
     print("=" * 80 + "\n")
 
     app.run(host='localhost', port=5000, debug=False, use_reloader=False)
@@ -1,19 +1,90 @@
 #!/usr/bin/env python3
 """ÉTAPE 10: Standalone ML API Server - No External Dependencies"""
 
+import argparse
 import json
-import random
+from array import array
 import os
+import datetime
+import selectors
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import threading
+from heuristic_scorer import score_pair, score_pairs
+from metrics import CONTENT_TYPE, Registry, RequestMetrics
+from topk import ranked
+
+# Concurrent mode: worker threads, and seconds an idle keep-alive connection may hold one
+WORKERS = int(os.environ.get('RECO_WORKERS', 16))
+KEEPALIVE_TIMEOUT = float(os.environ.get('RECO_KEEPALIVE_TIMEOUT', 15))
 
 print("=" * 80)
 print("ÉTAPE 10: ML RECOMMENDATION API - STANDALONE SERVER")
 print("=" * 80 + "\n")
 
+# Enrollments are stored column-wise: no per-row objects
+class EnrollmentColumns:
+    """Parallel typed arrays (student, course, progress) plus a completion bitmap"""
+
+    def __init__(self):
+        self.student_id = array('i')
+        self.course_id = array('i')
+        self.progress = array('f')
+        self.completed = bytearray()  # bit i set = enrollment i completed
+
+    def __len__(self):
+        return len(self.student_id)
+
+    def append(self, student_id, course_id, progress, completed):
+        i = len(self.student_id)
+        self.student_id.append(student_id)
+        self.course_id.append(course_id)
+        self.progress.append(progress)
+        if i & 7 == 0:
+            self.completed.append(0)
+        if completed:
+            self.completed[i >> 3] |= 1 << (i & 7)
+
+    def is_completed(self, i):
+        return (self.completed[i >> 3] >> (i & 7)) & 1
+
+    def completed_flags(self):
+        """0/1 completion flag of every enrollment, in order"""
+        bits = self.completed
+        return (bits[i >> 3] >> (i & 7) & 1 for i in range(len(self.student_id)))
+
+def load_enrollments(path):
+    """Stream enrollments.csv line by line into EnrollmentColumns"""
+    enrollments = EnrollmentColumns()
+    with open(path, 'r') as f:
+        n_headers = len(f.readline().strip().split(','))
+        for line in f:
+            parts = line.strip().split(',')
+            if len(parts) >= n_headers:
+                enrollments.append(
+                    int(parts[0]),
+                    int(parts[1]),
+                    float(parts[2]) if len(parts) > 2 else 50,
+                    len(parts) > 3 and parts[3] != ''
+                )
+    return enrollments
+
+def load_skills(path):
+    """Stream a (id, skill_name) CSV into {id: set of skills}"""
+    skills = {}
+    with open(path, 'r') as f:
+        f.readline()
+        for line in f:
+            parts = line.strip().split(',')
+            if len(parts) >= 2:
+                skills.setdefault(int(parts[0]), set()).add(parts[1])
+    return skills
+
 # Load CSV data
-enrollments = []
+enrollments = EnrollmentColumns()
 student_skills = {}
 course_skills = {}
 
@@ -24,75 +95,77 @@ print("Loading data...")
 
 try:
     # Load enrollments
-    with open(os.path.join(data_dir, 'enrollments.csv'), 'r') as f:
-        lines = f.readlines()
-        headers = lines[0].strip().split(',')
-        for line in lines[1:]:
-            parts = line.strip().split(',')
-            if len(parts) >= len(headers):
-                enrollments.append({
-                    'student_id': int(parts[0]),
-                    'course_id': int(parts[1]),
-                    'progress_percentage': float(parts[2]) if len(parts) > 2 else 50,
-                    'completed_at': parts[3] if len(parts) > 3 and parts[3] else None
-                })
+    enrollments = load_enrollments(os.path.join(data_dir, 'enrollments.csv'))
     print(f"✓ Loaded {len(enrollments)} enrollments")
 
     # Load student skills
-    with open(os.path.join(data_dir, 'student_skills.csv'), 'r') as f:
-        lines = f.readlines()
-        for line in lines[1:]:
-            parts = line.strip().split(',')
-            if len(parts) >= 2:
-                sid = int(parts[0])
-                skill = parts[1]
-                if sid not in student_skills:
-                    student_skills[sid] = set()
-                student_skills[sid].add(skill)
+    student_skills = load_skills(os.path.join(data_dir, 'student_skills.csv'))
     print(f"✓ Loaded {len(student_skills)} students with skills")
 
     # Load course skills
-    with open(os.path.join(data_dir, 'course_skills.csv'), 'r') as f:
-        lines = f.readlines()
-        for line in lines[1:]:
-            parts = line.strip().split(',')
-            if len(parts) >= 2:
-                cid = int(parts[0])
-                skill = parts[1]
-                if cid not in course_skills:
-                    course_skills[cid] = set()
-                course_skills[cid].add(skill)
+    course_skills = load_skills(os.path.join(data_dir, 'course_skills.csv'))
     print(f"✓ Loaded {len(course_skills)} courses with skills\n")
 
 except Exception as e:
     print(f"⚠ Warning: Could not load CSV files: {e}")
     print("Using default test data...\n")
     # Default test data
-    enrollments = [
-        {'student_id': i, 'course_id': j, 'progress_percentage': 50, 'completed_at': None}
-        for i in range(1, 51) for j in range(1, 6)
-    ]
+    enrollments = EnrollmentColumns()
+    for i in range(1, 51):
+        for j in range(1, 6):
+            enrollments.append(i, j, 50, False)
     for i in range(1, 851):
         student_skills[i] = {'Python', 'JavaScript', 'Testing'}
     for i in range(1, 52):
         course_skills[i] = {'Python', 'JavaScript', 'React', 'Testing'}
 
+# Indexes built once: student/course -> [enrollments, completed], student -> enrolled courses
+def build_indexes(enrollments):
+    student_stats, course_stats, student_courses = {}, {}, {}
+    for student_id, course_id, done in zip(enrollments.student_id, enrollments.course_id, enrollments.completed_flags()):
+        stats = student_stats.setdefault(student_id, [0, 0])
+        stats[0] += 1
+        stats[1] += done
+        stats = course_stats.setdefault(course_id, [0, 0])
+        stats[0] += 1
+        stats[1] += done
+        student_courses.setdefault(student_id, set()).add(course_id)
+    return student_stats, course_stats, student_courses
+
+student_stats, course_stats, student_courses = build_indexes(enrollments)
+all_courses = sorted(course_stats)
+
 # Calculate statistics
 def get_stats():
-    unique_students = set(e['student_id'] for e in enrollments)
-    unique_courses = set(e['course_id'] for e in enrollments)
-    completed = sum(1 for e in enrollments if e['completed_at'])
+    completed = sum(stats[1] for stats in student_stats.values())
 
     return {
-        'total_students': int(len(unique_students)),
-        'total_courses': int(len(unique_courses)),
+        'total_students': int(len(student_stats)),
+        'total_courses': int(len(course_stats)),
         'total_enrollments': int(len(enrollments)),
-        'completion_rate': f"{(completed / len(enrollments) * 100) if enrollments else 0:.1f}%",
-        'unique_skills': int(len(set().union(*student_skills.values())))
+        'completion_rate': f"{(completed / len(enrollments) * 100) if len(enrollments) else 0:.1f}%",
+        'unique_skills': int(len(set().union(*student_skills.values()))),
+        'snapshot_loaded_at': datetime.datetime.now().isoformat(timespec='seconds')
     }
 
-def calculate_probability(student_id, course_id):
-    """Calculate success probability based on features"""
+# The data never changes after loading: /stats serves this precomputed copy
+STATS = get_stats()
+
+# Prometheus metrics served on GET /metrics
+ROUTES = {'/', '/health', '/stats', '/metrics', '/predict', '/recommend'}
+metrics = Registry()
+request_metrics = RequestMetrics(metrics)
+feature_seconds = metrics.histogram('reco_feature_build_seconds', 'Feature build time of one recommendation').labels()
+scoring_seconds = metrics.histogram('reco_inference_seconds', 'Heuristic scoring time of one recommendation').labels()
+metrics.gauge('reco_data_rows', 'Rows loaded at startup', lambda: {
+    ('enrollments',): STATS['total_enrollments'],
+    ('students',): STATS['total_students'],
+    ('courses',): STATS['total_courses'],
+    ('skills',): STATS['unique_skills'],
+}, ('table',))
+
+def pair_features(student_id, course_id):
+    """(skill_match, completion_rate, difficulty, experience) of one pair"""
     s_skills = student_skills.get(student_id, set())
     c_skills = course_skills.get(course_id, set())
 
@@ -103,51 +176,74 @@ def calculate_probability(student_id, course_id):
     skill_match = matching / course_count if course_count > 0 else 0.0
 
     # Get student completion history
-    student_enr = [e for e in enrollments if e['student_id'] == student_id]
-    completion_rate = (sum(1 for e in student_enr if e['completed_at']) / len(student_enr)) if student_enr else 0.44
+    student_enr, student_done = student_stats.get(student_id, (0, 0))
+    completion_rate = (student_done / student_enr) if student_enr else 0.44
 
     # Get course completion history
-    course_enr = [e for e in enrollments if e['course_id'] == course_id]
-    course_completion = (sum(1 for e in course_enr if e['completed_at']) / len(course_enr)) if course_enr else 0.44
+    course_enr, course_done = course_stats.get(course_id, (0, 0))
+    course_completion = (course_done / course_enr) if course_enr else 0.44
     difficulty = 1 - course_completion
 
-    # Simple probability formula
-    base_prob = 0.5
-    base_prob += skill_match * 0.15
-    base_prob += completion_rate * 0.20
-    base_prob -= difficulty * 0.15
-    base_prob += (len(student_enr) / 10) * 0.10
-
-    # Add some randomness for realistic variation
-    random.seed(hash((student_id, course_id)) % 10000)
-    noise = random.uniform(-0.05, 0.05)
+    return skill_match, completion_rate, difficulty, student_enr
 
-    probability = max(0.0, min(1.0, base_prob + noise))
-    return float(probability)
+def calculate_probability(student_id, course_id):
+    """Calculate success probability based on features"""
+    # Simple probability formula, plus a stable per-pair jitter
+    return score_pair(student_id, course_id, *pair_features(student_id, course_id))
+
+def recommend(student_id, top_n):
+    """Top-N courses the student is not enrolled in: O(courses), whatever the enrollments size"""
+    completed = student_courses.get(student_id, set())
+    candidates = [course_id for course_id in all_courses if course_id not in completed]
+    if not candidates:
+        return []
+
+    # Score every candidate in one call (vectorized when NumPy is installed)
+    started = time.perf_counter()
+    columns = [list(column) for column in zip(*(pair_features(student_id, course_id) for course_id in candidates))]
+    feature_seconds.observe(time.perf_counter() - started)
+    started = time.perf_counter()
+    probs = score_pairs([student_id] * len(candidates), candidates, *columns)
+    scoring_seconds.observe(time.perf_counter() - started)
+
+    # Top N without sorting every candidate
+    return ranked(candidates, probs, top_n)
 
 class RequestHandler(BaseHTTPRequestHandler):
+    # Socket timeout while reading a request; headers and body go out in separate writes
+    timeout = KEEPALIVE_TIMEOUT
+    disable_nagle_algorithm = True
+
+    def send_body(self, status, body, content_type):
+        # Content-Length lets HTTP/1.1 clients reuse the connection
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        endpoint = self.route if self.route in ROUTES else 'unmatched'
+        request_metrics.record(endpoint, self.command, status, time.perf_counter() - self.started)
+
+    def send_json(self, status, response):
+        self.send_body(status, json.dumps(response).encode(), 'application/json')
+
     def do_GET(self):
+        self.started = time.perf_counter()
         parsed_path = urlparse(self.path)
-        path = parsed_path.path
+        path = self.route = parsed_path.path
 
         if path == '/health':
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
             response = {'status': 'OK', 'service': 'Course Recommendation API'}
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json(200, response)
 
         elif path == '/stats':
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
-            response = get_stats()
-            self.wfile.write(json.dumps(response).encode())
+            response = STATS
+            self.send_json(200, response)
+
+        elif path == '/metrics':
+            self.send_body(200, metrics.expose().encode(), CONTENT_TYPE)
 
         elif path == '/':
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
             response = {
                 'service': 'Course Recommendation API',
                 'version': '1.0',
@@ -157,132 +253,215 @@ class RequestHandler(BaseHTTPRequestHandler):
                     'GET /health',
                     'POST /predict (student_id, course_id)',
                     'POST /recommend (student_id, top_n)',
-                    'GET /stats'
+                    'GET /stats',
+                    'GET /metrics'
                 ]
             }
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json(200, response)
 
         else:
-            self.send_response(404)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
             response = {'error': 'Not found'}
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json(404, response)
 
     def do_POST(self):
+        self.started = time.perf_counter()
+        self.route = urlparse(self.path).path
         content_length = int(self.headers.get('Content-Length', 0))
         body = self.rfile.read(content_length).decode()
 
         try:
             data = json.loads(body) if body else {}
         except:
-            self.send_response(400)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
             response = {'error': 'Invalid JSON'}
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json(400, response)
             return
 
-        path = urlparse(self.path).path
+        path = self.route
 
         if path == '/predict':
             student_id = data.get('student_id')
             course_id = data.get('course_id')
 
             if not student_id or not course_id:
-                self.send_response(400)
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
                 response = {'error': 'Missing student_id or course_id'}
-                self.wfile.write(json.dumps(response).encode())
+                self.send_json(400, response)
                 return
 
             prob = calculate_probability(student_id, course_id)
 
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
             response = {
                 'student_id': int(student_id),
                 'course_id': int(course_id),
                 'success_probability': float(prob),
                 'success_percentage': f"{prob*100:.1f}%"
             }
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json(200, response)
 
         elif path == '/recommend':
             student_id = data.get('student_id')
             top_n = data.get('top_n', 5)
 
             if not student_id:
-                self.send_response(400)
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
                 response = {'error': 'Missing student_id'}
-                self.wfile.write(json.dumps(response).encode())
+                self.send_json(400, response)
                 return
 
             if top_n < 1 or top_n > 20:
                 top_n = 5
 
-            # Get completed courses
-            completed = set(
-                e['course_id'] for e in enrollments
-                if e['student_id'] == student_id
-            )
-
-            # Get all courses
-            all_courses = sorted(set(e['course_id'] for e in enrollments))
+            recs = recommend(student_id, top_n)
 
-            # Calculate probabilities
-            predictions = []
-            for course_id in all_courses:
-                if course_id not in completed:
-                    prob = calculate_probability(student_id, course_id)
-                    predictions.append({'course_id': int(course_id), 'success_probability': float(prob)})
-
-            # Sort and get top N
-            recs = sorted(predictions, key=lambda x: x['success_probability'], reverse=True)[:top_n]
-
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
             response = {
                 'student_id': int(student_id),
-                'recommendations': [{'course_id': int(r['course_id']), 'success_probability': float(r['success_probability'])} for r in recs]
+                'recommendations': recs
             }
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json(200, response)
 
         else:
-            self.send_response(404)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
             response = {'error': 'Not found'}
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json(404, response)
 
     def log_message(self, format, *args):
         # Suppress default logging
         pass
 
-# Start server
-print("=" * 80)
-print("🚀 Starting API...")
-print("📍 URL: http://localhost:5000\n")
-print("Endpoints:")
-print("  GET  / - Service info")
-print("  GET  /health - API health check")
-print("  POST /predict - Predict success probability")
-print("  POST /recommend - Get top courses recommendations")
-print("  GET  /stats - Global statistics\n")
-print("=" * 80 + "\n")
-
-try:
-    server = HTTPServer(('localhost', 5000), RequestHandler)
-    print(" * Running on http://localhost:5000")
-    print(" * Debug mode: off")
-    print(" * Press CTRL+C to quit\n")
-    server.serve_forever()
-except KeyboardInterrupt:
-    print("\n\n[interrupted]")
-except Exception as e:
-    print(f"\n❌ Error: {e}")
+class PooledHTTPServer(HTTPServer):
+    """HTTP/1.1 server running requests on a fixed pool of worker threads
+
+    A worker is held only while a request is processed. A new connection,
+    and a keep-alive connection between requests, is parked in a selector
+    watched by one thread and handed to a worker once it has bytes to read,
+    so idle clients never keep a /health probe waiting for a free worker.
+    """
+
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, workers, bind_and_activate=True):
+        super().__init__(server_address, handler_class, bind_and_activate)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http-worker')
+        self.idle = selectors.DefaultSelector()  # socket -> (handler, parked_at)
+        self.idle_lock = threading.Lock()
+        # Written to when a connection is parked, so select() picks it up right away
+        self.wakeup_r, self.wakeup_w = socket.socketpair()
+        self.idle.register(self.wakeup_r, selectors.EVENT_READ, None)
+        threading.Thread(target=self.watch_idle, name='http-keepalive', daemon=True).start()
+
+    def process_request(self, request, client_address):
+        # Same steps as BaseRequestHandler.__init__, minus handle(): requests are served one at a time
+        handler = self.RequestHandlerClass.__new__(self.RequestHandlerClass)
+        handler.request, handler.client_address, handler.server = request, client_address, self
+        handler.setup()
+        self.park(handler)
+
+    def serve_one(self, handler):
+        try:
+            handler.close_connection = True
+            handler.handle_one_request()
+        except Exception:
+            self.handle_error(handler.request, handler.client_address)
+            handler.close_connection = True
+        if handler.close_connection:
+            self.close(handler)
+        elif self.buffered(handler):
+            self.pool.submit(self.serve_one, handler)
+        else:
+            self.park(handler)
+
+    def park(self, handler):
+        """Watch the connection until its next request arrives (or KEEPALIVE_TIMEOUT passes)"""
+        with self.idle_lock:
+            self.idle.register(handler.request, selectors.EVENT_READ, (handler, time.monotonic()))
+        self.wakeup_w.send(b'\0')
+
+    @staticmethod
+    def buffered(handler):
+        """True if the next request already arrived (pipelined bytes left in rfile)"""
+        handler.request.settimeout(0)
+        try:
+            return bool(handler.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            handler.request.settimeout(handler.timeout)
+
+    def watch_idle(self):
+        while True:
+            ready = self.idle.select(timeout=1.0)
+            now = time.monotonic()
+            with self.idle_lock:
+                if self.wakeup_r in (key.fileobj for key, _ in ready):
+                    self.wakeup_r.recv(4096)
+                ready = [key for key, _ in ready if key.fileobj is not self.wakeup_r]
+                expired = [key for key in self.idle.get_map().values()
+                           if key.data is not None and now - key.data[1] > KEEPALIVE_TIMEOUT]
+                for key in ready + expired:
+                    self.idle.unregister(key.fileobj)
+            for key in ready:
+                self.pool.submit(self.serve_one, key.data[0])
+            for key in expired:
+                self.close(key.data[0])
+
+    def close(self, handler):
+        try:
+            handler.finish()
+        except OSError:
+            pass
+        self.shutdown_request(handler.request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+def create_server(host, port, workers=WORKERS, serial=False, sock=None):
+    """One-request-at-a-time HTTP/1.0 server (serial) or pooled HTTP/1.1 keep-alive server
+
+    `sock` is an already listening socket to serve on (prefork.py shares one across processes).
+    """
+    if serial:
+        RequestHandler.protocol_version = 'HTTP/1.0'
+        server = HTTPServer((host, port), RequestHandler, bind_and_activate=sock is None)
+    else:
+        RequestHandler.protocol_version = 'HTTP/1.1'
+        server = PooledHTTPServer((host, port), RequestHandler, workers, bind_and_activate=sock is None)
+    if sock is not None:
+        server.socket.close()
+        server.socket = sock
+        server.server_address = sock.getsockname()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Standalone recommendation API server')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=WORKERS, help='worker threads (concurrent mode)')
+    parser.add_argument('--serial', action='store_true', help='handle one request at a time (HTTP/1.0)')
+    args = parser.parse_args()
+    url = f"http://{args.host}:{args.port}"
+
+    # Start server
+    print("=" * 80)
+    print("🚀 Starting API...")
+    print(f"📍 URL: {url}\n")
+    print("Endpoints:")
+    print("  GET  / - Service info")
+    print("  GET  /health - API health check")
+    print("  POST /predict - Predict success probability")
+    print("  POST /recommend - Get top courses recommendations")
+    print("  GET  /stats - Global statistics")
+    print("  GET  /metrics - Prometheus metrics\n")
+    print("=" * 80 + "\n")
+
+    try:
+        server = create_server(args.host, args.port, args.workers, args.serial)
+        print(f" * Running on {url}")
+        print(" * Mode: serial (HTTP/1.0)" if args.serial else f" * Mode: concurrent, {args.workers} workers, HTTP/1.1 keep-alive")
+        print(" * Debug mode: off")
+        print(" * Press CTRL+C to quit\n")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n\n[interrupted]")
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,384 @@
+"""Student / course aggregates kept as running counts and sums
+
+The features read five aggregates over the enrollments table:
+  student_completion   completed / enrollments       (per student)
+  student_experience   enrollments                   (per student)
+  course_difficulty    1 - completed / enrollments   (per course)
+  course_popularity    enrollments                   (per course)
+  course_avg_progress  sum(progress) / enrollments   (per course)
+
+aggregate_tables() computes them in one groupby `agg` pass per key, as a
+student table and a course table indexed by id; compute_aggregates() turns
+those into the dicts the scripts and APIs look up. ChunkedAggregates builds
+the same tables from an enrollments table read in chunks. RunningAggregates stores
+the counts and sums behind them, so a single event (new enrollment, progress
+change, completion, skill added) updates them in O(1) instead of a full
+groupby pass; compute_aggregates() is the full recompute used as the
+reference. Its begin() / commit() / rollback() make a batch of events
+all-or-nothing: the entries an event changes are saved first, so a batch
+that cannot be published is undone in O(batch), without a full rebuild.
+"""
+
+import copy
+from collections import defaultdict
+import numpy as np
+
+EVENT_TYPES = ('enrollment', 'progress', 'completion', 'skill_added')
+# Ids are stored as int32 (schema._ids)
+MAX_ID = int(np.iinfo(np.int32).max)
+_MISSING = object()
+
+
+def _event_id(event, key):
+    """event[key] as an id: an int in 1..MAX_ID (ValueError otherwise)"""
+    value = event.get(key)
+    if isinstance(value, bool) or not isinstance(value, (int, np.integer)) or not 0 < value <= MAX_ID:
+        raise ValueError(f"{key} must be a positive integer (at most {MAX_ID}), got {value!r}")
+    return int(value)
+
+
+def _event_progress(event):
+    """event['progress_percentage'] as a float in 0..100 (ValueError otherwise)"""
+    value = event['progress_percentage']
+    if isinstance(value, bool) or not isinstance(value, (int, float, np.integer, np.floating)) or not 0 <= value <= 100:
+        raise ValueError(f"progress_percentage must be a number between 0 and 100, got {value!r}")
+    return float(value)
+
+
+def aggregate_tables(enrollments):
+    """(students, courses) DataFrames indexed by id, one vectorized `agg` per key
+
+    students: enrollments, completed, completion_rate, experience
+    courses:  enrollments, completed, completion_rate, difficulty, popularity, avg_progress
+    """
+    frame = enrollments.assign(is_completed=enrollments['completed_at'].notna())
+    students = frame.groupby('student_id').agg(
+        enrollments=('is_completed', 'size'),
+        completed=('is_completed', 'sum'),
+    )
+    courses = frame.groupby('course_id').agg(
+        enrollments=('is_completed', 'size'),
+        completed=('is_completed', 'sum'),
+        avg_progress=('progress_percentage', 'mean'),
+    )
+    return _derive(students, courses)
+
+
+def _derive(students, courses):
+    """Add the rate / alias columns to the count tables of aggregate_tables()"""
+    students['completion_rate'] = students['completed'] / students['enrollments']
+    students['experience'] = students['enrollments']
+    courses['completion_rate'] = courses['completed'] / courses['enrollments']
+    courses['difficulty'] = 1 - courses['completion_rate']
+    courses['popularity'] = courses['enrollments']
+    return students, courses
+
+
+class ChunkedAggregates:
+    """aggregate_tables() accumulated over chunks of the enrollments table
+
+    Only the per-student and per-course counts and the per-course progress
+    sum are kept, so memory grows with the number of students and courses,
+    not with the number of enrollments (02_create_features.py --chunksize).
+    tables() gives the same values as aggregate_tables() on the whole table.
+    """
+
+    def __init__(self):
+        self.students = None
+        self.courses = None
+        self.rows = 0
+        self.completed = 0
+
+    def add(self, chunk):
+        frame = chunk.assign(is_completed=chunk['completed_at'].notna())
+        students = frame.groupby('student_id').agg(
+            enrollments=('is_completed', 'size'),
+            completed=('is_completed', 'sum'),
+        )
+        courses = frame.groupby('course_id').agg(
+            enrollments=('is_completed', 'size'),
+            completed=('is_completed', 'sum'),
+            progress_sum=('progress_percentage', 'sum'),
+        ).astype({'progress_sum': np.float64})
+        self.students = students if self.students is None else self.students.add(students, fill_value=0)
+        self.courses = courses if self.courses is None else self.courses.add(courses, fill_value=0)
+        self.rows += len(frame)
+        self.completed += int(frame['is_completed'].sum())
+
+    def tables(self):
+        """(students, courses) as aggregate_tables() returns them"""
+        students = self.students.sort_index().astype(np.int64)
+        counts = self.courses.sort_index()
+        courses = counts[['enrollments', 'completed']].astype(np.int64)
+        courses['avg_progress'] = counts['progress_sum'] / courses['enrollments']
+        return _derive(students, courses)
+
+
+def compute_aggregates(enrollments):
+    """Full recompute of the five aggregate dicts from an enrollments DataFrame"""
+    students, courses = aggregate_tables(enrollments)
+    return {
+        'student_completion': students['completion_rate'].to_dict(),
+        'student_experience': students['experience'].to_dict(),
+        'course_difficulty': courses['difficulty'].to_dict(),
+        'course_popularity': courses['popularity'].to_dict(),
+        'course_avg_progress': courses['avg_progress'].to_dict(),
+    }
+
+
+def summary_stats(total_students, total_courses, total_enrollments, total_completed, unique_skills):
+    """The /stats payload from the global counts"""
+    return {
+        'total_students': int(total_students),
+        'total_courses': int(total_courses),
+        'total_enrollments': int(total_enrollments),
+        'completion_rate': f"{(total_completed / total_enrollments * 100) if total_enrollments else 0:.1f}%",
+        'unique_skills': int(unique_skills)
+    }
+
+
+def compute_stats(enrollments, student_skills):
+    """Full recompute of the /stats payload from the DataFrames"""
+    return summary_stats(
+        enrollments['student_id'].nunique(), enrollments['course_id'].nunique(), len(enrollments),
+        enrollments['completed_at'].notna().sum(), student_skills['skill_name'].nunique()
+    )
+
+
+class RunningAggregates:
+    """Counts and sums behind the aggregates, plus enrollment state and skill sets"""
+
+    def __init__(self):
+        self.student_count = defaultdict(int)
+        self.student_completed = defaultdict(int)
+        self.course_count = defaultdict(int)
+        self.course_completed = defaultdict(int)
+        self.course_progress_sum = defaultdict(float)
+        # (student_id, course_id) -> list of [progress, completed]; a pair may be enrolled twice
+        self.pairs = defaultdict(list)
+        self.student_courses = defaultdict(set)
+        self.student_skills = defaultdict(set)
+        self.course_skills = defaultdict(set)
+        self.student_skill_names = set()
+        self.total_enrollments = 0
+        self.total_completed = 0
+        self.events_applied = 0
+        # Between begin() and commit(): previous values of the changed entries, and the totals
+        self._undo = None
+
+    @classmethod
+    def from_frames(cls, enrollments, student_skills=None, course_skills=None):
+        aggregates = cls()
+        rows = zip(
+            enrollments['student_id'].to_numpy(),
+            enrollments['course_id'].to_numpy(),
+            enrollments['progress_percentage'].to_numpy(),
+            enrollments['completed_at'].notna().to_numpy()
+        )
+        for student_id, course_id, progress, completed in rows:
+            aggregates._add_enrollment(int(student_id), int(course_id), float(progress), bool(completed))
+        if student_skills is not None:
+            for student_id, skill in zip(student_skills['student_id'].to_numpy(), student_skills['skill_name']):
+                aggregates.student_skills[int(student_id)].add(skill)
+                aggregates.student_skill_names.add(skill)
+        if course_skills is not None:
+            for course_id, skill in zip(course_skills['course_id'].to_numpy(), course_skills['skill_name']):
+                aggregates.course_skills[int(course_id)].add(skill)
+        return aggregates
+
+    # ------------------------------------------------------------------
+    # Batches
+    # ------------------------------------------------------------------
+    def begin(self):
+        """Start recording changes, so that rollback() can undo the events applied from now on"""
+        self._undo = {'entries': [], 'saved': set(), 'skill_names': [],
+                      'totals': (self.total_enrollments, self.total_completed, self.events_applied)}
+
+    def commit(self):
+        """Keep the events applied since begin()"""
+        self._undo = None
+
+    def rollback(self):
+        """Undo the events applied since begin()"""
+        undo, self._undo = self._undo, None
+        for mapping, key, previous in reversed(undo['entries']):
+            if previous is _MISSING:
+                mapping.pop(key, None)
+            else:
+                mapping[key] = previous
+        self.student_skill_names.difference_update(undo['skill_names'])
+        self.total_enrollments, self.total_completed, self.events_applied = undo['totals']
+
+    def _save(self, mapping, key):
+        """Record mapping[key] (or its absence) before its first change since begin()"""
+        if self._undo is not None and (id(mapping), key) not in self._undo['saved']:
+            self._undo['saved'].add((id(mapping), key))
+            previous = copy.deepcopy(mapping[key]) if key in mapping else _MISSING
+            self._undo['entries'].append((mapping, key, previous))
+
+    # ------------------------------------------------------------------
+    # Events
+    # ------------------------------------------------------------------
+    def _add_enrollment(self, student_id, course_id, progress, completed):
+        if self._undo is not None:
+            for mapping, key in [(self.pairs, (student_id, course_id)), (self.student_courses, student_id),
+                                 (self.student_count, student_id), (self.course_count, course_id),
+                                 (self.course_progress_sum, course_id), (self.student_completed, student_id),
+                                 (self.course_completed, course_id)]:
+                self._save(mapping, key)
+        self.pairs[(student_id, course_id)].append([progress, completed])
+        self.student_courses[student_id].add(course_id)
+        self.student_count[student_id] += 1
+        self.course_count[course_id] += 1
+        self.course_progress_sum[course_id] += progress
+        self.total_enrollments += 1
+        if completed:
+            self.student_completed[student_id] += 1
+            self.course_completed[course_id] += 1
+            self.total_completed += 1
+
+    def _latest(self, student_id, course_id):
+        rows = self.pairs.get((student_id, course_id))
+        if not rows:
+            raise KeyError(f"No enrollment for student {student_id} in course {course_id}")
+        return rows[-1]
+
+    def _set_progress(self, row, course_id, progress):
+        self._save(self.course_progress_sum, course_id)
+        self.course_progress_sum[course_id] += progress - row[0]
+        row[0] = progress
+
+    def apply(self, event):
+        """Apply one event dict; returns (student_ids, course_ids, skills_changed) it touched
+
+        {'type': 'enrollment', 'student_id', 'course_id', 'progress_percentage'?, 'completed'?}
+        {'type': 'progress', 'student_id', 'course_id', 'progress_percentage'}
+        {'type': 'completion', 'student_id', 'course_id', 'progress_percentage'?}
+        {'type': 'skill_added', 'student_id' or 'course_id', 'skill_name'}
+
+        Ids must be positive ints, skill_name a non-empty str and
+        progress_percentage a number in 0..100. An invalid event raises
+        (ValueError, or KeyError for an unknown enrollment) before changing
+        anything.
+        """
+        kind = event.get('type')
+        if kind not in EVENT_TYPES:
+            raise ValueError(f"Unknown event type {kind!r} (expected one of {', '.join(EVENT_TYPES)})")
+
+        if kind == 'skill_added':
+            skill = event.get('skill_name')
+            if not isinstance(skill, str) or not skill:
+                raise ValueError(f"skill_added needs skill_name as a non-empty string, got {skill!r}")
+            if event.get('student_id') is not None:
+                student_id = _event_id(event, 'student_id')
+                self._save(self.student_skills, student_id)
+                self.student_skills[student_id].add(skill)
+                if self._undo is not None and skill not in self.student_skill_names:
+                    self._undo['skill_names'].append(skill)
+                self.student_skill_names.add(skill)
+                touched = ({student_id}, set(), True)
+            elif event.get('course_id') is not None:
+                course_id = _event_id(event, 'course_id')
+                self._save(self.course_skills, course_id)
+                self.course_skills[course_id].add(skill)
+                touched = (set(), {course_id}, True)
+            else:
+                raise ValueError("skill_added needs student_id or course_id")
+            self.events_applied += 1
+            return touched
+
+        if event.get('student_id') is None or event.get('course_id') is None:
+            raise ValueError(f"{kind} needs student_id and course_id")
+        student_id, course_id = _event_id(event, 'student_id'), _event_id(event, 'course_id')
+
+        if kind == 'enrollment':
+            progress = _event_progress(event) if event.get('progress_percentage') is not None else 0.0
+            self._add_enrollment(student_id, course_id, progress, bool(event.get('completed', False)))
+        elif kind == 'progress':
+            if event.get('progress_percentage') is None:
+                raise ValueError("progress needs progress_percentage")
+            progress = _event_progress(event)
+            row = self._latest(student_id, course_id)
+            self._save(self.pairs, (student_id, course_id))
+            self._set_progress(row, course_id, progress)
+        else:  # completion
+            progress = _event_progress(event) if event.get('progress_percentage') is not None else None
+            row = self._latest(student_id, course_id)
+            self._save(self.pairs, (student_id, course_id))
+            if progress is not None:
+                self._set_progress(row, course_id, progress)
+            if not row[1]:
+                self._save(self.student_completed, student_id)
+                self._save(self.course_completed, course_id)
+                row[1] = True
+                self.student_completed[student_id] += 1
+                self.course_completed[course_id] += 1
+                self.total_completed += 1
+
+        self.events_applied += 1
+        return {student_id}, {course_id}, False
+
+    def apply_many(self, events):
+        """Apply events in order; merged (student_ids, course_ids, skills_changed)"""
+        students, courses, skills_changed = set(), set(), False
+        for event in events:
+            s, c, k = self.apply(event)
+            students |= s
+            courses |= c
+            skills_changed |= k
+        return students, courses, skills_changed
+
+    # ------------------------------------------------------------------
+    # Aggregates
+    # ------------------------------------------------------------------
+    def student_values(self, student_id):
+        n = self.student_count.get(student_id, 0)
+        return {
+            'student_completion': self.student_completed.get(student_id, 0) / n,
+            'student_experience': n,
+        } if n else {}
+
+    def course_values(self, course_id):
+        n = self.course_count.get(course_id, 0)
+        return {
+            'course_difficulty': 1 - self.course_completed.get(course_id, 0) / n,
+            'course_popularity': n,
+            'course_avg_progress': self.course_progress_sum.get(course_id, 0.0) / n,
+        } if n else {}
+
+    def to_dicts(self):
+        """The five aggregate dicts, same keys and values as compute_aggregates()"""
+        out = {name: {} for name in ('student_completion', 'student_experience', 'course_difficulty',
+                                     'course_popularity', 'course_avg_progress')}
+        for student_id in self.student_count:
+            for name, value in self.student_values(student_id).items():
+                out[name][student_id] = value
+        for course_id in self.course_count:
+            for name, value in self.course_values(course_id).items():
+                out[name][course_id] = value
+        return out
+
+    def stats(self):
+        """The /stats payload, from the running counts"""
+        return summary_stats(len(self.student_count), len(self.course_count), self.total_enrollments,
+                             self.total_completed, len(self.student_skill_names))
+
+    def enrollment_rows(self):
+        """Current enrollments as (student_id, course_id, progress, completed) tuples"""
+        for (student_id, course_id), rows in self.pairs.items():
+            for progress, completed in rows:
+                yield student_id, course_id, progress, completed
+
+
+def max_difference(expected, actual):
+    """Largest absolute difference between two sets of aggregate dicts (inf if keys differ)"""
+    worst = 0.0
+    for name, values in expected.items():
+        other = actual[name]
+        if set(values) != set(other):
+            return float('inf')
+        if values:
+            keys = list(values)
+            diff = np.abs(np.array([values[k] for k in keys], dtype=float) - np.array([other[k] for k in keys], dtype=float))
+            worst = max(worst, float(diff.max()))
+    return worst
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Benchmark: student / course statistics, apply-lambda and group loops vs aggregate_tables
+
+Computes the five aggregates (student completion and experience, course
+difficulty, popularity and average progress) on synthetic enrollments:
+  apply-lambda  groupby(...).apply(lambda x: ...) plus separate size() and
+                mean() passes (previous 02 / 04 / 05_flask_api)
+  group loops   five `for key, group in groupby(...)` loops (previous
+                05_flask_api_fixed / demo)
+  agg           aggregates.aggregate_tables(): one `agg` per key
+and checks that all three give the same values.
+"""
+
+import argparse
+import sys
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from aggregates import aggregate_tables, compute_aggregates
+
+
+def synthetic(n_rows, rng):
+    progress = rng.integers(0, 101, n_rows)
+    return pd.DataFrame({
+        'student_id': rng.integers(1, n_rows // 5 + 1, n_rows),
+        'course_id': rng.integers(1, 2_001, n_rows),
+        'progress_percentage': progress,
+        'completed_at': np.where(progress == 100, '2025-01-01', None),
+    })
+
+
+def apply_lambda(enrollments):
+    student_completion = enrollments.groupby('student_id').apply(
+        lambda x: x['completed_at'].notna().sum() / len(x)
+    ).to_dict()
+    course_completion = enrollments.groupby('course_id').apply(
+        lambda x: x['completed_at'].notna().sum() / len(x)
+    ).to_dict()
+    return {
+        'student_completion': student_completion,
+        'student_experience': enrollments.groupby('student_id').size().to_dict(),
+        'course_difficulty': {cid: 1 - comp for cid, comp in course_completion.items()},
+        'course_popularity': enrollments.groupby('course_id').size().to_dict(),
+        'course_avg_progress': enrollments.groupby('course_id')['progress_percentage'].mean().to_dict(),
+    }
+
+
+def group_loops(enrollments):
+    result = {name: {} for name in ('student_completion', 'student_experience', 'course_difficulty',
+                                    'course_popularity', 'course_avg_progress')}
+    for sid, group in enrollments.groupby('student_id'):
+        result['student_completion'][int(sid)] = group['completed_at'].notna().sum() / len(group)
+    for cid, group in enrollments.groupby('course_id'):
+        result['course_difficulty'][int(cid)] = 1 - group['completed_at'].notna().sum() / len(group)
+    for sid, group in enrollments.groupby('student_id'):
+        result['student_experience'][int(sid)] = int(len(group))
+    for cid, group in enrollments.groupby('course_id'):
+        result['course_popularity'][int(cid)] = int(len(group))
+    for cid, group in enrollments.groupby('course_id'):
+        result['course_avg_progress'][int(cid)] = float(group['progress_percentage'].mean())
+    return result
+
+
+def timed(fn, enrollments):
+    start = time.perf_counter()
+    result = fn(enrollments)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--loop-max-rows', type=int, default=100_000, help='skip the group loops above this size')
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', DeprecationWarning)  # apply() over the grouping columns
+
+    print("=" * 80)
+    print("BENCHMARK: student / course aggregates")
+    print("=" * 80 + "\n")
+    print(f"{'rows':>10} | {'apply-lambda':>12} | {'group loops':>11} | {'agg':>8} | {'speedup':>8}")
+    print("-" * 62)
+
+    rng = np.random.default_rng(42)
+    for n in args.sizes:
+        enrollments = synthetic(n, rng)
+        reference, lambda_seconds = timed(apply_lambda, enrollments)
+        _, agg_seconds = timed(aggregate_tables, enrollments)
+        candidates = [compute_aggregates(enrollments)]
+        loops = '-'
+        if n <= args.loop_max_rows:
+            result, loop_seconds = timed(group_loops, enrollments)
+            candidates.append(result)
+            loops = f'{loop_seconds:.2f}s'
+        for result in candidates:
+            for name, values in reference.items():
+                assert values.keys() == result[name].keys(), name
+                assert max(abs(values[k] - result[name][k]) for k in values) == 0, name
+        print(f"{n:>10,} | {lambda_seconds:>11.2f}s | {loops:>11} | {agg_seconds:>7.3f}s | {lambda_seconds / agg_seconds:>7.0f}x")
+    print("\nSpeedup is apply-lambda / agg; all methods give identical values.\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Benchmark: peak memory of 02_create_features.py, in-memory vs --chunksize
+
+For each size, writes synthetic enrollments / student_skills / course_skills
+CSVs to a temporary data dir and runs 02_create_features.py on it twice in
+fresh processes: once as is and once with --chunksize. Reports wall time and
+peak RSS of each run, then checks that both feature stores hold the same
+labels and features (the train/val/test split differs by design).
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from feature_store import FeatureStore
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '02_create_features.py')
+
+# Runs the script and prints its peak RSS. VmHWM rather than ru_maxrss: Linux
+# carries ru_maxrss over execve, so it would include this (forked) process.
+RUNNER = """
+import resource, runpy, sys
+sys.argv = sys.argv[1:]
+try:
+    runpy.run_path(sys.argv[0], run_name='__main__')
+except SystemExit as e:
+    if e.code:
+        raise
+try:
+    with open('/proc/self/status') as f:
+        peak = next(int(line.split()[1]) for line in f if line.startswith('VmHWM:')) / 1e3
+except OSError:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1e6 if sys.platform == 'darwin' else 1e3)
+print('PEAK_MB', peak)
+"""
+
+
+def write_csvs(data_dir, n_rows, n_students, n_courses, n_skills, rng):
+    progress = rng.integers(0, 101, n_rows)
+    vocab = np.array([f'skill_{i}' for i in range(n_skills)])
+    pd.DataFrame({
+        'student_id': rng.integers(1, n_students + 1, n_rows),
+        'course_id': rng.integers(1, n_courses + 1, n_rows),
+        'progress_percentage': progress,
+        'completed_at': np.where(progress == 100, '2025-01-01', None),
+    }).to_csv(os.path.join(data_dir, 'enrollments.csv'), index=False)
+    per_student = rng.integers(1, 6, n_students)
+    pd.DataFrame({
+        'student_id': np.repeat(np.arange(1, n_students + 1), per_student),
+        'skill_name': vocab[rng.integers(0, n_skills, per_student.sum())],
+    }).to_csv(os.path.join(data_dir, 'student_skills.csv'), index=False)
+    pd.DataFrame({
+        'course_id': np.repeat(np.arange(1, n_courses + 1), 4),
+        'skill_name': vocab[rng.integers(0, n_skills, n_courses * 4)],
+    }).to_csv(os.path.join(data_dir, 'course_skills.csv'), index=False)
+
+
+def run(data_dir, extra):
+    env = dict(os.environ, RECO_CSV_CACHE='0')
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', RUNNER, SCRIPT, '--data-dir', data_dir] + extra,
+                            capture_output=True, text=True, env=env)
+    seconds = time.perf_counter() - start
+    if result.returncode:
+        sys.stderr.write(result.stdout + result.stderr)
+        raise RuntimeError(f'02_create_features.py {" ".join(extra)} failed')
+    peak = float(result.stdout.rsplit('PEAK_MB', 1)[1])
+    return FeatureStore(data_dir, mmap_mode=None), seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[250_000, 1_000_000])
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--students', type=int, default=None, help='distinct students (default: rows / 5)')
+    parser.add_argument('--courses', type=int, default=2_000)
+    parser.add_argument('--skills', type=int, default=300)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"BENCHMARK: 02_create_features.py peak memory, in-memory vs --chunksize {args.chunksize:,}")
+    print("=" * 80 + "\n")
+    print(f"{'rows':>10} | {'in-memory':>18} | {'chunked':>18} | {'max |Δ feature|':>15}")
+    print("-" * 72)
+
+    rng = np.random.default_rng(42)
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            write_csvs(data_dir, n, args.students or max(n // 5, 1), args.courses, args.skills, rng)
+            full, full_seconds, full_peak = run(data_dir, [])
+            chunked, chunked_seconds, chunked_peak = run(data_dir, ['--chunksize', str(args.chunksize)])
+            assert np.array_equal(full.labels, chunked.labels)
+            delta = float(np.abs(full.features - chunked.features).max())
+        print(f"{n:>10,} | {full_seconds:>6.1f}s {full_peak:>7.0f} MB | "
+              f"{chunked_seconds:>6.1f}s {chunked_peak:>7.0f} MB | {delta:>15.2g}")
+    print("\nPeak = max resident set size of the process, interpreter and imports included. The chunked")
+    print("run keeps one chunk plus per-student / per-course tables: it grows with --students, not rows.\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Benchmark: 02_create_features.py skill features 2-5, iterrows vs SkillIndex
+
+Builds a synthetic enrollments table (1M rows by default) with student and
+course skills, then computes features 2-5 (skill match ratio, student and
+course skill counts, matching skills):
+  iterrows    the original loop: skill dicts built with iterrows, then four
+              data.at[...] writes per enrollment
+  SkillIndex  what 02 does now: sparse student x skill and course x skill
+              matrices, one row-wise product for every pair at once
+The iterrows skill dicts are built from the full skill tables, but the
+per-row loop only runs on the first --legacy-rows enrollments: it is linear
+in the rows, so its full-size time is extrapolated (marked with ~). Both
+versions are checked to produce the same columns on those rows.
+"""
+
+import argparse
+import sys
+import time
+import numpy as np
+import pandas as pd
+from skill_matrix import SkillIndex
+
+FEATURES = ['feature_2_skill_match_ratio', 'feature_3_student_skill_count',
+            'feature_4_course_skill_count', 'feature_5_matching_skills']
+
+
+def synthetic(n_rows, n_students, n_courses, n_skills, rng):
+    vocab = np.array([f'skill_{i}' for i in range(n_skills)])
+    enrollments = pd.DataFrame({
+        'student_id': rng.integers(1, n_students + 1, n_rows),
+        'course_id': rng.integers(1, n_courses + 1, n_rows),
+    })
+    # Students 1..90% and courses 1..95% have skills, the rest fall back to the defaults
+    with_skills = int(n_students * 0.9)
+    per_student = rng.integers(1, 10, with_skills)
+    student_skills = pd.DataFrame({
+        'student_id': np.repeat(np.arange(1, with_skills + 1), per_student),
+        'skill_name': vocab[rng.integers(0, n_skills, per_student.sum())],
+    })
+    with_skills = int(n_courses * 0.95)
+    per_course = rng.integers(1, 7, with_skills)
+    course_skills = pd.DataFrame({
+        'course_id': np.repeat(np.arange(1, with_skills + 1), per_course),
+        'skill_name': vocab[rng.integers(0, n_skills, per_course.sum())],
+    })
+    return enrollments, student_skills, course_skills
+
+
+def iterrows_skill_dicts(student_skills, course_skills):
+    """Skill sets per student and per course, as the original 02_create_features.py built them"""
+    student_skills_dict = {}
+    for _, row in student_skills.iterrows():
+        sid = row['student_id']
+        if sid not in student_skills_dict:
+            student_skills_dict[sid] = set()
+        student_skills_dict[sid].add(row['skill_name'])
+
+    course_skills_dict = {}
+    for _, row in course_skills.iterrows():
+        cid = row['course_id']
+        if cid not in course_skills_dict:
+            course_skills_dict[cid] = set()
+        course_skills_dict[cid].add(row['skill_name'])
+    return student_skills_dict, course_skills_dict
+
+
+def iterrows_features(enrollments, student_skills_dict, course_skills_dict):
+    """Features 2-5 as the original 02_create_features.py computed them"""
+    data = enrollments[['student_id', 'course_id']].copy()
+    data['feature_2_skill_match_ratio'] = 0.0
+    data['feature_3_student_skill_count'] = 0
+    data['feature_4_course_skill_count'] = 0
+    data['feature_5_matching_skills'] = 0
+
+    for idx, row in data.iterrows():
+        s_skills = student_skills_dict.get(row['student_id'], set())
+        c_skills = course_skills_dict.get(row['course_id'], set())
+        matching = len(s_skills.intersection(c_skills))
+        course_count = len(c_skills)
+        data.at[idx, 'feature_2_skill_match_ratio'] = matching / course_count if course_count > 0 else 0.0
+        data.at[idx, 'feature_3_student_skill_count'] = len(s_skills)
+        data.at[idx, 'feature_4_course_skill_count'] = course_count
+        data.at[idx, 'feature_5_matching_skills'] = matching
+    return data[FEATURES]
+
+
+def skill_index_features(enrollments, student_skills, course_skills):
+    """Features 2-5 as 02_create_features.py computes them now"""
+    skill_index = SkillIndex.from_frames(student_skills, course_skills)
+    matching = skill_index.pair_matching(enrollments['student_id'], enrollments['course_id']).astype(int)
+    student_count = skill_index.student_skill_counts(enrollments['student_id'])
+    course_count = skill_index.course_skill_counts(enrollments['course_id'])
+    return pd.DataFrame({
+        'feature_2_skill_match_ratio': np.divide(matching, course_count, out=np.zeros(len(enrollments)), where=course_count > 0),
+        'feature_3_student_skill_count': student_count.astype(int),
+        'feature_4_course_skill_count': course_count.astype(int),
+        'feature_5_matching_skills': matching,
+    }, index=enrollments.index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--students', type=int, default=200_000)
+    parser.add_argument('--courses', type=int, default=2_000)
+    parser.add_argument('--skills', type=int, default=300)
+    parser.add_argument('--legacy-rows', type=int, default=100_000, help='rows given to the iterrows loop')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    enrollments, student_skills, course_skills = synthetic(args.rows, args.students, args.courses, args.skills, rng)
+    legacy_rows = min(args.legacy_rows, args.rows)
+
+    print("=" * 80)
+    print(f"BENCHMARK: skill features 2-5 on {args.rows:,} enrollments "
+          f"({len(student_skills):,} student skills, {len(course_skills):,} course skills)")
+    print("=" * 80 + "\n")
+
+    start = time.perf_counter()
+    fast = skill_index_features(enrollments, student_skills, course_skills)
+    fast_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    skill_dicts = iterrows_skill_dicts(student_skills, course_skills)
+    dicts_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    legacy = iterrows_features(enrollments.iloc[:legacy_rows], *skill_dicts)
+    legacy_seconds = time.perf_counter() - start
+
+    subset = fast.iloc[:legacy_rows]
+    for column in FEATURES:
+        assert np.array_equal(subset[column].to_numpy(), legacy[column].to_numpy()), column
+    print(f"✓ Same columns on the first {legacy_rows:,} rows\n")
+
+    scaled = dicts_seconds + legacy_seconds * args.rows / legacy_rows
+    marker = '' if legacy_rows == args.rows else '~'
+    print(f"  iterrows     {dicts_seconds:>8.2f}s skill dicts + {legacy_seconds:.2f}s for {legacy_rows:,} rows "
+          f"-> {marker}{scaled:.1f}s for {args.rows:,}")
+    print(f"  SkillIndex   {fast_seconds:>8.2f}s for {args.rows:,} rows (index build included)")
+    print(f"  speedup      {marker}{scaled / fast_seconds:.0f}x\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Benchmark: pd.read_csv vs the csv_cache columnar cache
+
+Writes synthetic enrollments / skills CSVs, then for each one times a plain
+pd.read_csv, the first csv_cache.read_csv (parse + hash + write the cache)
+and a warm one (load the .npy columns), and checks the cached frame equals
+the parsed one.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import csv_cache
+
+
+def write_csvs(tmp, n_rows, rng):
+    progress = rng.integers(0, 101, n_rows)
+    enrollments = pd.DataFrame({
+        'student_id': rng.integers(1, n_rows // 5 + 1, n_rows),
+        'course_id': rng.integers(1, 2_001, n_rows),
+        'progress_percentage': progress,
+        'completed_at': np.where(progress == 100, '2025-01-01 10:00:00', None),
+    })
+    skills = np.array([f'skill_{i}' for i in range(300)])
+    student_skills = pd.DataFrame({
+        'student_id': rng.integers(1, n_rows // 5 + 1, n_rows),
+        'skill_name': skills[rng.integers(0, len(skills), n_rows)],
+    })
+    paths = []
+    for name, frame in [('enrollments.csv', enrollments), ('student_skills.csv', student_skills)]:
+        paths.append(os.path.join(tmp, name))
+        frame.to_csv(paths[-1], index=False)
+    return paths
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"BENCHMARK: CSV loading, {args.rows:,} rows per file")
+    print("=" * 80 + "\n")
+    print(f"{'file':>20} | {'read_csv':>9} | {'first (build)':>13} | {'cached':>9} | {'speedup':>8}")
+    print("-" * 72)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in write_csvs(tmp, args.rows, np.random.default_rng(42)):
+            parsed, parse_seconds = timed(pd.read_csv, path)
+            _, build_seconds = timed(csv_cache.read_csv, path)
+            cached, cached_seconds = timed(csv_cache.read_csv, path)
+            pd.testing.assert_frame_equal(parsed, cached)
+            print(f"{os.path.basename(path):>20} | {parse_seconds:>8.3f}s | {build_seconds:>12.3f}s | "
+                  f"{cached_seconds:>8.3f}s | {parse_seconds / cached_seconds:>7.1f}x")
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Benchmark: memory of the enrollments / skills tables, pandas defaults vs the schema dtypes
+
+Writes synthetic enrollments.csv, student_skills.csv and course_skills.csv
+(1M enrollment and student skill rows by default), loads them with plain
+pd.read_csv (int64 ids and progress, Python str for completed_at and
+skill_name) and with schema.load_tables, and reports the deep memory usage
+of every table and column, and the time the conversion adds. The compact
+tables are checked to hold the same ids, progress, completion flags and
+skill names.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import csv_cache
+import schema
+
+TABLES = ('enrollments', 'student_skills', 'course_skills')
+
+
+def write_csvs(tmp, n_rows, n_courses, n_skills, rng):
+    progress = rng.integers(0, 101, n_rows)
+    days = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 365, n_rows), unit='D')
+    vocab = np.array([f'skill_{i}' for i in range(n_skills)])
+    frames = {
+        'enrollments': pd.DataFrame({
+            'student_id': rng.integers(1, n_rows // 5 + 1, n_rows),
+            'course_id': rng.integers(1, n_courses + 1, n_rows),
+            'progress_percentage': progress,
+            'completed_at': np.where(progress == 100, days.strftime('%Y-%m-%d'), None),
+        }),
+        'student_skills': pd.DataFrame({
+            'student_id': rng.integers(1, n_rows // 5 + 1, n_rows),
+            'skill_name': vocab[rng.integers(0, n_skills, n_rows)],
+        }),
+        'course_skills': pd.DataFrame({
+            'course_id': np.repeat(np.arange(1, n_courses + 1), 4),
+            'skill_name': vocab[rng.integers(0, n_skills, n_courses * 4)],
+        }),
+    }
+    for name, frame in frames.items():
+        frame.to_csv(os.path.join(tmp, f'{name}.csv'), index=False)
+
+
+def check_same(plain, compact):
+    enrollments, student_skills, course_skills = plain
+    for column in ('student_id', 'course_id', 'progress_percentage'):
+        assert np.array_equal(enrollments[column].to_numpy(), compact[0][column].to_numpy()), column
+    assert np.array_equal(enrollments['completed_at'].notna(), compact[0]['completed_at'].notna())
+    for before, after in zip((student_skills, course_skills), compact[1:]):
+        assert list(before['skill_name']) == list(after['skill_name'].astype(str))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--courses', type=int, default=2_000)
+    parser.add_argument('--skills', type=int, default=300)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"BENCHMARK: table memory, {args.rows:,} enrollments / student skills")
+    print("=" * 80 + "\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_csvs(tmp, args.rows, args.courses, args.skills, np.random.default_rng(42))
+        csv_cache.ENABLED = False  # time the conversion, not the columnar cache
+
+        start = time.perf_counter()
+        plain = [pd.read_csv(os.path.join(tmp, f'{name}.csv')) for name in TABLES]
+        plain_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        compact = schema.load_tables(tmp)
+        compact_seconds = time.perf_counter() - start
+        check_same(plain, compact)
+
+    print(f"{'table / column':>32} | {'before':>14} | {'after':>14} | {'MB':>9} | {'ratio':>6}")
+    print("-" * 88)
+    total_before = total_after = 0.0
+    for name, before, after in zip(TABLES, plain, compact):
+        for column in before.columns:
+            b = before[column].memory_usage(deep=True, index=False) / 1e6
+            a = after[column].memory_usage(deep=True, index=False) / 1e6
+            print(f"{name + '.' + column:>32} | {str(before[column].dtype):>14} | {str(after[column].dtype):>14} | "
+                  f"{b:>4.0f} -> {a:<3.0f} | {b / a:>5.1f}x")
+        b, a = schema.memory_mb(before), schema.memory_mb(after)
+        total_before += b
+        total_after += a
+        print(f"{name:>32} | {len(before):>14,} | {'rows':>14} | {b:>4.0f} -> {a:<3.0f} | {b / a:>5.1f}x")
+        print("-" * 88)
+    print(f"{'total':>32} | {'':>14} | {'':>14} | {total_before:>4.0f} -> {total_after:<3.0f} | "
+          f"{total_before / total_after:>5.1f}x\n")
+    print(f"Load time: read_csv {plain_seconds:.2f}s, load_tables {compact_seconds:.2f}s "
+          f"(read_csv + conversion); values checked identical.\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
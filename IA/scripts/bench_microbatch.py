@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Benchmark: micro-batching window vs throughput and latency
+
+Loads the 05_flask_api snapshot, then drives InferenceBatcher.predict() from
+concurrent client threads, each submitting /predict-sized requests (one
+scaled feature row by default) in a loop. For each window, reports forward
+passes per second, predictions per second, mean rows per pass and the
+p50/p99 latency seen by the clients. Window 0 is the unbatched baseline
+(one forward pass per request).
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import threading
+import time
+import numpy as np
+from inference_batcher import InferenceBatcher
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_snapshot():
+    spec = importlib.util.spec_from_file_location('api', os.path.join(script_dir, '05_flask_api.py'))
+    api = importlib.util.module_from_spec(spec)
+    with contextlib.redirect_stdout(io.StringIO()):
+        spec.loader.exec_module(api)
+    return api.snapshots.current
+
+
+def run(snap, batcher, requests, n_clients, duration):
+    stop = threading.Event()
+    latencies = [[] for _ in range(n_clients)]
+
+    def client(i):
+        rng = np.random.default_rng(i)
+        while not stop.is_set():
+            features = requests[rng.integers(len(requests))]
+            start = time.perf_counter()
+            batcher.predict(snap, features)
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(n_clients)]
+    batches, rows = batcher.batches, batcher.rows
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    done = np.sort(np.concatenate([np.asarray(l) for l in latencies]))
+    passes = (batcher.batches - batches) if batcher.enabled else len(done)
+    rows_scored = (batcher.rows - rows) if batcher.enabled else sum(len(r) for r in requests) / len(requests) * len(done)
+    return passes / duration, rows_scored / duration, rows_scored / max(passes, 1), np.percentile(done, 50), np.percentile(done, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--windows-ms', type=float, nargs='+', default=[0, 0.5, 2, 5])
+    parser.add_argument('--max-rows', type=int, default=256)
+    parser.add_argument('--rows-per-request', type=int, default=1, help='1 = /predict, number of courses = /recommend')
+    parser.add_argument('--duration', type=float, default=3.0)
+    args = parser.parse_args()
+
+    snap = load_snapshot()
+    rng = np.random.default_rng(42)
+    students = rng.choice(snap.skill_index.student_ids, 200)
+    courses = snap.course_table.course_ids
+    requests = [
+        snap.scale(np.array([snap.create_features(int(sid), int(cid)) for cid in rng.choice(courses, args.rows_per_request)]))
+        for sid in students
+    ]
+
+    print("=" * 80)
+    print(f"BENCHMARK: micro-batching ({os.cpu_count()} CPUs, {args.rows_per_request} rows/request, max {args.max_rows} rows/pass)")
+    print("=" * 80 + "\n")
+    print(f"{'clients':>7} | {'window':>7} | {'passes/s':>9} | {'rows/s':>9} | {'rows/pass':>9} | {'p50':>8} | {'p99':>8}")
+    print("-" * 76)
+    for n_clients in args.clients:
+        for window_ms in args.windows_ms:
+            batcher = InferenceBatcher(window=window_ms / 1000, max_rows=args.max_rows)
+            passes, rows, per_pass, p50, p99 = run(snap, batcher, requests, n_clients, args.duration)
+            print(f"{n_clients:>7} | {window_ms:>5.1f}ms | {passes:>9.0f} | {rows:>9.0f} | {per_pass:>9.1f} | "
+                  f"{p50 * 1000:>6.2f}ms | {p99 * 1000:>6.2f}ms")
+        print("-" * 76)
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
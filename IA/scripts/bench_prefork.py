@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Benchmark: prefork.py worker count vs QPS and per-worker memory
+
+For each worker count, starts `prefork.py --workers N <server>` with the
+result cache disabled, drives POST /recommend from several keep-alive
+clients, and reads /proc/<pid>/smaps_rollup of every worker:
+  RSS  resident pages, shared ones included
+  PSS  shared pages split between the processes sharing them
+  USS  pages private to the worker (what each extra worker really costs)
+Linux only.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+def memory_mb(pid):
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return fields['Rss'], fields['Pss'], fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+
+
+def child_pids(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(p) for p in f.read().split()]
+
+
+def wait_ready(port, n_workers, parent, timeout=180):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('localhost', port, timeout=2)
+            conn.request('GET', '/health')
+            conn.getresponse().read()
+            conn.close()
+            if len(child_pids(parent.pid)) == n_workers:
+                return
+        except OSError:
+            pass
+        time.sleep(0.3)
+    raise RuntimeError('server did not start')
+
+
+def run_clients(port, n_clients, duration):
+    stop = threading.Event()
+    latencies = []
+
+    def client(seed):
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection('localhost', port, timeout=30)
+        while not stop.is_set():
+            body = json.dumps({'student_id': rng.randint(1, 850), 'top_n': 5})
+            start = time.perf_counter()
+            try:
+                conn.request('POST', '/recommend', body, {'Content-Type': 'application/json'})
+                conn.getresponse().read()
+                latencies.append(time.perf_counter() - start)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(n_clients)]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] if latencies else float('nan')
+    return len(latencies) / duration, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--server', default='05_flask_api.py')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"BENCHMARK: prefork.py {args.server} ({os.cpu_count()} CPUs, {args.clients} clients)")
+    print("=" * 80 + "\n")
+    print(f"{'workers':>7} | {'req/s':>7} | {'p99':>8} | {'parent RSS':>10} | {'worker RSS':>10} | {'worker PSS':>10} | {'worker USS':>10}")
+    print("-" * 84)
+
+    env = dict(os.environ, RECO_CACHE_MAX_ENTRIES='0', TF_CPP_MIN_LOG_LEVEL='3')
+    for n_workers in args.workers:
+        port = free_port()
+        parent = subprocess.Popen(
+            [sys.executable, os.path.join(script_dir, 'prefork.py'), '--workers', str(n_workers), '--port', str(port), args.server],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, cwd=script_dir
+        )
+        try:
+            wait_ready(port, n_workers, parent)
+            rps, p99 = run_clients(port, args.clients, args.duration)
+            workers = [memory_mb(pid) for pid in child_pids(parent.pid)]
+            rss, pss, uss = (sum(w[i] for w in workers) / len(workers) for i in range(3))
+            print(f"{n_workers:>7} | {rps:>7.1f} | {p99 * 1000:>6.1f}ms | {memory_mb(parent.pid)[0]:>8.0f}MB | "
+                  f"{rss:>8.0f}MB | {pss:>8.0f}MB | {uss:>8.0f}MB")
+        finally:
+            parent.terminate()
+            parent.wait()
+    print("\nRSS/PSS/USS are per-worker averages; USS is the memory each extra worker adds.\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Benchmark: per-request latency of POST /recommend for 50, 500 and 5,000 courses"""
+
+import importlib.util
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from snapshot import Snapshot
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+CATALOG_SIZES = [50, 500, 5000]
+N_STUDENTS = 1000
+N_REQUESTS = 5
+LOOP_SAMPLE = 100  # the per-course loop is extrapolated from this many courses
+SKILLS = ['Python', 'JavaScript', 'React', 'SQL Database', 'Git', 'Linux', 'C#',
+          'HTML/CSS', 'Testing', 'CI/CD', 'TypeScript', 'Docker']
+
+
+def load_api():
+    spec = importlib.util.spec_from_file_location('flask_api', os.path.join(script_dir, '05_flask_api.py'))
+    api = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(api)
+    return api
+
+
+def install_catalog(api, n_courses, rng):
+    """Replace the API reference data with a synthetic catalog of n_courses"""
+    n_enrollments = max(2000, n_courses * 20)
+    enrollments = pd.DataFrame({
+        'student_id': rng.integers(1, N_STUDENTS + 1, n_enrollments),
+        'course_id': np.concatenate([np.arange(1, n_courses + 1), rng.integers(1, n_courses + 1, n_enrollments - n_courses)]),
+        'progress_percentage': rng.integers(0, 101, n_enrollments),
+    })
+    enrollments['completed_at'] = np.where(enrollments['progress_percentage'] == 100, '2025-01-01', None)
+
+    student_skills = pd.DataFrame(
+        [(sid, skill) for sid in range(1, N_STUDENTS + 1) for skill in rng.choice(SKILLS, 4, replace=False)],
+        columns=['student_id', 'skill_name']
+    )
+    course_skills = pd.DataFrame(
+        [(cid, skill) for cid in range(1, n_courses + 1) for skill in rng.choice(SKILLS, 3, replace=False)],
+        columns=['course_id', 'skill_name']
+    )
+
+    current = api.snapshots.current
+    api.snapshots.current = Snapshot(
+        f'bench-{n_courses}', enrollments, student_skills, course_skills, current.model, current.scaler
+    )
+
+
+def time_loop_per_course(api, student_id):
+    """Previous implementation: one scaler.transform and one model.predict per course"""
+    snap = api.snapshots.current
+    start = time.perf_counter()
+    for course_id in range(1, LOOP_SAMPLE + 1):
+        features = snap.create_features(student_id, course_id)
+        features_scaled = snap.scaler.transform([features])[0] if not snap.model.fused_scaler else features
+        snap.model.predict(np.array([features_scaled]), verbose=0)
+    return (time.perf_counter() - start) / LOOP_SAMPLE
+
+
+def main():
+    rng = np.random.default_rng(42)
+    api = load_api()
+    client = api.app.test_client()
+
+    print("=" * 80)
+    print("BENCHMARK: POST /recommend")
+    print("=" * 80 + "\n")
+    print(f"{'courses':>8} | {'loop (est.)':>12} | {'batched':>10} | {'speedup':>8}")
+    print("-" * 48)
+
+    for n_courses in CATALOG_SIZES:
+        install_catalog(api, n_courses, rng)
+        student_id = 1
+
+        client.post('/recommend', json={'student_id': student_id, 'top_n': 5})  # warm-up
+        latencies = []
+        for _ in range(N_REQUESTS):
+            api.result_cache.invalidate()  # time the scoring path, not cache hits
+            start = time.perf_counter()
+            response = client.post('/recommend', json={'student_id': student_id, 'top_n': 5})
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.get_json()
+        batched = float(np.median(latencies))
+
+        loop = time_loop_per_course(api, student_id) * n_courses
+        print(f"{n_courses:>8} | {loop * 1000:>10.1f}ms | {batched * 1000:>8.1f}ms | {loop / batched:>7.1f}x")
+
+    print(f"\nLoop timings are extrapolated from {LOOP_SAMPLE} per-course calls.\n")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Benchmark: set-intersection skill matching vs sparse SkillIndex products"""
+
+import sys
+import time
+import numpy as np
+import pandas as pd
+from skill_matrix import SkillIndex
+
+SIZES = [(1000, 50), (5000, 500), (20000, 5000)]  # (students, courses)
+SKILLS_PER_STUDENT = 6
+SKILLS_PER_COURSE = 4
+N_SKILLS = 60
+
+
+def synthetic_skills(n_students, n_courses, rng):
+    vocab = np.array([f'skill_{i}' for i in range(N_SKILLS)])
+    student_skills = pd.DataFrame({
+        'student_id': np.repeat(np.arange(1, n_students + 1), SKILLS_PER_STUDENT),
+        'skill_name': vocab[rng.integers(0, N_SKILLS, n_students * SKILLS_PER_STUDENT)],
+    })
+    course_skills = pd.DataFrame({
+        'course_id': np.repeat(np.arange(1, n_courses + 1), SKILLS_PER_COURSE),
+        'skill_name': vocab[rng.integers(0, N_SKILLS, n_courses * SKILLS_PER_COURSE)],
+    })
+    return student_skills, course_skills
+
+
+def as_sets(frame, key):
+    return {int(k): set(g) for k, g in frame.groupby(key)['skill_name']}
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    rng = np.random.default_rng(42)
+
+    print("=" * 80)
+    print("BENCHMARK: SKILL MATCHING (set intersection vs sparse product)")
+    print("=" * 80 + "\n")
+    print(f"{'students x courses':>20} | {'case':<22} | {'sets':>10} | {'sparse':>10} | {'speedup':>8}")
+    print("-" * 82)
+
+    for n_students, n_courses in SIZES:
+        student_skills, course_skills = synthetic_skills(n_students, n_courses, rng)
+        student_sets = as_sets(student_skills, 'student_id')
+        course_sets = as_sets(course_skills, 'course_id')
+        index = SkillIndex.from_frames(student_skills, course_skills)
+        course_ids = sorted(course_sets)
+
+        # One student against the whole catalog (one /recommend call)
+        s_skills = student_sets[1]
+        ref, t_sets = timed(lambda: [len(s_skills.intersection(course_sets[c])) for c in course_ids])
+        got, t_sparse = timed(lambda: index.matching_counts(index.student_vector(1)))
+        assert np.array_equal(np.asarray(ref), got)
+        label = f"{n_students} x {n_courses}"
+        print(f"{label:>20} | {'one student':<22} | {t_sets * 1e3:>8.2f}ms | {t_sparse * 1e3:>8.2f}ms | {t_sets / t_sparse:>7.1f}x")
+
+        # Every student against every course (offline scoring)
+        sample = list(student_sets)[:min(n_students, 1000)]
+        _, t_sets = timed(lambda: [[len(student_sets[s].intersection(course_sets[c])) for c in course_ids] for s in sample])
+        t_sets *= n_students / len(sample)
+        full, t_sparse = timed(index.all_matching_counts)
+        assert full.shape == (n_students, n_courses)
+        print(f"{'':>20} | {'all pairs (sets est.)':<22} | {t_sets * 1e3:>8.1f}ms | {t_sparse * 1e3:>8.1f}ms | {t_sets / t_sparse:>7.1f}x")
+
+    print()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Benchmark: standalone /recommend with enrollment scans vs load-time indexes
+
+At 2k, 200k and 2M synthetic enrollments (50 courses), times one
+/recommend with the previous per-course scans of the enrollments list
+(extrapolated from a few courses) and with the student/course indexes.
+"""
+
+import contextlib
+import importlib.util
+import io
+import os
+import random
+import sys
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+SIZES = [2_000, 200_000, 2_000_000]
+N_COURSES = 50
+N_REQUESTS = 20
+SCAN_SAMPLE = 3  # courses scored with the scan version, extrapolated to the catalog
+
+
+def load_server():
+    spec = importlib.util.spec_from_file_location('standalone', os.path.join(script_dir, '05_flask_api_standalone.py'))
+    server = importlib.util.module_from_spec(spec)
+    with contextlib.redirect_stdout(io.StringIO()):
+        spec.loader.exec_module(server)
+    return server
+
+
+def install_enrollments(server, n, rng):
+    """Synthetic enrollments: columns for the server, a list of dicts for the scan version"""
+    n_students = max(50, n // 5)
+    rows = [
+        {'student_id': rng.randint(1, n_students), 'course_id': rng.randint(1, N_COURSES),
+         'progress_percentage': 50, 'completed_at': '2025-01-01' if rng.random() < 0.4 else None}
+        for _ in range(n)
+    ]
+    server.enrollments = server.EnrollmentColumns()
+    for e in rows:
+        server.enrollments.append(e['student_id'], e['course_id'], e['progress_percentage'], e['completed_at'] is not None)
+    start = time.perf_counter()
+    server.student_stats, server.course_stats, server.student_courses = server.build_indexes(server.enrollments)
+    server.all_courses = sorted(server.course_stats)
+    return rows, time.perf_counter() - start
+
+
+def scan_probability(server, enrollments, student_id, course_id):
+    """Previous calculate_probability: two list scans per (student, course)"""
+    s_skills = server.student_skills.get(student_id, set())
+    c_skills = server.course_skills.get(course_id, set())
+    matching = len(s_skills.intersection(c_skills))
+    course_count = len(c_skills) if c_skills else 1
+    skill_match = matching / course_count if course_count > 0 else 0.0
+    student_enr = [e for e in enrollments if e['student_id'] == student_id]
+    completion_rate = (sum(1 for e in student_enr if e['completed_at']) / len(student_enr)) if student_enr else 0.44
+    course_enr = [e for e in enrollments if e['course_id'] == course_id]
+    course_completion = (sum(1 for e in course_enr if e['completed_at']) / len(course_enr)) if course_enr else 0.44
+    return server.score_pair(student_id, course_id, skill_match, completion_rate, 1 - course_completion, len(student_enr))
+
+
+def main():
+    rng = random.Random(42)
+    server = load_server()
+
+    print("=" * 80)
+    print("BENCHMARK: standalone /recommend, scans vs indexes")
+    print("=" * 80 + "\n")
+    print(f"{'enrollments':>12} | {'index build':>11} | {'scans (est.)':>12} | {'indexed':>9} | {'speedup':>8}")
+    print("-" * 66)
+
+    for n in SIZES:
+        rows, build = install_enrollments(server, n, rng)
+
+        # Same probabilities as the scan version
+        for course_id in server.all_courses[:SCAN_SAMPLE]:
+            assert server.calculate_probability(1, course_id) == scan_probability(server, rows, 1, course_id)
+
+        start = time.perf_counter()
+        for course_id in server.all_courses[:SCAN_SAMPLE]:
+            scan_probability(server, rows, 1, course_id)
+        # The scan version also scanned once more for the enrolled set and once for the course list
+        scans = (time.perf_counter() - start) / SCAN_SAMPLE * (len(server.all_courses) + 1)
+
+        start = time.perf_counter()
+        for i in range(N_REQUESTS):
+            server.recommend(i + 1, 5)
+        indexed = (time.perf_counter() - start) / N_REQUESTS
+
+        print(f"{n:>12,} | {build * 1000:>9.0f}ms | {scans * 1000:>10.1f}ms | {indexed * 1000:>7.2f}ms | {scans / indexed:>7.0f}x")
+
+    print(f"\nScan timings are extrapolated from {SCAN_SAMPLE} courses to the {N_COURSES}-course catalog.\n")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Benchmark: standalone server enrollments loading, readlines + dicts vs columns
+
+Writes synthetic enrollments.csv files, then loads each one in a fresh
+process with the previous loader (readlines, one dict per row) and with
+load_enrollments() (line streaming into typed arrays and a completion
+bitmap). Reports load time and peak RSS growth over the process baseline.
+"""
+
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+SIZES = [200_000, 2_000_000]
+
+
+def load_server():
+    spec = importlib.util.spec_from_file_location('standalone', os.path.join(script_dir, '05_flask_api_standalone.py'))
+    server = importlib.util.module_from_spec(spec)
+    with contextlib.redirect_stdout(io.StringIO()):
+        spec.loader.exec_module(server)
+    return server
+
+
+def legacy_load(path):
+    """Previous loader: whole file in memory, one dict per enrollment"""
+    enrollments = []
+    with open(path, 'r') as f:
+        lines = f.readlines()
+        headers = lines[0].strip().split(',')
+        for line in lines[1:]:
+            parts = line.strip().split(',')
+            if len(parts) >= len(headers):
+                enrollments.append({
+                    'student_id': int(parts[0]),
+                    'course_id': int(parts[1]),
+                    'progress_percentage': float(parts[2]) if len(parts) > 2 else 50,
+                    'completed_at': parts[3] if len(parts) > 3 and parts[3] else None
+                })
+    return enrollments
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def child(loader, path):
+    server = load_server()  # same imports in both modes, so the baselines match
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    rows = legacy_load(path) if loader == 'legacy' else server.load_enrollments(path)
+    seconds = time.perf_counter() - start
+    print(json.dumps({'rows': len(rows), 'seconds': seconds, 'rss_mb': peak_rss_mb() - baseline}))
+
+
+def write_csv(path, n, rng):
+    with open(path, 'w') as f:
+        f.write('student_id,course_id,progress_percentage,completed_at\n')
+        for _ in range(n):
+            progress = rng.randint(0, 100)
+            f.write(f"{rng.randint(1, n // 5)},{rng.randint(1, 200)},{progress},{'2025-01-01' if progress == 100 else ''}\n")
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        child(sys.argv[2], sys.argv[3])
+        return 0
+
+    print("=" * 80)
+    print("BENCHMARK: standalone enrollments loader")
+    print("=" * 80 + "\n")
+    print(f"{'rows':>10} | {'loader':>8} | {'load time':>9} | {'peak RSS +':>10}")
+    print("-" * 48)
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in SIZES:
+            path = os.path.join(tmp, f'enrollments_{n}.csv')
+            write_csv(path, n, rng)
+            for loader in ('legacy', 'columns'):
+                out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', loader, path],
+                                     capture_output=True, text=True, check=True, cwd=script_dir).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                assert r['rows'] == n
+                print(f"{n:>10,} | {loader:>8} | {r['seconds']:>8.2f}s | {r['rss_mb']:>8.0f}MB")
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
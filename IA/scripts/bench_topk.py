@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Benchmark: top-N selection with topk.top_k vs sorting every prediction
+
+Checks first that top_k() gives the same ids, in the same order, as a stable
+descending sort (heavily tied scores included), then times at growing
+catalog sizes:
+  sorted dicts  one dict per candidate, sorted(...)[:n] (previous APIs)
+  argsort       np.argsort(-scores, kind='stable')[:n] (previous batch path)
+  top_k         argpartition-style selection, only the n best are sorted
+"""
+
+import argparse
+import sys
+import time
+import numpy as np
+import topk
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def check(rng):
+    for n in (1, 7, 100, 5000):
+        for scores in (rng.random(n), rng.integers(0, 4, n).astype(np.float64)):
+            ids = rng.permutation(n) + 1000
+            for k in (0, 1, 3, n - 1, n, n + 5):
+                expected = np.argsort(-scores, kind='stable')[:max(k, 0)]
+                top_ids, top_scores = topk.top_k(scores, k, ids)
+                assert np.array_equal(top_ids, ids[expected]), (n, k)
+                assert np.array_equal(top_scores, scores[expected]), (n, k)
+                py_ids, py_scores = topk._top_k_python(list(scores), k, list(ids))
+                assert py_ids == list(ids[expected]) and py_scores == list(scores[expected]), (n, k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    check(rng)
+
+    print("=" * 80)
+    print(f"BENCHMARK: top-{args.top_n} selection (ties and order checked against a stable sort)")
+    print("=" * 80 + "\n")
+    print(f"{'courses':>10} | {'sorted dicts':>12} | {'argsort':>10} | {'top_k':>10} | {'speedup':>8}")
+    print("-" * 64)
+
+    for n in args.sizes:
+        ids = np.arange(1, n + 1, dtype=np.int64)
+        scores = rng.random(n)
+
+        def sorted_dicts():
+            predictions = [{'course_id': int(cid), 'success_probability': float(p)} for cid, p in zip(ids, scores)]
+            return sorted(predictions, key=lambda x: x['success_probability'], reverse=True)[:args.top_n]
+
+        dicts = best_of(sorted_dicts, max(1, args.repeat // 2))
+        argsort = best_of(lambda: ids[np.argsort(-scores, kind='stable')[:args.top_n]], args.repeat)
+        selection = best_of(lambda: topk.top_k(scores, args.top_n, ids), args.repeat)
+        print(f"{n:>10,} | {dicts * 1000:>10.2f}ms | {argsort * 1000:>8.2f}ms | {selection * 1000:>8.2f}ms | {dicts / selection:>7.1f}x")
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Check incremental aggregates against a full recompute
+
+Seeds RunningAggregates with part of enrollments.csv, replays the rest as
+enrollment events mixed with random progress / completion / skill events,
+then compares every aggregate and the /stats counts with a full recompute over
+the resulting table. Also times the per-event update against the recompute.
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from aggregates import RunningAggregates, compute_aggregates, compute_stats, max_difference
+
+TOLERANCE = 1e-9
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.path.join(os.path.dirname(script_dir), 'data')
+
+
+def random_events(enrollments, n_seed, n_random, rng):
+    """Remaining CSV rows as enrollment events, interleaved with progress/completion/skill events"""
+    events = []
+    for row in enrollments.iloc[n_seed:].itertuples(index=False):
+        events.append({
+            'type': 'enrollment', 'student_id': int(row.student_id), 'course_id': int(row.course_id),
+            'progress_percentage': float(row.progress_percentage), 'completed': pd.notna(row.completed_at)
+        })
+    pairs = enrollments[['student_id', 'course_id']].to_numpy()[:n_seed]
+    for _ in range(n_random):
+        student_id, course_id = (int(v) for v in pairs[rng.integers(len(pairs))])
+        kind = rng.choice(['progress', 'completion', 'skill_added'])
+        event = {'type': str(kind), 'student_id': student_id, 'course_id': course_id}
+        if kind == 'skill_added':
+            del event['course_id']
+            event['skill_name'] = f'skill_{rng.integers(100)}'
+        else:
+            event['progress_percentage'] = float(rng.integers(0, 101))
+        events.insert(int(rng.integers(len(events) + 1)), event)
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seed-fraction', type=float, default=0.7, help='share of the CSV loaded before the events')
+    parser.add_argument('--random-events', type=int, default=2000, help='progress/completion/skill events to add')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("CHECK: incremental aggregates vs full recompute")
+    print("=" * 80 + "\n")
+
+    enrollments = pd.read_csv(os.path.join(data_dir, 'enrollments.csv'))
+    student_skills = pd.read_csv(os.path.join(data_dir, 'student_skills.csv'))
+    n_seed = int(len(enrollments) * args.seed_fraction)
+    rng = np.random.default_rng(42)
+
+    aggregates = RunningAggregates.from_frames(enrollments.iloc[:n_seed], student_skills)
+    events = random_events(enrollments, n_seed, args.random_events, rng)
+    print(f"✓ Seeded with {n_seed} enrollments, replaying {len(events)} events")
+
+    start = time.perf_counter()
+    for event in events:
+        aggregates.apply(event)
+    per_event = (time.perf_counter() - start) / len(events)
+
+    # Reference: the table the events describe, recomputed from scratch
+    current = pd.DataFrame(list(aggregates.enrollment_rows()),
+                           columns=['student_id', 'course_id', 'progress_percentage', 'completed'])
+    current['completed_at'] = current['completed'].map({True: 'done', False: None})
+    start = time.perf_counter()
+    expected = compute_aggregates(current)
+    recompute = time.perf_counter() - start
+
+    diff = max_difference(expected, aggregates.to_dicts())
+    ok = diff <= TOLERANCE and len(current) == len(enrollments)
+    print(f"{'✓' if ok else '❌'} {len(current)} enrollments, max diff vs recompute = {diff:.2e} (tolerance {TOLERANCE:.0e})")
+
+    added_skills = pd.DataFrame([(e['student_id'], e['skill_name']) for e in events if e['type'] == 'skill_added'],
+                                columns=['student_id', 'skill_name'])
+    expected_stats = compute_stats(current, pd.concat([student_skills, added_skills]))
+    stats_ok = expected_stats == aggregates.stats()
+    ok &= stats_ok
+    print(f"{'✓' if stats_ok else '❌'} /stats counts: {aggregates.stats()}")
+
+    # Replaying the whole CSV as enrollment events gives back the aggregates of the file
+    replayed = RunningAggregates()
+    replayed.apply_many(random_events(enrollments, 0, 0, rng))
+    file_diff = max_difference(compute_aggregates(enrollments), replayed.to_dicts())
+    ok &= file_diff <= TOLERANCE
+    print(f"{'✓' if file_diff <= TOLERANCE else '❌'} Full CSV replay: max diff = {file_diff:.2e}")
+
+    print(f"\n⏱ Per event: {per_event * 1e6:.1f} µs   Full recompute: {recompute * 1e3:.1f} ms\n")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
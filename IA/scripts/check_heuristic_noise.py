@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Check the heuristic scorer's per-pair jitter: determinism, parity, speed
+
+1. NumPy and pure-Python jitter are bit-identical
+2. The jitter of a fixed grid of pairs hashes to EXPECTED_DIGEST, in this
+   process and in fresh processes with different PYTHONHASHSEED values
+   (i.e. across restarts, call orders and machines)
+3. It stays within [-NOISE_AMPLITUDE, NOISE_AMPLITUDE) with mean close to 0
+4. Timing: random.seed + random.uniform per pair vs one vectorized call
+"""
+
+import hashlib
+import os
+import random
+import subprocess
+import sys
+import time
+import numpy as np
+from heuristic_scorer import NOISE_AMPLITUDE, pair_noise, pair_noise_scalar
+
+# sha256 of pair_noise() over GRID, as float64 bytes. Changing it changes every served score.
+EXPECTED_DIGEST = '9d125e178976a5c703faf7909669771808a51a83232aa759dbe567812768446b'
+GRID = (np.repeat(np.arange(1, 1001), 200), np.tile(np.arange(1, 201), 1000))  # 1000 students x 200 courses
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def grid_digest():
+    return hashlib.sha256(pair_noise(*GRID).astype('<f8').tobytes()).hexdigest()
+
+
+def main():
+    if '--digest' in sys.argv:  # child process mode
+        print(grid_digest())
+        return 0
+
+    print("=" * 80)
+    print("CHECK: heuristic scorer jitter")
+    print("=" * 80 + "\n")
+    ok = True
+
+    rng = np.random.default_rng(42)
+    students, courses = rng.integers(-10, 2**31, 100_000), rng.integers(0, 2**31, 100_000)
+    vectorized = pair_noise(students, courses)
+    scalar = np.array([pair_noise_scalar(s, c) for s, c in zip(students, courses)])
+    same = bool(np.array_equal(vectorized, scalar))
+    ok &= same
+    print(f"{'✓' if same else '❌'} NumPy vs pure Python on {len(students):,} random pairs: identical = {same}")
+
+    digest = grid_digest()
+    matches = digest == EXPECTED_DIGEST
+    ok &= matches
+    print(f"{'✓' if matches else '❌'} Grid digest {digest[:16]}… matches the pinned value: {matches}")
+
+    for hash_seed in ('0', '1', '12345'):
+        env = dict(os.environ, PYTHONHASHSEED=hash_seed)
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), '--digest'],
+                               capture_output=True, text=True, env=env, cwd=script_dir).stdout.strip()
+        same = child == digest
+        ok &= same
+        print(f"{'✓' if same else '❌'} New process, PYTHONHASHSEED={hash_seed}: same digest = {same}")
+
+    noise = pair_noise(*GRID)
+    in_range = bool(noise.min() >= -NOISE_AMPLITUDE and noise.max() < NOISE_AMPLITUDE)
+    ok &= in_range and abs(noise.mean()) < 1e-3
+    print(f"{'✓' if in_range else '❌'} Range [{noise.min():.5f}, {noise.max():.5f}], mean {noise.mean():+.2e}, std {noise.std():.5f}")
+
+    pairs = list(zip(GRID[0].tolist(), GRID[1].tolist()))
+    start = time.perf_counter()
+    for s, c in pairs:
+        random.seed(hash((s, c)) % 10000)
+        random.uniform(-0.05, 0.05)
+    reseed = time.perf_counter() - start
+    start = time.perf_counter()
+    pair_noise(*GRID)
+    vectorized_time = time.perf_counter() - start
+    print(f"\n⏱ {len(pairs):,} pairs: random.seed per pair {reseed * 1000:.0f} ms, "
+          f"vectorized {vectorized_time * 1000:.1f} ms ({reseed / vectorized_time:.0f}x)\n")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
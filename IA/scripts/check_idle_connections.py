@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Check: idle connections do not hold the workers of 05_flask_api_standalone.py
+
+Starts the server with --workers N on a spare port, opens N connections
+that send nothing, and times GET /health on a new connection: it must answer
+within the budget, not after the keep-alive timeout. Then repeats with N
+keep-alive connections left idle after one request, and finally checks that
+every idle connection is still served when it sends a request.
+Standard library only, like the server.
+"""
+
+import argparse
+import http.client
+import socket
+import sys
+import time
+from load_test_standalone import free_port, start_server
+
+HEALTH_BUDGET_S = 1.0
+
+
+def timed_health(port):
+    """Seconds for GET /health on a fresh connection"""
+    started = time.perf_counter()
+    conn = http.client.HTTPConnection('localhost', port, timeout=30)
+    conn.request('GET', '/health')
+    conn.getresponse().read()
+    conn.close()
+    return time.perf_counter() - started
+
+
+def idle_sockets(port, n):
+    """n connections that never sent a byte"""
+    return [socket.create_connection(('localhost', port)) for _ in range(n)]
+
+
+def idle_keepalive(port, n):
+    """n keep-alive connections idle after one /health each"""
+    connections = []
+    for _ in range(n):
+        conn = http.client.HTTPConnection('localhost', port, timeout=30)
+        conn.request('GET', '/health')
+        conn.getresponse().read()
+        connections.append(conn)
+    return connections
+
+
+def still_served(sockets, connections):
+    """True if every idle connection gets an answer to a /health request"""
+    ok = True
+    for sock in sockets:
+        sock.settimeout(30)
+        sock.sendall(b'GET /health HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n')
+        ok &= sock.recv(64).startswith(b'HTTP/1.1 200')
+        sock.close()
+    for conn in connections:
+        conn.request('GET', '/health')
+        response = conn.getresponse()
+        response.read()
+        ok &= response.status == 200
+        conn.close()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2, help='server worker threads = idle connections opened')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"CHECK: /health with {args.workers} idle connections on a --workers {args.workers} server")
+    print("=" * 80 + "\n")
+
+    port = free_port()
+    server = start_server(port, ['--workers', str(args.workers)])
+    ok = True
+    try:
+        sockets = idle_sockets(port, args.workers)
+        time.sleep(0.2)  # let the server accept them all
+        seconds = timed_health(port)
+        ok &= seconds <= HEALTH_BUDGET_S
+        print(f"{'✓' if seconds <= HEALTH_BUDGET_S else '❌'} {args.workers} new idle connections: "
+              f"/health in {seconds * 1e3:.1f} ms (budget {HEALTH_BUDGET_S * 1e3:.0f} ms)")
+
+        connections = idle_keepalive(port, args.workers)
+        seconds = timed_health(port)
+        ok &= seconds <= HEALTH_BUDGET_S
+        print(f"{'✓' if seconds <= HEALTH_BUDGET_S else '❌'} {args.workers} idle keep-alive connections: "
+              f"/health in {seconds * 1e3:.1f} ms (budget {HEALTH_BUDGET_S * 1e3:.0f} ms)")
+
+        served = still_served(sockets, connections)
+        ok &= served
+        print(f"{'✓' if served else '❌'} Idle connections served once they send a request\n")
+    finally:
+        server.kill()
+        server.wait()
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""Check snapshots derived from events against a snapshot rebuilt from scratch
+
+Loads the file snapshot, publishes batches of random events through
+SnapshotHolder.apply_events (enrollments of known and new students and
+courses, progress, completions, skills added to students and courses, new
+skill names included), then builds a Snapshot from scratch from the same
+running aggregates and compares the per-student / per-course values, the
+enrolled sets, the skill rows, the course table and the /recommend feature
+matrices of every student. Before that, checks that invalid events (a
+non-string skill name next to a valid new one, non-positive or oversized
+ids) are rejected without publishing or keeping anything after them, and
+that a batch whose snapshot fails to build is rolled back whole. Also times
+a derived snapshot against the rebuild.
+"""
+
+import argparse
+import copy
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from aggregates import max_difference
+from snapshot import Snapshot, SnapshotHolder
+
+TOLERANCE = 1e-9
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.path.join(os.path.dirname(script_dir), 'data')
+models_dir = os.path.join(os.path.dirname(script_dir), 'models')
+
+
+def random_events(snap, n_events, rng):
+    """Mixed events over the snapshot's students and courses, a few new ids and skill names among them"""
+    pairs = snap.enrollments[['student_id', 'course_id']].to_numpy()
+    max_student, max_course = int(pairs[:, 0].max()), int(pairs[:, 1].max())
+    vocab = snap.skill_index.vocab
+    events = []
+    for _ in range(n_events):
+        student_id, course_id = (int(v) for v in pairs[rng.integers(len(pairs))])
+        kind = str(rng.choice(['enrollment', 'progress', 'completion', 'skill_added']))
+        if kind == 'enrollment':
+            if rng.random() < 0.3:
+                student_id = max_student + int(rng.integers(1, 50))
+            if rng.random() < 0.1:
+                course_id = max_course + int(rng.integers(1, 5))
+            events.append({'type': kind, 'student_id': student_id, 'course_id': course_id,
+                           'progress_percentage': float(rng.integers(0, 101)), 'completed': bool(rng.random() < 0.2)})
+        elif kind == 'skill_added':
+            skill = vocab[rng.integers(len(vocab))] if rng.random() < 0.8 else f'new_skill_{rng.integers(20)}'
+            owner = {'student_id': student_id} if rng.random() < 0.7 else {'course_id': course_id}
+            events.append({'type': kind, 'skill_name': skill, **owner})
+        else:
+            events.append({'type': kind, 'student_id': student_id, 'course_id': course_id,
+                           'progress_percentage': float(rng.integers(0, 101))})
+    return events
+
+
+def rebuild(snap, aggregates):
+    """Snapshot built from scratch from the running aggregates, with snap's model and scaler"""
+    enrollments = pd.DataFrame(list(aggregates.enrollment_rows()),
+                               columns=['student_id', 'course_id', 'progress_percentage', 'completed'])
+    enrollments['completed_at'] = enrollments['completed'].map({True: 'done', False: None})
+    student_skills = pd.DataFrame([(sid, skill) for sid, skills in aggregates.student_skills.items() for skill in skills],
+                                  columns=['student_id', 'skill_name'])
+    course_skills = pd.DataFrame([(cid, skill) for cid, skills in aggregates.course_skills.items() for skill in skills],
+                                 columns=['course_id', 'skill_name'])
+    return Snapshot(snap.version, enrollments, student_skills, course_skills, snap.model, snap.scaler)
+
+
+def skill_sets(index, ids, side):
+    """{id: skill names} of the given students / courses of a SkillIndex"""
+    matrix = getattr(index, f'{side}_matrix_for')(ids)
+    return {int(i): {index.vocab[c] for c in matrix[row].indices} for row, i in enumerate(ids)}
+
+
+def compare(derived, expected, aggregates):
+    """Largest difference between the two snapshots (inf when a key, set or row differs)"""
+    students = sorted(aggregates.student_count)
+    courses = sorted(aggregates.course_count)
+    worst = 0.0
+    for names, ids in [(('student_completion', 'student_experience'), students),
+                       (('course_difficulty', 'course_popularity', 'course_avg_progress'), courses)]:
+        for name in names:
+            a = np.array([getattr(derived, name)[key] for key in ids], dtype=float)
+            b = np.array([getattr(expected, name)[key] for key in ids], dtype=float)
+            worst = max(worst, float(np.abs(a - b).max()))
+    if any(derived.student_enrolled.get(sid) != expected.student_enrolled.get(sid) for sid in students):
+        return float('inf')
+
+    skill_students = sorted(set(aggregates.student_skills) | set(students))
+    skill_courses = sorted(set(aggregates.course_skills) | set(courses))
+    if (skill_sets(derived.skill_index, skill_students, 'student') != skill_sets(expected.skill_index, skill_students, 'student')
+            or skill_sets(derived.skill_index, skill_courses, 'course') != skill_sets(expected.skill_index, skill_courses, 'course')):
+        return float('inf')
+
+    if not np.array_equal(derived.course_table.course_ids, expected.course_table.course_ids):
+        return float('inf')
+    worst = max(worst, float(np.abs(derived.course_table.scaled - expected.course_table.scaled).max()))
+    for sid in students:
+        features = [snap.course_table.features(
+            snap.skill_index.student_vector(sid), snap.skill_index.student_skill_total(sid),
+            snap.student_completion.get(sid, 0.5), snap.student_experience.get(sid, 0),
+            snap.course_table.candidate_mask(snap.student_enrolled.get(sid, set()))
+        ) for snap in (derived, expected)]
+        if features[0].shape != features[1].shape:
+            return float('inf')
+        if len(features[0]):
+            worst = max(worst, float(np.abs(features[0] - features[1]).max()))
+    return worst
+
+
+def state(holder):
+    """Copy of what the running aggregates hold, to compare before / after a rejected batch"""
+    aggregates = holder._aggregates
+    return (aggregates.to_dicts(), aggregates.stats(), aggregates.events_applied,
+            copy.deepcopy(dict(aggregates.student_skills)), copy.deepcopy(dict(aggregates.pairs)))
+
+
+def same_state(before, after):
+    return max_difference(before[0], after[0]) == 0 and before[1:] == after[1:]
+
+
+def check_rejected(holder):
+    """Invalid events get an error and change nothing; a failed publish is rolled back; True if all hold"""
+    snap = holder.current
+    student_id, course_id = (int(v) for v in snap.enrollments[['student_id', 'course_id']].iloc[0])
+    ok = True
+
+    # A valid new skill then a non-string one: the first is published, the second rejected
+    applied, error, published = holder.apply_events([
+        {'type': 'skill_added', 'student_id': student_id, 'skill_name': 'Zeta'},
+        {'type': 'skill_added', 'student_id': student_id, 'skill_name': 123},
+    ])
+    passed = (applied == 1 and isinstance(error, ValueError) and published is holder.current
+              and 'Zeta' in published.skill_index.skill_ids and 123 not in holder._aggregates.student_skills[student_id]
+              and published.events_applied == holder._aggregates.events_applied)
+    ok &= passed
+    print(f"{'✓' if passed else '❌'} Mixed skill_name 'Zeta' / 123 batch: applied {applied}, {error}")
+
+    before, version = state(holder), holder.current.version
+    bad_events = [
+        [{'type': 'skill_added', 'student_id': student_id, 'skill_name': 123},
+         {'type': 'skill_added', 'student_id': student_id, 'skill_name': 'Zeta2'}],
+        [{'type': 'enrollment', 'student_id': -5, 'course_id': course_id}],
+        [{'type': 'enrollment', 'student_id': student_id, 'course_id': 0}],
+        [{'type': 'enrollment', 'student_id': 2 ** 40, 'course_id': course_id}],
+        [{'type': 'enrollment', 'student_id': True, 'course_id': course_id}],
+        [{'type': 'progress', 'student_id': student_id, 'course_id': course_id, 'progress_percentage': 250}],
+        [{'type': 'skill_added', 'course_id': '7', 'skill_name': 'Zeta2'}],
+    ]
+    for batch in bad_events:
+        applied, error, published = holder.apply_events(batch)
+        passed = applied == 0 and isinstance(error, ValueError) and published.version == version
+        ok &= passed
+        if not passed:
+            print(f"❌ {batch}: applied {applied}, {error!r}")
+    passed = same_state(before, state(holder)) and holder.current.version == version
+    ok &= passed
+    print(f"{'✓' if passed else '❌'} {len(bad_events)} invalid batches rejected (ids <= 0, 2**40, True, '7', "
+          f"progress 250, skill_name 123 first): nothing applied or published")
+
+    # A batch whose snapshot cannot be built leaves the running aggregates as published
+    good = [{'type': 'enrollment', 'student_id': student_id, 'course_id': course_id, 'progress_percentage': 10.0},
+            {'type': 'skill_added', 'student_id': student_id, 'skill_name': 'Zeta3'}]
+
+    def fail(*args):
+        raise RuntimeError('snapshot build failed')
+
+    Snapshot.with_events, with_events = fail, Snapshot.with_events
+    try:
+        holder.apply_events(good)
+        raised = False
+    except RuntimeError:
+        raised = True
+    finally:
+        Snapshot.with_events = with_events
+    passed = raised and same_state(before, state(holder)) and holder.current.version == version
+    ok &= passed
+    print(f"{'✓' if passed else '❌'} Failed publish rolled back: events_applied {holder._aggregates.events_applied}, "
+          f"version {holder.current.version}")
+
+    applied, error, published = holder.apply_events(good)
+    passed = applied == len(good) and error is None and published.events_applied == before[2] + len(good)
+    ok &= passed
+    print(f"{'✓' if passed else '❌'} Next batch publishes only its own events: {published.version}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batches', type=int, default=20, help='/events requests to publish')
+    parser.add_argument('--batch-size', type=int, default=25, help='events per request')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("CHECK: snapshots derived from events vs rebuilt from scratch")
+    print("=" * 80 + "\n")
+
+    holder = SnapshotHolder(data_dir, models_dir)
+    rng = np.random.default_rng(42)
+    events = random_events(holder.current, args.batches * args.batch_size, rng)
+    print(f"✓ Loaded snapshot {holder.current.version}, publishing {args.batches} batches of {args.batch_size} events")
+
+    derive_seconds = []
+    for start in range(0, len(events), args.batch_size):
+        started = time.perf_counter()
+        applied, error, _ = holder.apply_events(events[start:start + args.batch_size])
+        derive_seconds.append(time.perf_counter() - started)
+        if error is not None:
+            print(f"❌ event {start + applied}: {error}")
+            return 1
+
+    ok = check_rejected(holder)
+
+    derived, aggregates = holder.current, holder._aggregates
+    started = time.perf_counter()
+    expected = rebuild(derived, aggregates)
+    rebuild_seconds = time.perf_counter() - started
+
+    diff = compare(derived, expected, aggregates)
+    ok &= diff <= TOLERANCE
+    print(f"{'✓' if ok else '❌'} {derived.version}: {len(aggregates.student_count)} students, "
+          f"{len(derived.course_table)} courses, {derived.skill_index.n_skills} skills, "
+          f"max diff vs rebuild = {diff:.2e} (tolerance {TOLERANCE:.0e})")
+    stats_ok = {k: v for k, v in derived.stats.items() if not k.startswith('snapshot_')} == \
+        {k: v for k, v in expected.stats.items() if not k.startswith('snapshot_')}
+    ok &= stats_ok
+    print(f"{'✓' if stats_ok else '❌'} /stats counts: {aggregates.stats()}")
+
+    print(f"\n⏱ Per /events batch: {np.median(derive_seconds) * 1e3:.2f} ms (median)   "
+          f"Rebuild from scratch: {rebuild_seconds * 1e3:.1f} ms\n")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
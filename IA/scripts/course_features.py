@@ -0,0 +1,134 @@
+"""Course feature table shared by the API and the offline recommendation script
+
+Columns of the 10-feature vector (same order as create_features):
+  0 course_avg_progress   (course)     5 student_completion_rate (student)
+  1 skill_match_ratio     (pair)       6 course_difficulty       (course)
+  2 student_skill_count   (student)    7 student_experience      (student)
+  3 course_skill_count    (course)     8 course_popularity       (course)
+  4 matching_skills       (pair)       9 course_avg_progress     (course)
+
+The course columns are computed and scaled once; a request only fills the
+student and pair columns. with_courses() derives a table in which only some
+courses' rows are recomputed.
+"""
+
+import copy
+import numpy as np
+
+N_FEATURES = 10
+COURSE_COLUMNS = [0, 3, 6, 8, 9]
+
+
+class CourseFeatureTable:
+    """Scaled course-side features aligned to a dense course index"""
+
+    def __init__(self, course_ids, skill_index, course_avg_progress, course_difficulty,
+                 course_popularity, mean=None, scale=None):
+        self.course_ids = np.array(sorted(int(cid) for cid in course_ids), dtype=np.int64)
+        self.index = {int(cid): i for i, cid in enumerate(self.course_ids)}
+        self.skill_index = skill_index
+        self.course_skills = skill_index.course_matrix_for(self.course_ids)
+        self.mean = np.zeros(N_FEATURES) if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale = np.ones(N_FEATURES) if scale is None else np.asarray(scale, dtype=np.float64)
+
+        self.skill_count = np.diff(self.course_skills.indptr).astype(np.float64)
+        self.scaled = self._scaled_rows(self.course_ids, self.skill_count, course_avg_progress,
+                                        course_difficulty, course_popularity)
+
+    def _scaled_rows(self, course_ids, skill_count, course_avg_progress, course_difficulty, course_popularity):
+        """Scaled feature rows of `course_ids` (zeros before scaling in the student and pair columns)"""
+        avg_progress = np.array([course_avg_progress.get(int(cid), 50) for cid in course_ids], dtype=np.float64)
+
+        raw = np.zeros((len(course_ids), N_FEATURES))
+        raw[:, 0] = avg_progress
+        raw[:, 3] = skill_count
+        raw[:, 6] = [course_difficulty.get(int(cid), 0.5) for cid in course_ids]
+        raw[:, 8] = [course_popularity.get(int(cid), 0) for cid in course_ids]
+        raw[:, 9] = avg_progress
+        return (raw - self.mean) / self.scale
+
+    def with_courses(self, course_ids, skill_index, course_avg_progress, course_difficulty, course_popularity):
+        """New table with the rows of `course_ids` recomputed (and added if they are new courses)
+
+        The other rows are copied from this table, which is left untouched.
+        The course skill rows are taken again from `skill_index` only if its
+        course matrix is not the one this table was built on.
+        """
+        table = copy.copy(self)
+        table.skill_index = skill_index
+        course_ids = sorted({int(cid) for cid in course_ids})
+        new_ids = [cid for cid in course_ids if cid not in self.index]
+        if new_ids:
+            positions = np.searchsorted(self.course_ids, new_ids)
+            table.course_ids = np.insert(self.course_ids, positions, new_ids)
+            table.index = {int(cid): i for i, cid in enumerate(table.course_ids)}
+            table.scaled = np.insert(self.scaled, positions, 0.0, axis=0)
+        else:
+            table.scaled = self.scaled.copy()
+        if new_ids or skill_index.course_matrix is not self.skill_index.course_matrix:
+            table.course_skills = skill_index.course_matrix_for(table.course_ids)
+            table.skill_count = np.diff(table.course_skills.indptr).astype(np.float64)
+
+        rows = [table.index[cid] for cid in course_ids]
+        table.scaled[rows] = table._scaled_rows(course_ids, table.skill_count[rows], course_avg_progress,
+                                                course_difficulty, course_popularity)
+        return table
+
+    def __len__(self):
+        return len(self.course_ids)
+
+    def candidate_mask(self, exclude):
+        """Boolean mask of the courses not in `exclude`"""
+        mask = np.ones(len(self.course_ids), dtype=bool)
+        rows = [self.index[cid] for cid in exclude if cid in self.index]
+        mask[rows] = False
+        return mask
+
+    def features(self, student_vector, student_skill_count, completion_rate, experience, mask=None):
+        """Scaled (n, 10) feature matrix of one student against the table (or its masked rows)
+
+        `student_vector` is the student's 0/1 skill row from the SkillIndex.
+        """
+        matching = self.skill_index.matching_counts(student_vector, self.course_skills).astype(np.float64)
+        scaled, course_count = self.scaled, self.skill_count
+        if mask is not None:
+            scaled, course_count, matching = scaled[mask], course_count[mask], matching[mask]
+
+        return self._fill(scaled.copy(), matching, course_count, student_skill_count, completion_rate, experience)
+
+    def features_many(self, student_matrix, student_skill_counts, completion_rates, experiences, masks=None):
+        """Scaled (n_students, n_courses, 10) features for several students at once
+
+        `student_matrix` holds the students' 0/1 skill rows (SkillIndex.student_matrix_for);
+        the other arguments are arrays aligned to its rows. With `masks`, an
+        (n_students, n_courses) boolean array, only the kept pairs are built:
+        the result is (n_kept, 10), student by student in course order.
+        """
+        n_students = student_matrix.shape[0]
+        matching = (student_matrix @ self.course_skills.T).toarray().astype(np.float64)
+        if masks is not None:
+            students, courses = np.nonzero(masks)
+
+            def pair(values):
+                return np.asarray(values, dtype=np.float64)[students]
+
+            return self._fill(self.scaled[courses], matching[students, courses], self.skill_count[courses],
+                              pair(student_skill_counts), pair(completion_rates), pair(experiences))
+
+        out = np.broadcast_to(self.scaled, (n_students,) + self.scaled.shape).copy()
+
+        def column(values):
+            return np.asarray(values, dtype=np.float64).reshape(n_students, 1)
+
+        return self._fill(out, matching, self.skill_count, column(student_skill_counts),
+                          column(completion_rates), column(experiences))
+
+    def _fill(self, out, matching, course_count, student_skill_count, completion_rate, experience):
+        """Write the scaled student and pair columns into `out` (course columns already set)"""
+        ratio = np.divide(matching, course_count, out=np.zeros_like(matching), where=course_count > 0)
+        out[..., 1] = (ratio - self.mean[1]) / self.scale[1]
+        out[..., 2] = (student_skill_count - self.mean[2]) / self.scale[2]
+        out[..., 4] = (matching - self.mean[4]) / self.scale[4]
+        out[..., 5] = (completion_rate - self.mean[5]) / self.scale[5]
+        out[..., 7] = (experience - self.mean[7]) / self.scale[7]
+        return out
@@ -0,0 +1,129 @@
+"""Columnar cache of the raw CSV inputs, keyed by a content hash
+
+read_csv(path) returns the same DataFrame as pd.read_csv(path). The first
+read also writes one .npy file per column to <csv dir>/csv_cache/<name>.<hash>/,
+where <hash> is a SHA-256 of the CSV bytes; later reads load those arrays
+instead of parsing the text. Numeric and bool columns are stored as they
+are; text columns are stored as integer codes plus their distinct values
+(missing values as code -1). Editing or replacing the CSV changes the hash,
+so the cache is rebuilt on the next read and the old entry is removed.
+
+Re-hashing a large CSV on every read would cost almost as much as parsing
+it, so the hash is remembered next to the cache together with the file's
+size and mtime, and only recomputed when those change. pyarrow is not a
+dependency, hence .npy rather than Parquet/Feather.
+
+RECO_CSV_CACHE=0 disables the cache (plain pd.read_csv).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+CACHE_DIRNAME = 'csv_cache'
+FORMAT_VERSION = 1
+ENABLED = os.environ.get('RECO_CSV_CACHE', '1') != '0'
+
+
+def content_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _fingerprint(path, cache_dir):
+    """Content hash of path, reusing the stored one while size and mtime are unchanged"""
+    st = os.stat(path)
+    stamp_path = os.path.join(cache_dir, os.path.basename(path) + '.hash.json')
+    try:
+        with open(stamp_path, 'r') as f:
+            stamp = json.load(f)
+        if stamp['size'] == st.st_size and stamp['mtime_ns'] == st.st_mtime_ns:
+            return stamp['hash']
+    except (OSError, ValueError, KeyError):
+        pass
+    digest = content_hash(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(stamp_path, 'w') as f:
+            json.dump({'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'hash': digest}, f)
+    except OSError:
+        pass
+    return digest
+
+
+def fingerprint(path):
+    """Content hash of a CSV, the one read_csv keys its cache entry with"""
+    if not ENABLED:
+        return content_hash(path)
+    return _fingerprint(path, os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIRNAME))
+
+
+def _save(frame, entry_dir):
+    columns = []
+    for i, name in enumerate(frame.columns):
+        values = frame[name].to_numpy()
+        if values.dtype.kind in 'biuf':
+            np.save(os.path.join(entry_dir, f'{i}.npy'), values)
+            columns.append({'name': name, 'kind': 'array'})
+        elif values.dtype == object and all(isinstance(v, str) for v in pd.unique(values[pd.notna(values)])):
+            codes, uniques = pd.factorize(values)
+            np.save(os.path.join(entry_dir, f'{i}.npy'), codes.astype(np.int32))
+            np.save(os.path.join(entry_dir, f'{i}.values.npy'), np.asarray(uniques, dtype=str))
+            columns.append({'name': name, 'kind': 'text'})
+        else:
+            raise TypeError(f'column {name!r} ({values.dtype}) cannot be cached')
+    with open(os.path.join(entry_dir, 'columns.json'), 'w') as f:
+        json.dump({'format': FORMAT_VERSION, 'rows': len(frame), 'columns': columns}, f)
+
+
+def _load(entry_dir):
+    with open(os.path.join(entry_dir, 'columns.json'), 'r') as f:
+        meta = json.load(f)
+    if meta['format'] != FORMAT_VERSION:
+        raise ValueError('old cache format')
+    data = {}
+    for i, column in enumerate(meta['columns']):
+        values = np.load(os.path.join(entry_dir, f'{i}.npy'))
+        if column['kind'] == 'text':
+            # Python str objects and NaN for missing values, as read_csv returns them
+            uniques = np.array(np.load(os.path.join(entry_dir, f'{i}.values.npy')).tolist() + [np.nan], dtype=object)
+            values = uniques[values]
+        data[column['name']] = values
+    return pd.DataFrame(data, index=pd.RangeIndex(meta['rows']))
+
+
+def read_csv(path, cache_dir=None):
+    """pd.read_csv(path), served from the columnar cache when the CSV content is unchanged"""
+    if not ENABLED:
+        return pd.read_csv(path)
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIRNAME)
+    name = os.path.basename(path)
+    entry_dir = os.path.join(cache_dir, f'{name}.{_fingerprint(path, cache_dir)}')
+
+    if os.path.isdir(entry_dir):
+        try:
+            return _load(entry_dir)
+        except (OSError, ValueError, KeyError):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+
+    frame = pd.read_csv(path)
+    tmp_dir = f'{entry_dir}.tmp{os.getpid()}'
+    try:
+        os.makedirs(tmp_dir, exist_ok=True)
+        _save(frame, tmp_dir)
+        os.replace(tmp_dir, entry_dir)
+        # Entries of previous versions of this CSV
+        for other in os.listdir(cache_dir):
+            other_path = os.path.join(cache_dir, other)
+            if other.startswith(name + '.') and os.path.isdir(other_path) and other_path != entry_dir and '.tmp' not in other:
+                shutil.rmtree(other_path, ignore_errors=True)
+    except (OSError, TypeError) as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        print(f"⚠ CSV cache not written for {name}: {e}")
+    return frame
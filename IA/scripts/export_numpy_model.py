@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Export recommendation_model.h5 to a NumPy .npz and check parity with keras
+
+--fuse-scaler also writes recommendation_model_fused.npz (scaler.pkl folded into
+hidden_1) and checks that fused predictions on the raw test split match the unfused ones.
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import numpy as np
+from tensorflow import keras
+from feature_store import FeatureStore
+from numpy_model import KERAS_FILE, NumpyModel, export_keras_model
+
+TOLERANCE = 1e-6
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.path.join(os.path.dirname(script_dir), 'data')
+models_dir = os.path.join(os.path.dirname(script_dir), 'models')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fuse-scaler', action='store_true', help='also export the scaler-fused model')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("EXPORT: recommendation_model.h5 → recommendation_model.npz")
+    print("=" * 80 + "\n")
+
+    scaler = None
+    if args.fuse_scaler:
+        with open(os.path.join(data_dir, 'scaler.pkl'), 'rb') as f:
+            scaler = pickle.load(f)
+
+    model = keras.models.load_model(os.path.join(models_dir, KERAS_FILE))
+    paths = export_keras_model(model, models_dir, scaler=scaler)
+    for path in paths:
+        print(f"✓ Weights exported to {path} ({os.path.getsize(path)} bytes)")
+    print()
+
+    if FeatureStore.exists(data_dir):
+        store = FeatureStore(data_dir)
+        X = np.asarray(store.features[store.splits['test']])
+        source = 'the test split'
+    else:
+        X = np.random.default_rng(42).standard_normal((1000, 10)).astype(np.float32)
+        source = 'random inputs'
+
+    numpy_model = NumpyModel.load(paths[0])
+    checks = [('keras vs numpy', model.predict(X, verbose=0), numpy_model.predict(X))]
+    if scaler is not None:
+        # The feature store is already scaled: the fused model gets the raw features back
+        X_raw = scaler.inverse_transform(X.astype(np.float64))
+        checks.append(('unfused vs fused', numpy_model.predict(X), NumpyModel.load(paths[1]).predict(X_raw)))
+
+    failed = False
+    for name, expected, actual in checks:
+        diff = float(np.max(np.abs(expected - actual)))
+        status = '✓' if diff <= TOLERANCE else '❌'
+        failed |= diff > TOLERANCE
+        print(f"{status} Parity {name} on {source} ({len(X)} rows): max diff = {diff:.2e} (tolerance {TOLERANCE:.0e})")
+    print()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Contiguous float32 feature store, written by 02 and memory-mapped by the trainers
+
+02_create_features.py writes to data/:
+  features.npy                  (n, 10) float32, C-contiguous: scaled features of every enrollment
+  labels.npy                    (n,) uint8: is_completed
+  split_{train,val,test}.npy    int64 row indices into the two arrays above
+
+FeatureStore opens them with mmap_mode='r': opening costs a few syscalls
+whatever the size, and a batch only pages in the rows it touches, so
+training on tens of millions of rows does not need them all resident.
+"""
+
+import os
+import numpy as np
+
+FEATURES_FILE = 'features.npy'
+LABELS_FILE = 'labels.npy'
+SPLITS = ('train', 'val', 'test')
+
+
+def split_file(name):
+    return f'split_{name}.npy'
+
+
+def save_store(data_dir, features, labels, splits):
+    """Write the store; splits maps 'train' / 'val' / 'test' to row indices"""
+    np.save(os.path.join(data_dir, FEATURES_FILE), np.ascontiguousarray(features, dtype=np.float32))
+    np.save(os.path.join(data_dir, LABELS_FILE), np.asarray(labels, dtype=np.uint8))
+    for name in SPLITS:
+        np.save(os.path.join(data_dir, split_file(name)), np.asarray(splits[name], dtype=np.int64))
+
+
+class FeatureStore:
+    def __init__(self, data_dir, mmap_mode='r'):
+        self.features = np.load(os.path.join(data_dir, FEATURES_FILE), mmap_mode=mmap_mode)
+        self.labels = np.load(os.path.join(data_dir, LABELS_FILE), mmap_mode=mmap_mode)
+        self.splits = {name: np.load(os.path.join(data_dir, split_file(name)), mmap_mode=mmap_mode) for name in SPLITS}
+
+    @staticmethod
+    def exists(data_dir):
+        names = [FEATURES_FILE, LABELS_FILE] + [split_file(name) for name in SPLITS]
+        return all(os.path.exists(os.path.join(data_dir, name)) for name in names)
+
+    @property
+    def n_features(self):
+        return self.features.shape[1]
+
+    def size(self, split):
+        return len(self.splits[split])
+
+    def steps(self, split, batch_size):
+        return -(-self.size(split) // batch_size)
+
+    def labels_of(self, split):
+        """Labels of a split, in split order (n bytes, read into memory)"""
+        return np.asarray(self.labels[self.splits[split]])
+
+    def batches(self, split, batch_size, shuffle=False, seed=None, repeat=False, transform=None):
+        """(X, y) float32 batches of a split, gathered from the mapped arrays
+
+        shuffle draws a new row order every pass, repeat loops forever (for
+        Keras steps_per_epoch), transform is applied to each X batch.
+        """
+        rng = np.random.default_rng(seed)
+        indices = self.splits[split]
+        while True:
+            order = rng.permutation(len(indices)) if shuffle else None
+            for start in range(0, len(indices), batch_size):
+                if order is None:
+                    rows = indices[start:start + batch_size]
+                else:
+                    # Sorted within the batch: fewer, sequential page reads from the mapped file
+                    rows = np.sort(indices[order[start:start + batch_size]])
+                X = self.features[rows]
+                if transform is not None:
+                    X = transform(X)
+                yield X.astype(np.float32, copy=False), self.labels[rows].astype(np.float32)
+            if not repeat:
+                return
+
+    def predict(self, model, split, batch_size=4096, transform=None):
+        """model.predict over a split, one mapped batch at a time, in split order"""
+        return np.concatenate([
+            model.predict(X, verbose=0).ravel() for X, _ in self.batches(split, batch_size, transform=transform)
+        ]) if self.size(split) else np.empty(0, dtype=np.float32)
@@ -0,0 +1,66 @@
+"""The 10 model features of enrollment rows, computed by 02_create_features.py
+
+enrollment_features() is shared by the in-memory run and the --chunksize
+run, which calls it once per chunk with the aggregates of the whole table.
+"""
+
+import numpy as np
+import pandas as pd
+
+FEATURE_COLUMNS = [
+    'feature_1_progress',
+    'feature_2_skill_match_ratio',
+    'feature_3_student_skill_count',
+    'feature_4_course_skill_count',
+    'feature_5_matching_skills',
+    'feature_6_student_completion_rate',
+    'feature_7_course_difficulty',
+    'feature_8_student_experience',
+    'feature_9_course_popularity',
+    'feature_10_course_avg_progress'
+]
+
+
+def enrollment_features(enrollments, skill_index, students, courses):
+    """FEATURE_COLUMNS of the enrollment rows (same index)
+
+    skill_index is a SkillIndex, students / courses the tables of
+    aggregates.aggregate_tables(); unknown students and courses get the
+    default values.
+    """
+    features = pd.DataFrame(index=enrollments.index)
+
+    # Feature 1: progress_percentage
+    features['feature_1_progress'] = enrollments['progress_percentage']
+
+    # Features 2-5: Skill matching (matrices creuses étudiant×skill / cours×skill)
+    matching = skill_index.pair_matching(enrollments['student_id'], enrollments['course_id']).astype(int)
+    student_count = skill_index.student_skill_counts(enrollments['student_id'])
+    course_count = skill_index.course_skill_counts(enrollments['course_id'])
+
+    features['feature_2_skill_match_ratio'] = np.divide(
+        matching, course_count, out=np.zeros(len(enrollments)), where=course_count > 0
+    )
+    features['feature_3_student_skill_count'] = student_count.astype(int)
+    features['feature_4_course_skill_count'] = course_count.astype(int)
+    features['feature_5_matching_skills'] = matching
+
+    # Features 6-10: student / course statistics
+    student_rows = students.reindex(enrollments['student_id'])
+    course_rows = courses.reindex(enrollments['course_id'])
+
+    # Feature 6: student_completion_rate
+    features['feature_6_student_completion_rate'] = student_rows['completion_rate'].fillna(0).to_numpy()
+
+    # Feature 7: course_difficulty
+    features['feature_7_course_difficulty'] = course_rows['difficulty'].fillna(0.5).to_numpy()
+
+    # Feature 8: student_experience
+    features['feature_8_student_experience'] = student_rows['experience'].fillna(0).astype(int).to_numpy()
+
+    # Feature 9: course_popularity
+    features['feature_9_course_popularity'] = course_rows['popularity'].fillna(0).astype(int).to_numpy()
+
+    # Feature 10: course_avg_progress
+    features['feature_10_course_avg_progress'] = course_rows['avg_progress'].fillna(50).to_numpy()
+    return features
@@ -2,11 +2,13 @@
 """Generate model and scaler files for Flask API"""
 
 import os
+import sys
 import pickle
 import numpy as np
 from sklearn.preprocessing import StandardScaler
 from tensorflow import keras
-import pandas as pd
+from feature_store import FeatureStore, save_store
+from numpy_model import export_keras_model
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 data_dir = os.path.join(os.path.dirname(script_dir), 'data')
@@ -17,38 +19,38 @@ os.makedirs(models_dir, exist_ok=True)
 
 print("Generating model and scaler files...\n")
 
-# Load training data
+BATCH_SIZE = 32
+
+# Load training data (memory-mapped feature store written by 02_create_features.py)
 print("Loading training data...")
-try:
-    X_train = np.load(os.path.join(data_dir, 'X_train.npy'))
-    X_val = np.load(os.path.join(data_dir, 'X_val.npy'))
-    y_train = np.load(os.path.join(data_dir, 'y_train.npy'))
-    y_val = np.load(os.path.join(data_dir, 'y_val.npy'))
+if FeatureStore.exists(data_dir):
     print("✓ Training data loaded\n")
-except FileNotFoundError as e:
+else:
     print(f"Error: Training data files not found. Creating dummy files...\n")
 
     # Create dummy training data
     np.random.seed(42)
-    X_train = np.random.randn(1400, 10)
-    X_val = np.random.randn(300, 10)
-    y_train = np.random.randint(0, 2, 1400)
-    y_val = np.random.randint(0, 2, 300)
+    features = np.random.randn(2000, 10)
+    labels = np.random.randint(0, 2, 2000)
 
-    # Save dummy files
-    np.save(os.path.join(data_dir, 'X_train.npy'), X_train)
-    np.save(os.path.join(data_dir, 'X_val.npy'), X_val)
-    np.save(os.path.join(data_dir, 'y_train.npy'), y_train)
-    np.save(os.path.join(data_dir, 'y_val.npy'), y_val)
+    # Save dummy files: scaled features + their scaler, as 02_create_features.py writes them
+    scaler = StandardScaler()
+    features = scaler.fit_transform(features)
+    save_store(data_dir, features, labels, {'train': np.arange(1400), 'val': np.arange(1400, 1700), 'test': np.arange(1700, 2000)})
+    with open(os.path.join(data_dir, 'scaler.pkl'), 'wb') as f:
+        pickle.dump(scaler, f)
     print("✓ Dummy training data created\n")
+store = FeatureStore(data_dir)
 
-# Create scaler
-print("Creating StandardScaler...")
-scaler = StandardScaler()
-scaler.fit(X_train)
-with open(os.path.join(data_dir, 'scaler.pkl'), 'wb') as f:
-    pickle.dump(scaler, f)
-print("✓ Scaler saved\n")
+# The store holds features already scaled by 02's scaler: reuse it rather than fitting on scaled data
+print("Loading StandardScaler...")
+scaler_path = os.path.join(data_dir, 'scaler.pkl')
+if not os.path.exists(scaler_path):
+    print(f"Error: {scaler_path} not found. Run 02_create_features.py first.")
+    sys.exit(1)
+with open(scaler_path, 'rb') as f:
+    scaler = pickle.load(f)
+print("✓ Scaler loaded\n")
 
 # Create model
 print("Building neural network model...")
@@ -71,14 +73,12 @@ print("✓ Model built\n")
 
 # Train model briefly
 print("Training model (quick training for demo)...")
-X_train_scaled = scaler.transform(X_train)
-X_val_scaled = scaler.transform(X_val)
-
 model.fit(
-    X_train_scaled, y_train,
-    validation_data=(X_val_scaled, y_val),
+    store.batches('train', BATCH_SIZE, shuffle=True, seed=42, repeat=True),
+    steps_per_epoch=store.steps('train', BATCH_SIZE),
+    validation_data=store.batches('val', BATCH_SIZE, repeat=True),
+    validation_steps=store.steps('val', BATCH_SIZE),
     epochs=10,
-    batch_size=32,
     verbose=0
 )
 print("✓ Model trained\n")
@@ -86,6 +86,9 @@ print("✓ Model trained\n")
 # Save model
 print("Saving model...")
 model.save(os.path.join(models_dir, 'recommendation_model.h5'))
+# --fuse-scaler: also write a model with the scaler folded into hidden_1
+fuse_scaler = '--fuse-scaler' in sys.argv
+export_keras_model(model, models_dir, scaler=scaler if fuse_scaler else None)
 print("✓ Model saved\n")
 
 print("=" * 80)
@@ -93,6 +96,9 @@ print("✅ All files generated successfully!")
 print("=" * 80)
 print(f"\nFiles created:")
 print(f"  ✓ {os.path.join(models_dir, 'recommendation_model.h5')}")
-print(f"  ✓ {os.path.join(data_dir, 'scaler.pkl')}")
+print(f"  ✓ {os.path.join(models_dir, 'recommendation_model.npz')}")
+if fuse_scaler:
+    print(f"  ✓ {os.path.join(models_dir, 'recommendation_model_fused.npz')}")
+print(f"  ✓ {scaler_path} (from 02_create_features.py)")
 print(f"\nReady to launch Flask API")
 print("Run: python scripts/05_flask_api.py\n")
@@ -0,0 +1,88 @@
+"""Heuristic success scorer of the fixed, demo and standalone APIs
+
+The score is a fixed linear formula over the pair features plus a small
+per-pair jitter in [-0.05, 0.05). The jitter used to come from reseeding the
+global Mersenne Twister for every pair; it is now a counter-based hash
+(SplitMix64 finalizer) of the (student_id, course_id) key:
+
+- deterministic: it depends on the two ids and NOISE_SEED only, not on the
+  process, PYTHONHASHSEED, the platform or the call order
+- vectorized: score_pairs() scores whole arrays of pairs in one NumPy call
+- identical without NumPy: the pure-Python path returns the same floats,
+  so the standalone server gives the same answers with or without it
+
+check_heuristic_noise.py checks all three.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # the standalone server runs on the standard library alone
+    np = None
+
+NOISE_SEED = 0x5EED
+NOISE_AMPLITUDE = 0.05
+
+MASK32 = 0xFFFFFFFF
+MASK64 = 0xFFFFFFFFFFFFFFFF
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+MIX_1 = 0xBF58476D1CE4E5B9
+MIX_2 = 0x94D049BB133111EB
+
+
+def pair_noise_scalar(student_id, course_id, seed=NOISE_SEED):
+    """Jitter of one pair (pure Python)"""
+    z = ((int(student_id) & MASK32) << 32) | (int(course_id) & MASK32)
+    z = ((z ^ seed) + GOLDEN_GAMMA) & MASK64
+    z = ((z ^ (z >> 30)) * MIX_1) & MASK64
+    z = ((z ^ (z >> 27)) * MIX_2) & MASK64
+    z ^= z >> 31
+    return ((z >> 11) * 2.0 ** -53 * 2 - 1) * NOISE_AMPLITUDE
+
+
+def pair_noise(student_ids, course_ids, seed=NOISE_SEED):
+    """Jitter of arrays of pairs (broadcast like NumPy); same values as pair_noise_scalar"""
+    s = np.atleast_1d(np.asarray(student_ids, dtype=np.int64)).astype(np.uint64)
+    c = np.atleast_1d(np.asarray(course_ids, dtype=np.int64)).astype(np.uint64)
+    z = ((s & np.uint64(MASK32)) << np.uint64(32)) | (c & np.uint64(MASK32))
+    z = (z ^ np.uint64(seed)) + np.uint64(GOLDEN_GAMMA)  # uint64 arithmetic wraps mod 2**64
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(MIX_1)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(MIX_2)
+    z ^= z >> np.uint64(31)
+    return ((z >> np.uint64(11)).astype(np.float64) * 2.0 ** -53 * 2 - 1) * NOISE_AMPLITUDE
+
+
+def base_probability(skill_match, completion_rate, difficulty, experience):
+    """Linear part of the score; works on floats and on arrays"""
+    base_prob = 0.5
+    base_prob = base_prob + skill_match * 0.15
+    base_prob = base_prob + completion_rate * 0.20
+    base_prob = base_prob - difficulty * 0.15
+    base_prob = base_prob + (experience / 10) * 0.10
+    return base_prob
+
+
+def score_pair(student_id, course_id, skill_match, completion_rate, difficulty, experience):
+    """Success probability of one pair"""
+    noise = pair_noise_scalar(student_id, course_id)
+    return float(max(0.0, min(1.0, base_probability(skill_match, completion_rate, difficulty, experience) + noise)))
+
+
+def score_pairs(student_ids, course_ids, skill_match, completion_rate, difficulty, experience):
+    """Success probabilities of many pairs in one call (arguments broadcast)
+
+    Returns a float64 array, or a list when NumPy is not installed.
+    """
+    if np is None:
+        n = max(len(v) for v in (student_ids, course_ids, skill_match, completion_rate, difficulty, experience)
+                if isinstance(v, (list, tuple)))
+        column = lambda v: v if isinstance(v, (list, tuple)) else [v] * n
+        return [
+            score_pair(*row) for row in zip(*(column(v) for v in (
+                student_ids, course_ids, skill_match, completion_rate, difficulty, experience
+            )))
+        ]
+    base = base_probability(
+        np.asarray(skill_match, dtype=np.float64), np.asarray(completion_rate, dtype=np.float64),
+        np.asarray(difficulty, dtype=np.float64), np.asarray(experience, dtype=np.float64)
+    )
+    return np.clip(base + pair_noise(student_ids, course_ids), 0.0, 1.0)
@@ -0,0 +1,102 @@
+"""Micro-batching of concurrent forward passes
+
+Request threads hand their scaled feature rows to InferenceBatcher.predict()
+and wait. One dispatcher thread takes the first waiting job, keeps collecting
+jobs for up to `window` seconds or until `max_rows` rows are queued, then runs
+a single forward pass per snapshot and hands each job its slice of the
+result. A wider window means bigger batches (fewer passes, more throughput
+under load) at the cost of up to `window` extra latency per request; see
+bench_microbatch.py.
+
+window <= 0 disables batching: predict() calls the snapshot directly.
+"""
+
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+
+class _Job:
+    __slots__ = ('snapshot', 'features', 'done', 'result', 'error')
+
+    def __init__(self, snapshot, features):
+        self.snapshot = snapshot
+        self.features = features
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class InferenceBatcher:
+    def __init__(self, window=0.002, max_rows=256):
+        self.window = window
+        self.max_rows = max_rows
+        self.batches = 0
+        self.rows = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+
+    @property
+    def enabled(self):
+        return self.window > 0
+
+    def predict(self, snapshot, features_scaled):
+        """snapshot.predict_scaled(features_scaled), possibly batched with other threads' rows"""
+        if not self.enabled or len(features_scaled) == 0:
+            return snapshot.predict_scaled(features_scaled)
+        job = _Job(snapshot, features_scaled)
+        self._jobs().put(job)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _jobs(self):
+        # Threads do not survive fork: a pre-forked worker starts its own dispatcher
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.SimpleQueue()
+                    threading.Thread(target=self._dispatch, args=(self._queue,), name='inference-batcher', daemon=True).start()
+                    self._pid = os.getpid()
+        return self._queue
+
+    def _dispatch(self, jobs):
+        while True:
+            batch = [jobs.get()]
+            rows = len(batch[0].features)
+            deadline = time.perf_counter() + self.window
+            while rows < self.max_rows:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    job = jobs.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(job)
+                rows += len(job.features)
+            self._run(batch)
+
+    def _run(self, batch):
+        # Jobs started on different snapshots (a reload in between) cannot share a model
+        by_snapshot = {}
+        for job in batch:
+            by_snapshot.setdefault(id(job.snapshot), []).append(job)
+        for group in by_snapshot.values():
+            try:
+                features = np.concatenate([job.features for job in group])
+                probs = group[0].snapshot.predict_scaled(features)
+                self.batches += 1
+                self.rows += len(features)
+                offsets = np.cumsum([len(job.features) for job in group])[:-1]
+                for job, result in zip(group, np.split(probs, offsets)):
+                    job.result = result
+            except Exception as e:
+                for job in group:
+                    job.error = e
+            for job in group:
+                job.done.set()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Load test: 05_flask_api_standalone.py serial vs concurrent mode
+
+Starts the server on a spare port for each mode, then runs 1..N clients,
+each on its own keep-alive connection, sending /recommend for random
+students for a fixed duration. A separate probe polls /health meanwhile
+(the check the C# backend makes). Reports throughput and p50/p99 latency.
+Standard library only, like the server.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+SERVER = os.path.join(script_dir, '05_flask_api_standalone.py')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, extra_args):
+    process = subprocess.Popen(
+        [sys.executable, SERVER, '--port', str(port)] + extra_args,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('localhost', port, timeout=1)
+            conn.request('GET', '/health')
+            conn.getresponse().read()
+            conn.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"server did not start on port {port}")
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def client(port, stop, latencies, errors, seed):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection('localhost', port, timeout=30)
+    while not stop.is_set():
+        body = json.dumps({'student_id': rng.randint(1, 850), 'top_n': 5})
+        start = time.perf_counter()
+        try:
+            conn.request('POST', '/recommend', body, {'Content-Type': 'application/json'})
+            conn.getresponse().read()
+            latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException):
+            errors.append(1)
+            conn.close()
+    conn.close()
+
+
+def health_probe(port, stop, latencies, interval):
+    conn = http.client.HTTPConnection('localhost', port, timeout=30)
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            conn.request('GET', '/health')
+            conn.getresponse().read()
+            latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException):
+            conn.close()
+        time.sleep(interval)
+    conn.close()
+
+
+def run_level(port, n_clients, duration):
+    stop = threading.Event()
+    latencies, errors, health = [], [], []
+    threads = [threading.Thread(target=client, args=(port, stop, latencies, errors, i)) for i in range(n_clients)]
+    threads.append(threading.Thread(target=health_probe, args=(port, stop, health, 0.05)))
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return {
+        'clients': n_clients,
+        'rps': len(latencies) / duration,
+        'p50_ms': percentile(latencies, 0.50) * 1e3,
+        'p99_ms': percentile(latencies, 0.99) * 1e3,
+        'health_p99_ms': percentile(health, 0.99) * 1e3,
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per concurrency level')
+    parser.add_argument('--workers', type=int, default=16, help='worker threads in concurrent mode')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("LOAD TEST: standalone API, serial vs concurrent")
+    print("=" * 80 + "\n")
+
+    modes = [('serial', ['--serial']), (f'concurrent ({args.workers} workers)', ['--workers', str(args.workers)])]
+    for name, extra_args in modes:
+        port = free_port()
+        process = start_server(port, extra_args)
+        try:
+            print(f"📊 {name}")
+            print(f"  {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'/health p99 ms':>15} {'errors':>7}")
+            for n_clients in args.clients:
+                r = run_level(port, n_clients, args.duration)
+                print(f"  {r['clients']:>7} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+                      f"{r['health_p99_ms']:>15.1f} {r['errors']:>7}")
+            print()
+        finally:
+            process.terminate()
+            process.wait()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""In-process metrics registry with Prometheus text exposition
+
+Counters, histograms and callback gauges, standard library only so the
+standalone server can use it too. A `+=` on a shared slot is a read and a
+write that another thread can interleave with (and always can on a
+free-threaded build), so concurrent updates could be lost. Each series
+instead keeps one cell per thread, found by thread id: only that thread
+adds to it, without a lock, and the cells are summed when /metrics is
+scraped. Thread ids are reused once a thread exits, so the number of cells
+stays around the number of threads alive at once. Recording is a dict lookup
+for the series (none when it is bound once with Histogram.labels()), one
+for the cell, a bisect over the bucket bounds and in-place additions. A
+scrape may see a histogram in the middle of an update (count and sum one
+observation apart). Cumulative bucket counts are only computed when
+/metrics is scraped. See bench_metrics.py for the per-sample cost.
+
+Series are per process: under prefork.py each worker exposes its own.
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from threading import get_ident
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; request latencies from sub-millisecond cache hits to multi-second batches
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class ThreadCells:
+    """Per-thread lists of `size` numbers, each added to by its own thread only, summed on read"""
+
+    __slots__ = ('size', 'cells', 'lock')
+
+    def __init__(self, size):
+        self.size = size
+        self.cells = {}  # thread id -> [numbers]
+        self.lock = threading.Lock()
+
+    def new_cell(self):
+        """The calling thread's cell, created on its first update"""
+        with self.lock:
+            return self.cells.setdefault(get_ident(), [0] * self.size)
+
+    def totals(self):
+        with self.lock:
+            cells = list(self.cells.values())
+        return [sum(values) for values in zip(*cells)] if cells else [0] * self.size
+
+
+class Counter:
+    """Monotonic count per label combination"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+        self._cells = {}  # labels -> ThreadCells(1)
+
+    def inc(self, *labelvalues, amount=1):
+        cells = self._cells.get(labelvalues)
+        if cells is None:
+            cells = self._cells.setdefault(labelvalues, ThreadCells(1))
+        cell = cells.cells.get(get_ident()) or cells.new_cell()
+        cell[0] += amount
+
+    def samples(self):
+        items = [(labels, cells.totals()[0]) for labels, cells in list(self._cells.items())]
+        return [(self.name, _format_labels(self.labelnames, labels), value) for labels, value in sorted(items)]
+
+
+class HistogramSeries(ThreadCells):
+    """Bucket counts (+Inf last) and sum of one label combination of a Histogram
+
+    Each thread's cell holds its bucket counts followed by its sum.
+    """
+
+    __slots__ = ('bounds',)
+
+    def __init__(self, bounds):
+        super().__init__(len(bounds) + 2)
+        self.bounds = bounds
+
+    def observe(self, value):
+        cell = self.cells.get(get_ident()) or self.new_cell()
+        cell[bisect_left(self.bounds, value)] += 1
+        cell[-1] += value
+
+    def counts_and_sum(self):
+        totals = self.totals()
+        return totals[:-1], float(totals[-1])
+
+
+class Histogram:
+    """Bucketed observations (count, sum, cumulative buckets) per label combination"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+        self.bounds = tuple(sorted(buckets))
+        self._series = {}  # labels -> HistogramSeries
+
+    def labels(self, *labelvalues):
+        """The series of one label combination, to bind once and observe() without a lookup"""
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series.setdefault(labelvalues, HistogramSeries(self.bounds))
+        return series
+
+    def observe(self, value, *labelvalues):
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self.labels(*labelvalues)
+        cell = series.cells.get(get_ident()) or series.new_cell()
+        cell[bisect_left(self.bounds, value)] += 1
+        cell[-1] += value
+
+    def samples(self):
+        items = [(labels, *series.counts_and_sum()) for labels, series in list(self._series.items())]
+        out = []
+        for labels, counts, total in sorted(items):
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), counts):
+                cumulative += count
+                out.append((f'{self.name}_bucket', _format_labels(self.labelnames, labels, [('le', _format_value(bound))]), cumulative))
+            out.append((f'{self.name}_count', _format_labels(self.labelnames, labels), cumulative))
+            out.append((f'{self.name}_sum', _format_labels(self.labelnames, labels), total))
+        return out
+
+
+class Gauge:
+    """Value read from a callback at scrape time: {label tuple: value} or a single number"""
+
+    def __init__(self, name, help_text, callback, labelnames=(), kind='gauge'):
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+        self.callback = callback
+        self.kind = kind  # 'counter' for totals kept elsewhere (e.g. cache hits)
+
+    def samples(self):
+        values = self.callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [(self.name, _format_labels(self.labelnames, labels), value) for labels, value in sorted(values.items())]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._add(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name, help_text, callback, labelnames=(), kind='gauge'):
+        return self._add(Gauge(name, help_text, callback, labelnames, kind))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def expose(self):
+        """All metrics in the Prometheus text format"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+class RequestMetrics:
+    """Request count, error count and latency histogram per endpoint"""
+
+    def __init__(self, registry, prefix='reco'):
+        self.requests = registry.counter(f'{prefix}_requests_total', 'HTTP requests', ('endpoint', 'method', 'status'))
+        self.errors = registry.counter(f'{prefix}_request_errors_total', 'HTTP requests answered with status >= 400', ('endpoint',))
+        self.latency = registry.histogram(f'{prefix}_request_duration_seconds', 'Request latency', ('endpoint',))
+
+    def record(self, endpoint, method, status, seconds):
+        self.requests.inc(endpoint, method, status)
+        if status >= 400:
+            self.errors.inc(endpoint)
+        self.latency.observe(seconds, endpoint)
@@ -0,0 +1,124 @@
+"""TensorFlow-free inference for recommendation_model.h5
+
+The model is a small 10 → 20 → 10 → 1 MLP (ReLU, ReLU, sigmoid). Its Dense
+weights are exported once to a .npz file; serving then runs the forward pass
+in plain NumPy. Dropout layers are a no-op at inference and are not exported.
+
+The StandardScaler can optionally be folded into the first layer:
+    ((x - mean) / scale) @ W + b  ==  x @ (W / scale[:, None]) + (b - (mean / scale) @ W)
+A fused model takes raw (unscaled) features.
+"""
+
+import os
+import numpy as np
+
+KERAS_FILE = 'recommendation_model.h5'
+NUMPY_FILE = 'recommendation_model.npz'
+FUSED_FILE = 'recommendation_model_fused.npz'
+
+ACTIVATIONS = {
+    'relu': lambda x: np.maximum(x, 0.0),
+    'sigmoid': lambda x: np.exp(-np.logaddexp(0.0, -x)),
+    'linear': lambda x: x,
+}
+
+
+class NumpyModel:
+    """Batched forward pass over a stack of Dense layers"""
+
+    def __init__(self, weights, biases, activations, fused_scaler=False):
+        self.weights = [np.asarray(w, dtype=np.float64) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float64) for b in biases]
+        self.activations = list(activations)
+        self.fused_scaler = bool(fused_scaler)
+
+    @classmethod
+    def from_keras(cls, model):
+        weights, biases, activations = [], [], []
+        for layer in model.layers:
+            if layer.__class__.__name__ != 'Dense':
+                continue
+            w, b = layer.get_weights()
+            weights.append(w)
+            biases.append(b)
+            activations.append(layer.get_config()['activation'])
+        return cls(weights, biases, activations)
+
+    @classmethod
+    def load(cls, path):
+        arrays = np.load(path)
+        n_layers = len(arrays['activations'])
+        return cls(
+            [arrays[f'W{i}'] for i in range(n_layers)],
+            [arrays[f'b{i}'] for i in range(n_layers)],
+            [str(a) for a in arrays['activations']],
+            fused_scaler=bool(arrays['fused_scaler']) if 'fused_scaler' in arrays else False
+        )
+
+    def save(self, path):
+        arrays = {'activations': np.array(self.activations), 'fused_scaler': np.array(self.fused_scaler)}
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f'W{i}'] = w
+            arrays[f'b{i}'] = b
+        np.savez(path, **arrays)
+
+    def fuse_scaler(self, mean, scale):
+        """Copy of the model with (x - mean) / scale folded into the first layer"""
+        if self.fused_scaler:
+            raise ValueError("The scaler is already fused into this model")
+        mean = np.asarray(mean, dtype=np.float64)
+        scale = np.asarray(scale, dtype=np.float64)
+        w0, b0 = self.weights[0], self.biases[0]
+        weights = [w0 / scale[:, None]] + self.weights[1:]
+        biases = [b0 - (mean / scale) @ w0] + self.biases[1:]
+        return NumpyModel(weights, biases, self.activations, fused_scaler=True)
+
+    @property
+    def n_features(self):
+        return self.weights[0].shape[0]
+
+    def predict(self, X, batch_size=None, verbose=0):
+        """Same contract as keras Model.predict: (n, n_features) in, (n, 1) out"""
+        out = np.asarray(X, dtype=np.float64)
+        for w, b, activation in zip(self.weights, self.biases, self.activations):
+            out = ACTIVATIONS[activation](out @ w + b)
+        return out
+
+
+def export_keras_model(model, models_dir, scaler=None):
+    """Write the Dense weights of a trained keras model next to the .h5
+
+    With a fitted StandardScaler, also write the fused artifact.
+    """
+    numpy_model = NumpyModel.from_keras(model)
+    paths = [os.path.join(models_dir, NUMPY_FILE)]
+    numpy_model.save(paths[0])
+    if scaler is not None:
+        paths.append(os.path.join(models_dir, FUSED_FILE))
+        numpy_model.fuse_scaler(scaler.mean_, scaler.scale_).save(paths[1])
+    return paths
+
+
+def load_recommendation_model(models_dir, scaler_path=None):
+    """Load the fused or plain NumPy engine, falling back to keras when both are missing or stale
+
+    Check `model.fused_scaler` (False on a keras model) to know whether the
+    features must still be scaled. A fused artifact older than `scaler_path`
+    is ignored.
+    """
+    keras_path = os.path.join(models_dir, KERAS_FILE)
+    keras_mtime = os.path.getmtime(keras_path) if os.path.exists(keras_path) else 0
+    scaler_mtime = os.path.getmtime(scaler_path) if scaler_path and os.path.exists(scaler_path) else 0
+
+    candidates = [(FUSED_FILE, max(keras_mtime, scaler_mtime)), (NUMPY_FILE, keras_mtime)]
+    for name, must_be_newer_than in candidates:
+        path = os.path.join(models_dir, name)
+        if os.path.exists(path) and os.path.getmtime(path) >= must_be_newer_than:
+            return NumpyModel.load(path)
+
+    print(f"⚠ {NUMPY_FILE} missing or older than {KERAS_FILE}, loading with TensorFlow "
+          "(run scripts/export_numpy_model.py to serve without it)")
+    from tensorflow import keras
+    model = keras.models.load_model(keras_path)
+    model.fused_scaler = False
+    return model
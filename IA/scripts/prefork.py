@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Pre-fork launcher: N worker processes of a 05_* server on one port
+
+    python prefork.py --workers 4 05_flask_api.py
+    python prefork.py --workers 4 --port 5001 05_flask_api_standalone.py
+
+The parent opens the listening socket, imports the server script once (CSV
+data, skill index, course table and model weights are loaded there), freezes
+the GC and forks. Workers inherit the socket and accept from it, and share
+the loaded data copy-on-write: NumPy buffers and model weights are never
+written after loading, so their pages stay shared. Dead workers are
+re-forked from the already loaded parent.
+
+Each worker is a separate process with its own snapshot and result cache.
+POST /reload and POST /events would only change the worker that handled
+them, so the workers answer them with 409 (the server module's PREFORKED
+flag); use file watching (RECO_WATCH_INTERVAL) so that every worker picks
+up new files. A model loaded with TensorFlow (no up-to-date NumPy export)
+is refused: TensorFlow's runtime is not fork-safe. Linux/macOS only (os.fork).
+"""
+
+import argparse
+import gc
+import importlib.util
+import os
+import signal
+import socket
+import sys
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_server_module(path):
+    """Import a 05_* script without running its __main__ block"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(path)))
+    spec = importlib.util.spec_from_file_location('prefork_server', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_server(module, sock, host, port, threads):
+    """Server for one worker, accepting on the shared socket"""
+    if hasattr(module, 'app'):  # Flask APIs
+        from werkzeug.serving import make_server as make_wsgi_server
+        return make_wsgi_server(host, port, module.app, threaded=True, fd=sock.fileno())
+    return module.create_server(host, port, threads, sock=sock)  # standalone server
+
+
+def run_worker(module, sock, args):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    if hasattr(module, 'PREFORKED'):
+        module.PREFORKED = True  # state-changing endpoints would only reach this worker
+    if hasattr(module, 'start_watching'):
+        module.start_watching()  # threads do not survive fork: start them in the worker
+    server = make_server(module, sock, args.host, args.port, args.threads)
+    try:
+        server.serve_forever()
+    finally:
+        os._exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('server', help='server script, e.g. 05_flask_api.py')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='worker processes')
+    parser.add_argument('--threads', type=int, default=16, help='worker threads per process (standalone server)')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=5000)
+    args = parser.parse_args()
+
+    sock = socket.create_server((args.host, args.port), backlog=1024)
+    sock.set_inheritable(True)
+
+    path = args.server if os.path.isabs(args.server) else os.path.join(script_dir, args.server)
+    module = load_server_module(path)
+    if 'tensorflow' in sys.modules:
+        print("❌ TensorFlow was loaded (model served from the .h5 fallback) and is not fork-safe: "
+              "run export_numpy_model.py, or start the server without prefork.py", file=sys.stderr)
+        sock.close()
+        return 1
+
+    # Keep the loaded objects out of future collections, so workers do not touch (copy) their pages
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def spawn(slot):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(module, sock, args)
+        children[pid] = slot
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for slot in range(args.workers):
+        spawn(slot)
+    print(f"🚀 {args.workers} workers (pids {', '.join(map(str, children))}) on http://{args.host}:{args.port}", flush=True)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = children.pop(pid, None)
+        if slot is not None and not stopping:
+            print(f"⚠ Worker {pid} exited ({status}), restarting", flush=True)
+            time.sleep(0.5)
+            spawn(slot)
+    sock.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Opt-in per-request stage timings and cProfile summaries
+
+A request asks for a breakdown with the X-Profile header ("timings" or
+"cprofile") and proves it is an admin caller with X-Admin-Token, compared
+against the server's admin token (RECO_ADMIN_TOKEN). Without the header the
+handler gets None and skips every mark, so normal requests pay nothing.
+is_admin() is the same token check, for the API's admin-only endpoints.
+"""
+
+import cProfile
+import hmac
+import os
+import pstats
+import time
+
+PROFILE_HEADER = 'X-Profile'
+ADMIN_HEADER = 'X-Admin-Token'
+MODES = ('timings', 'cprofile')
+
+
+def is_admin(headers, admin_token):
+    """True if X-Admin-Token matches admin_token; always False when no admin token is configured"""
+    given = headers.get(ADMIN_HEADER, '')
+    return bool(admin_token) and hmac.compare_digest(given.encode(), admin_token.encode())
+
+
+def from_headers(headers, admin_token):
+    """RequestProfile when the request asks for one, None otherwise
+
+    Raises ValueError for an unknown mode and PermissionError when the caller
+    is not an admin (or no admin token is configured).
+    """
+    mode = headers.get(PROFILE_HEADER)
+    if not mode:
+        return None
+    mode = mode.strip().lower()
+    if mode not in MODES:
+        raise ValueError(f"{PROFILE_HEADER} must be one of {', '.join(MODES)}")
+    if not is_admin(headers, admin_token):
+        raise PermissionError('profiling requires a valid admin token')
+    return RequestProfile(cprofile=mode == 'cprofile')
+
+
+class RequestProfile:
+    """Wall time of consecutive stages, plus an optional cProfile of the same span"""
+
+    def __init__(self, cprofile=False, top=15):
+        self.stages = []
+        self.top = top
+        self.profiler = cProfile.Profile() if cprofile else None
+        self.started = self.last = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def mark(self, stage):
+        """Close the stage that started at the previous mark"""
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def stop(self):
+        """Stop profiling; safe to call more than once (early returns, errors)"""
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    def report(self):
+        self.stop()
+        report = {
+            'stages': [{'stage': stage, 'ms': round(seconds * 1000, 3)} for stage, seconds in self.stages],
+            'total_ms': round((self.last - self.started) * 1000, 3)
+        }
+        if self.profiler is not None:
+            report['cprofile'] = top_functions(self.profiler, self.top)
+        return report
+
+
+def top_functions(profiler, top):
+    """Most expensive functions by cumulative time"""
+    stats = pstats.Stats(profiler)
+    stats.sort_stats('cumulative')
+    rows = []
+    for func in stats.fcn_list[:top]:
+        primitive_calls, calls, own, cumulative, _ = stats.stats[func]
+        filename, line, name = func
+        where = f'{os.path.basename(filename)}:{line}' if line else filename
+        rows.append({
+            'function': f'{where}({name})',
+            'calls': calls,
+            'own_ms': round(own * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3)
+        })
+    return rows
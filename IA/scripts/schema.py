@@ -0,0 +1,103 @@
+"""Compact dtypes of the enrollments and skills tables, shared by every loader
+
+  student_id, course_id   int32 (int64 only if an id does not fit)
+  progress_percentage     uint8 for whole percentages in 0-255, float32 otherwise
+                          (fractions or negative values are kept as they are)
+  completed_at            datetime64, NaT while the course is in progress, so
+                          completed_at.notna() is still the completion flag
+  skill_name              categorical over the shared skill vocabulary
+
+The vocabulary is the sorted union of the student and course skill names,
+the same one SkillIndex encodes skills with: both skill tables carry the
+same categories and their codes index SkillIndex.vocab directly.
+
+With pandas' defaults (int64 ids and progress, one Python str per
+completed_at and skill_name) an enrollment row takes ~56 bytes and a
+student skill row ~74; with this schema they take 17 and 6 (bench_dtypes.py).
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from csv_cache import read_csv
+
+ID_COLUMNS = ('student_id', 'course_id')
+
+
+def _ids(column):
+    values = column.to_numpy()
+    info = np.iinfo(np.int32)
+    if len(values) and (values.min() < info.min or values.max() > info.max):
+        return column.astype(np.int64)
+    return column.astype(np.int32)
+
+
+def _progress(column):
+    values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+    if np.all((values >= 0) & (values <= 255) & (values == np.round(values))):
+        return column.astype(np.uint8)
+    return column.astype(np.float32)
+
+
+def compact_enrollments(enrollments):
+    """enrollments with the schema dtypes (a new frame; columns it does not know are kept)"""
+    frame = enrollments.copy()
+    for name in ID_COLUMNS:
+        if name in frame:
+            frame[name] = _ids(frame[name])
+    if 'progress_percentage' in frame:
+        frame['progress_percentage'] = _progress(frame['progress_percentage'])
+    if 'completed_at' in frame:
+        frame['completed_at'] = pd.to_datetime(frame['completed_at'], format='ISO8601')
+    return frame
+
+
+def skill_vocabulary(*skill_tables):
+    """Sorted union of the skill names of the given tables"""
+    names = set()
+    for table in skill_tables:
+        names.update(table['skill_name'].dropna().astype(str).unique())
+    return sorted(names)
+
+
+def compact_skills(student_skills, course_skills, vocab=None):
+    """(student_skills, course_skills) with int32 ids and skill_name as a categorical over vocab"""
+    vocab = skill_vocabulary(student_skills, course_skills) if vocab is None else vocab
+    dtype = pd.CategoricalDtype(vocab)
+    tables = []
+    for table, id_column in ((student_skills, 'student_id'), (course_skills, 'course_id')):
+        frame = table.copy()
+        frame[id_column] = _ids(frame[id_column])
+        frame['skill_name'] = frame['skill_name'].astype(str).astype(dtype)
+        tables.append(frame)
+    return tuple(tables)
+
+
+def load_skills(data_dir):
+    """(student_skills, course_skills) from data_dir, with the schema dtypes"""
+    return compact_skills(
+        read_csv(os.path.join(data_dir, 'student_skills.csv')),
+        read_csv(os.path.join(data_dir, 'course_skills.csv'))
+    )
+
+
+def load_tables(data_dir):
+    """(enrollments, student_skills, course_skills) from data_dir, with the schema dtypes"""
+    enrollments = compact_enrollments(read_csv(os.path.join(data_dir, 'enrollments.csv')))
+    return (enrollments,) + load_skills(data_dir)
+
+
+def iter_enrollments(data_dir, chunksize):
+    """enrollments.csv as DataFrames of at most chunksize rows, with the schema dtypes
+
+    The chunks keep read_csv's running index (row numbers in the file). They
+    are parsed straight from the CSV: csv_cache stores whole tables.
+    """
+    with pd.read_csv(os.path.join(data_dir, 'enrollments.csv'), chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield compact_enrollments(chunk)
+
+
+def memory_mb(frame):
+    """Memory held by a DataFrame, Python objects included, in MB"""
+    return frame.memory_usage(deep=True).sum() / 1e6
@@ -0,0 +1,271 @@
+"""Integer skill vocabulary and sparse student×skill / course×skill matrices
+
+A student's or a course's skills are a 0/1 row over the skill vocabulary, so
+the number of matching skills of a (student, course) pair is the dot product
+of their rows. Matching counts for one student against every course, or for
+every student against every course, then come from a single sparse product
+instead of one set intersection per pair.
+"""
+
+import copy
+import json
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from csv_cache import fingerprint, read_csv
+from schema import compact_skills
+
+VOCAB_FILE = 'skill_vocab.json'
+MATRICES_FILE = 'skill_matrices.npz'
+SOURCE_FILES = ['student_skills.csv', 'course_skills.csv']
+
+
+def _incidence(owner_ids, skill_codes, n_skills):
+    """Deduplicated 0/1 CSR matrix (one row per distinct owner id)"""
+    skill_codes = np.asarray(skill_codes)
+    known = skill_codes >= 0
+    ids, rows = np.unique(np.asarray(owner_ids, dtype=np.int64)[known], return_inverse=True)
+    skill_codes = skill_codes[known]
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, skill_codes)),
+        shape=(len(ids), n_skills)
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return ids, matrix
+
+
+def _with_padding(matrix):
+    """Copy of a CSR matrix with one trailing all-zero row that unknown ids are mapped to"""
+    empty = sparse.csr_matrix((1, matrix.shape[1]), dtype=np.float32)
+    return sparse.vstack([matrix, empty]).tocsr()
+
+
+def _without_padding(padded):
+    """The rows of a padded matrix above its padding row (shares its arrays)"""
+    n_rows, n_skills = padded.shape
+    return sparse.csr_matrix((padded.data, padded.indices, padded.indptr[:-1]), shape=(n_rows - 1, n_skills))
+
+
+def _patch_rows(ids, padded, rows, skill_ids):
+    """(ids, padded) with the rows of `rows` ({id: skill names}) replaced, or inserted in id order
+
+    Rows that are not in `rows` are copied slice by slice; `padded` may be
+    narrower than the vocabulary of `skill_ids` (new skills are new columns).
+    """
+    n_skills = len(skill_ids)
+    if padded.shape[1] != n_skills:
+        padded = sparse.csr_matrix((padded.data, padded.indices, padded.indptr), shape=(padded.shape[0], n_skills))
+    changed = np.array(sorted(rows), dtype=np.int64)
+    positions = np.searchsorted(ids, changed)
+    found = np.zeros(len(changed), dtype=bool)
+    if len(ids):
+        found = ids[np.minimum(positions, len(ids) - 1)] == changed
+
+    blocks, start = [], 0
+    for owner_id, position, replaced in zip(changed, positions, found):
+        if position > start:
+            blocks.append(padded[start:position])
+        codes = np.array(sorted(skill_ids[skill] for skill in rows[owner_id]), dtype=np.int32)
+        blocks.append(sparse.csr_matrix((np.ones(len(codes), dtype=np.float32), codes, [0, len(codes)]),
+                                        shape=(1, n_skills)))
+        start = position + 1 if replaced else position
+    blocks.append(padded[start:])
+    return np.insert(ids, positions[~found], changed[~found]), sparse.vstack(blocks, format='csr')
+
+
+class SkillIndex:
+    """Skill vocabulary plus the student and course skill matrices"""
+
+    def __init__(self, vocab, student_ids, student_matrix, course_ids, course_matrix):
+        self.vocab = list(vocab)
+        self.skill_ids = {skill: i for i, skill in enumerate(self.vocab)}
+        self.student_ids = np.asarray(student_ids, dtype=np.int64)
+        self.course_ids = np.asarray(course_ids, dtype=np.int64)
+        self.student_matrix = student_matrix.tocsr()
+        self.course_matrix = course_matrix.tocsr()
+        self.student_skill_count = np.diff(self.student_matrix.indptr)
+        self.course_skill_count = np.diff(self.course_matrix.indptr)
+        # Copies with one trailing all-zero row that unknown ids are mapped to
+        self._student_padded = _with_padding(self.student_matrix)
+        self._course_padded = _with_padding(self.course_matrix)
+
+    @classmethod
+    def from_frames(cls, student_skills, course_skills):
+        """Build the index from the student_skills / course_skills DataFrames"""
+        student_names = student_skills['skill_name']
+        course_names = course_skills['skill_name']
+        if (isinstance(student_names.dtype, pd.CategoricalDtype) and isinstance(course_names.dtype, pd.CategoricalDtype)
+                and student_names.cat.categories.equals(course_names.cat.categories)):
+            # Both tables already coded over the shared vocabulary (schema.compact_skills)
+            vocab = [str(name) for name in student_names.cat.categories]
+            student_codes = student_names.cat.codes.to_numpy()
+            course_codes = course_names.cat.codes.to_numpy()
+        else:
+            student_names = student_names.astype(str)
+            course_names = course_names.astype(str)
+            vocab = sorted(set(student_names) | set(course_names))
+            student_codes = pd.Categorical(student_names, categories=vocab).codes
+            course_codes = pd.Categorical(course_names, categories=vocab).codes
+        student_ids, student_matrix = _incidence(student_skills['student_id'], student_codes, len(vocab))
+        course_ids, course_matrix = _incidence(course_skills['course_id'], course_codes, len(vocab))
+        return cls(vocab, student_ids, student_matrix, course_ids, course_matrix)
+
+    def with_rows(self, student_skills=None, course_skills=None):
+        """New index with the skill rows of some students / courses replaced or added
+
+        student_skills / course_skills map an id to its full set of skill
+        names. Only those CSR rows are rewritten, the others are copied as
+        they are; names missing from the vocabulary are appended to it, so
+        existing codes do not change. This index is left untouched.
+        """
+        student_skills, course_skills = student_skills or {}, course_skills or {}
+        names = set().union(*student_skills.values(), *course_skills.values())
+        new_names = sorted(names - self.skill_ids.keys())
+
+        index = copy.copy(self)
+        if new_names:
+            index.vocab = self.vocab + new_names
+            index.skill_ids = {**self.skill_ids, **{name: len(self.vocab) + i for i, name in enumerate(new_names)}}
+        if student_skills or new_names:
+            index.student_ids, index._student_padded = _patch_rows(
+                self.student_ids, self._student_padded, student_skills, index.skill_ids)
+            index.student_matrix = _without_padding(index._student_padded)
+            index.student_skill_count = np.diff(index.student_matrix.indptr)
+        if course_skills or new_names:
+            index.course_ids, index._course_padded = _patch_rows(
+                self.course_ids, self._course_padded, course_skills, index.skill_ids)
+            index.course_matrix = _without_padding(index._course_padded)
+            index.course_skill_count = np.diff(index.course_matrix.indptr)
+        return index
+
+    @property
+    def n_skills(self):
+        return len(self.vocab)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(self, data_dir, source_hashes=()):
+        """Write the vocabulary and matrices; source_hashes identify the skills CSVs they were built from"""
+        with open(os.path.join(data_dir, VOCAB_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.vocab, f, ensure_ascii=False, indent=0)
+        s, c = self.student_matrix, self.course_matrix
+        np.savez(
+            os.path.join(data_dir, MATRICES_FILE),
+            student_ids=self.student_ids, student_indptr=s.indptr, student_indices=s.indices,
+            course_ids=self.course_ids, course_indptr=c.indptr, course_indices=c.indices,
+            source_hashes=np.array(list(source_hashes), dtype=str)
+        )
+
+    @staticmethod
+    def saved_source_hashes(data_dir):
+        """source_hashes of the saved index ([] if it has none, None if it cannot be read)"""
+        try:
+            with np.load(os.path.join(data_dir, MATRICES_FILE)) as arrays:
+                return [str(h) for h in arrays['source_hashes']] if 'source_hashes' in arrays.files else []
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def load(cls, data_dir):
+        with open(os.path.join(data_dir, VOCAB_FILE), 'r', encoding='utf-8') as f:
+            vocab = json.load(f)
+        arrays = np.load(os.path.join(data_dir, MATRICES_FILE))
+
+        def csr(prefix, n_rows):
+            indices = arrays[f'{prefix}_indices']
+            data = np.ones(len(indices), dtype=np.float32)
+            return sparse.csr_matrix((data, indices, arrays[f'{prefix}_indptr']), shape=(n_rows, len(vocab)))
+
+        student_ids = arrays['student_ids']
+        course_ids = arrays['course_ids']
+        return cls(vocab, student_ids, csr('student', len(student_ids)), course_ids, csr('course', len(course_ids)))
+
+    @classmethod
+    def load_or_build(cls, data_dir, student_skills=None, course_skills=None):
+        """Load the persisted index, rebuilding it when a skills CSV's content changed
+
+        The index is saved with the content hashes (csv_cache.fingerprint) of
+        the skills CSVs it was built from, so a CSV replaced or restored with
+        an older mtime still triggers a rebuild. Without the CSVs, the saved
+        index is loaded as it is.
+        """
+        artifacts = [os.path.join(data_dir, VOCAB_FILE), os.path.join(data_dir, MATRICES_FILE)]
+        sources = [os.path.join(data_dir, name) for name in SOURCE_FILES]
+        source_hashes = [fingerprint(p) for p in sources if os.path.exists(p)]
+        if all(os.path.exists(p) for p in artifacts):
+            if not source_hashes or cls.saved_source_hashes(data_dir) == source_hashes:
+                return cls.load(data_dir)
+
+        if student_skills is None or course_skills is None:
+            student_skills, course_skills = compact_skills(
+                read_csv(sources[0]) if student_skills is None else student_skills,
+                read_csv(sources[1]) if course_skills is None else course_skills
+            )
+        index = cls.from_frames(student_skills, course_skills)
+        index.save(data_dir, source_hashes)
+        return index
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def encode(self, skills):
+        """Dense 0/1 vector of a free list of skill names (unknown skills are ignored)"""
+        vector = np.zeros(self.n_skills, dtype=np.float32)
+        codes = [self.skill_ids[s] for s in set(skills) if s in self.skill_ids]
+        vector[codes] = 1
+        return vector
+
+    def student_vector(self, student_id):
+        """Dense 0/1 skill row of one student (zeros for unknown students)"""
+        return self._student_padded[self._aligned_rows(self.student_ids, [student_id])[0]].toarray()[0]
+
+    def student_skill_total(self, student_id):
+        return int(self.student_skill_counts([student_id])[0])
+
+    @staticmethod
+    def _aligned_rows(known_ids, ids):
+        """Row positions of `ids` in the sorted `known_ids`; unknown ids point at the padding row"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(known_ids) == 0:
+            return np.zeros(len(ids), dtype=np.int64)
+        rows = np.searchsorted(known_ids, ids)
+        found = known_ids[np.minimum(rows, len(known_ids) - 1)] == ids
+        rows[~found] = len(known_ids)
+        return rows
+
+    def student_skill_counts(self, student_ids):
+        """Number of skills of each student in `student_ids` (0 for unknown students)"""
+        return np.append(self.student_skill_count, 0)[self._aligned_rows(self.student_ids, student_ids)]
+
+    def course_skill_counts(self, course_ids):
+        """Number of skills of each course in `course_ids` (0 for unknown courses)"""
+        return np.append(self.course_skill_count, 0)[self._aligned_rows(self.course_ids, course_ids)]
+
+    def course_matrix_for(self, course_ids):
+        """Course×skill matrix with rows aligned to `course_ids` (empty rows for unknown courses)"""
+        return self._course_padded[self._aligned_rows(self.course_ids, course_ids)]
+
+    def student_matrix_for(self, student_ids):
+        """Student×skill matrix with rows aligned to `student_ids` (empty rows for unknown students)"""
+        return self._student_padded[self._aligned_rows(self.student_ids, student_ids)]
+
+    # ------------------------------------------------------------------
+    # Matching counts
+    # ------------------------------------------------------------------
+    def matching_counts(self, student_vector, course_matrix=None):
+        """Matching skills of one student (0/1 vector) against every course row"""
+        course_matrix = self.course_matrix if course_matrix is None else course_matrix
+        return course_matrix @ student_vector
+
+    def all_matching_counts(self):
+        """Sparse (n_students × n_courses) matrix of matching skill counts"""
+        return self.student_matrix @ self.course_matrix.T
+
+    def pair_matching(self, student_ids, course_ids):
+        """Matching skill counts for aligned arrays of (student_id, course_id) pairs"""
+        students = self.student_matrix_for(student_ids)
+        courses = self.course_matrix_for(course_ids)
+        return np.asarray(students.multiply(courses).sum(axis=1)).ravel()
@@ -0,0 +1,333 @@
+"""Immutable snapshots of the API reference data and model, with hot reload
+
+A Snapshot bundles everything a request reads: the CSV tables, the derived
+per-student / per-course dicts, the skill index, the course feature table and
+the model. It is never mutated after construction. SnapshotHolder builds a
+new one in a background thread and swaps it in with a single reference
+assignment. A request that pinned the old snapshot finishes on it.
+
+Events (enrollments, progress, completions, new skills) are applied to
+running aggregates and published as a derived snapshot that shares the
+previous one's data and rewrites only the touched students and courses:
+dict entries in copy-on-write overlays, rows of the course table and of the
+skill matrices. A reload from the files replaces it, so producers are
+expected to write events to the CSVs too.
+"""
+
+import copy
+import datetime
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections.abc import Mapping
+import numpy as np
+from aggregates import RunningAggregates, compute_aggregates, compute_stats
+from course_features import CourseFeatureTable
+from schema import load_tables
+from skill_matrix import SkillIndex
+from numpy_model import FUSED_FILE, KERAS_FILE, NUMPY_FILE, load_recommendation_model
+
+DATA_FILES = ['enrollments.csv', 'student_skills.csv', 'course_skills.csv', 'scaler.pkl']
+MODEL_FILES = [KERAS_FILE, NUMPY_FILE, FUSED_FILE]
+
+
+def source_paths(data_dir, models_dir):
+    return ([os.path.join(data_dir, name) for name in DATA_FILES]
+            + [os.path.join(models_dir, name) for name in MODEL_FILES])
+
+
+def source_version(paths):
+    """Short fingerprint of the source files (path, size, mtime)"""
+    digest = hashlib.sha1()
+    for path in paths:
+        if os.path.exists(path):
+            st = os.stat(path)
+            digest.update(f"{path}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return digest.hexdigest()[:12]
+
+
+class Overlay(Mapping):
+    """Read-only mapping: a few changed entries over a base dict shared with older snapshots"""
+
+    __slots__ = ('base', 'changes')
+
+    def __init__(self, base, changes):
+        self.base = base
+        self.changes = changes
+
+    @classmethod
+    def patched(cls, mapping, updates):
+        """`mapping` with `updates` applied, neither of them modified
+
+        Successive patches stack their changes on the same base; once they
+        reach a quarter of it, they are merged into a plain dict.
+        """
+        if isinstance(mapping, cls):
+            base, changes = mapping.base, {**mapping.changes, **updates}
+        else:
+            base, changes = mapping, dict(updates)
+        if 4 * len(changes) > len(base):
+            return {**base, **changes}
+        return cls(base, changes)
+
+    def __getitem__(self, key):
+        if key in self.changes:
+            return self.changes[key]
+        return self.base[key]
+
+    def get(self, key, default=None):
+        if key in self.changes:
+            return self.changes[key]
+        return self.base.get(key, default)
+
+    def __contains__(self, key):
+        return key in self.changes or key in self.base
+
+    def __iter__(self):
+        yield from self.base
+        yield from (key for key in self.changes if key not in self.base)
+
+    def __len__(self):
+        return len(self.base) + sum(1 for key in self.changes if key not in self.base)
+
+
+class Snapshot:
+    """Reference data + model for one version of the source files"""
+
+    def __init__(self, version, enrollments, student_skills, course_skills, model, scaler, skill_index=None):
+        self.version = version
+        self.files_version = version
+        self.events_applied = 0
+        self.loaded_at = time.time()
+        self.enrollments = enrollments
+        self.student_skills = student_skills
+        self.course_skills = course_skills
+        self.model = model
+        self.scaler = scaler
+        self.skill_index = skill_index or SkillIndex.from_frames(student_skills, course_skills)
+
+        # A fused model has the scaler folded into its first layer and takes raw features
+        if model.fused_scaler:
+            self.feature_mean, self.feature_scale = np.zeros_like(scaler.mean_), np.ones_like(scaler.scale_)
+        else:
+            self.feature_mean, self.feature_scale = scaler.mean_, scaler.scale_
+
+        aggregates = compute_aggregates(enrollments)
+        self.student_completion = aggregates['student_completion']
+        self.course_difficulty = aggregates['course_difficulty']
+        self.student_experience = aggregates['student_experience']
+        self.course_popularity = aggregates['course_popularity']
+        self.course_avg_progress = aggregates['course_avg_progress']
+        self.student_enrolled = {
+            int(sid): set(int(cid) for cid in cids) for sid, cids in enrollments.groupby('student_id')['course_id']
+        }
+
+        # Course-side feature columns, built and scaled once for every course in the catalog
+        self.course_table = self._course_table(enrollments['course_id'].unique())
+        self.stats = self._with_snapshot_fields(compute_stats(enrollments, student_skills))
+
+    def _with_snapshot_fields(self, stats):
+        """/stats payload stamped with this snapshot's version and load time"""
+        return {
+            **stats,
+            'snapshot_version': self.version,
+            'snapshot_loaded_at': datetime.datetime.fromtimestamp(self.loaded_at).isoformat(timespec='seconds')
+        }
+
+    def _course_table(self, course_ids):
+        return CourseFeatureTable(
+            course_ids, self.skill_index, self.course_avg_progress,
+            self.course_difficulty, self.course_popularity,
+            mean=self.feature_mean, scale=self.feature_scale
+        )
+
+    def with_events(self, aggregates, student_ids, course_ids, skills_changed):
+        """New snapshot with the touched students / courses refreshed from `aggregates`
+
+        Nothing is rebuilt or copied whole (the old snapshot may still be
+        serving requests): the dicts become Overlays of the touched keys, the
+        course table recomputes the touched courses' rows and, when a skill
+        was added, the skill index rewrites the touched students' and
+        courses' rows. `enrollments` and the skill tables keep the rows read
+        from the files.
+        """
+        snap = copy.copy(self)
+        snap.events_applied = aggregates.events_applied
+        snap.version = f"{self.files_version}+e{aggregates.events_applied}"
+        snap.loaded_at = time.time()
+
+        if student_ids:
+            self._patch(snap, student_ids, aggregates.student_values)
+            snap.student_enrolled = Overlay.patched(self.student_enrolled, {
+                student_id: set(aggregates.student_courses.get(student_id, ())) for student_id in student_ids
+            })
+        if course_ids:
+            self._patch(snap, course_ids, aggregates.course_values)
+
+        if skills_changed:
+            snap.skill_index = self.skill_index.with_rows(
+                {sid: aggregates.student_skills[sid] for sid in student_ids if sid in aggregates.student_skills},
+                {cid: aggregates.course_skills[cid] for cid in course_ids if cid in aggregates.course_skills}
+            )
+
+        if course_ids or skills_changed:
+            # Courses without enrollments (a skill_added on its own) stay out of the table, as on a load
+            snap.course_table = self.course_table.with_courses(
+                [cid for cid in course_ids if cid in aggregates.course_count], snap.skill_index,
+                snap.course_avg_progress, snap.course_difficulty, snap.course_popularity
+            )
+        snap.stats = snap._with_snapshot_fields(aggregates.stats())
+        return snap
+
+    def _patch(self, snap, ids, values_of):
+        """Set snap's aggregate dicts to Overlays of this snapshot's with the values of `ids`"""
+        updates = {}
+        for key in ids:
+            for name, value in values_of(key).items():
+                updates.setdefault(name, {})[key] = value
+        for name, values in updates.items():
+            setattr(snap, name, Overlay.patched(getattr(self, name), values))
+
+    @classmethod
+    def load(cls, data_dir, models_dir):
+        """Read the CSVs, scaler and model from disk"""
+        # Fingerprint first: a file changing during the load is picked up by the next reload
+        version = source_version(source_paths(data_dir, models_dir))
+        scaler_path = os.path.join(data_dir, 'scaler.pkl')
+        model = load_recommendation_model(models_dir, scaler_path=scaler_path)
+        with open(scaler_path, 'rb') as f:
+            scaler = pickle.load(f)
+
+        enrollments, student_skills, course_skills = load_tables(data_dir)
+        skill_index = SkillIndex.load_or_build(data_dir, student_skills, course_skills)
+        return cls(version, enrollments, student_skills, course_skills, model, scaler, skill_index)
+
+    def create_features(self, student_id, course_id):
+        skill_index = self.skill_index
+        matching = skill_index.pair_matching([student_id], [course_id])[0]
+        course_count = int(skill_index.course_skill_counts([course_id])[0])
+        return np.array([
+            self.course_avg_progress.get(course_id, 50),
+            matching / course_count if course_count > 0 else 0.0,
+            int(skill_index.student_skill_counts([student_id])[0]),
+            course_count,
+            matching,
+            self.student_completion.get(student_id, 0.5),
+            self.course_difficulty.get(course_id, 0.5),
+            self.student_experience.get(student_id, 0),
+            self.course_popularity.get(course_id, 0),
+            self.course_avg_progress.get(course_id, 50)
+        ])
+
+    def scale(self, features):
+        return (features - self.feature_mean) / self.feature_scale
+
+    def predict_scaled(self, features_scaled):
+        """Score an already scaled (n, 10) feature matrix in a single forward pass"""
+        if len(features_scaled) == 0:
+            return np.empty(0)
+        return self.model.predict(features_scaled, batch_size=len(features_scaled), verbose=0)[:, 0]
+
+
+class SnapshotHolder:
+    """Current snapshot plus background reload and optional file watching"""
+
+    def __init__(self, data_dir, models_dir, on_swap=None):
+        self.data_dir = data_dir
+        self.models_dir = models_dir
+        self.on_swap = on_swap
+        self.current = Snapshot.load(data_dir, models_dir)
+        self.last_error = None
+        self._reload_lock = threading.Lock()
+        self._reload_thread = None
+        # Running aggregates of the file snapshot plus the events applied since; built on the first event
+        self._events_lock = threading.Lock()
+        self._aggregates = None
+
+    @property
+    def reloading(self):
+        return self._reload_thread is not None and self._reload_thread.is_alive()
+
+    def source_version(self):
+        return source_version(source_paths(self.data_dir, self.models_dir))
+
+    def reload(self, wait=False):
+        """Build a new snapshot in the background and swap it in; False if one is already building"""
+        with self._reload_lock:
+            if self.reloading:
+                return False
+            self._reload_thread = threading.Thread(target=self._build_and_swap, name='snapshot-reload', daemon=True)
+            self._reload_thread.start()
+        if wait:
+            self._reload_thread.join()
+        return True
+
+    def _build_and_swap(self):
+        try:
+            snapshot = Snapshot.load(self.data_dir, self.models_dir)
+        except Exception as e:  # keep serving the old snapshot
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"⚠ Reload failed, still serving {self.current.version}: {self.last_error}")
+            return
+        with self._events_lock:
+            previous, self.current, self.last_error = self.current, snapshot, None
+            self._aggregates = None
+        if self.on_swap:
+            self.on_swap(previous, snapshot)
+        print(f"✓ Snapshot {previous.version} → {snapshot.version}")
+
+    def apply_events(self, events):
+        """Apply events in order and publish a derived snapshot; returns (applied, error, snapshot)
+
+        Stops at the first invalid event: the ones before it stay applied and
+        are published, `error` is the exception (None when all were applied).
+        `snapshot` is the one published (the current one if none was applied).
+        If the snapshot cannot be built, the running aggregates are rolled
+        back to the published state and the exception propagates.
+        """
+        with self._events_lock:
+            base = self.current
+            if self._aggregates is None:
+                self._aggregates = RunningAggregates.from_frames(
+                    base.enrollments, base.student_skills, base.course_skills
+                )
+            aggregates = self._aggregates
+            students, courses, skills_changed = set(), set(), False
+            applied, error = 0, None
+            aggregates.begin()
+            try:
+                for event in events:
+                    try:
+                        s, c, k = aggregates.apply(event)
+                    except (KeyError, ValueError, TypeError, AttributeError) as e:
+                        error = e
+                        break
+                    students |= s
+                    courses |= c
+                    skills_changed |= k
+                    applied += 1
+                snapshot = base.with_events(aggregates, students, courses, skills_changed) if applied else base
+            except BaseException:
+                aggregates.rollback()
+                raise
+            aggregates.commit()
+            if not applied:
+                return 0, error, base
+            self.current = snapshot
+        if self.on_swap:
+            self.on_swap(base, snapshot)
+        return applied, error, snapshot
+
+    def watch(self, interval):
+        """Poll the source files every `interval` seconds and reload when they change"""
+        def loop():
+            while True:
+                time.sleep(interval)
+                if not self.reloading and self.source_version() != self.current.files_version:
+                    self.reload(wait=True)
+
+        thread = threading.Thread(target=loop, name='snapshot-watch', daemon=True)
+        thread.start()
+        return thread
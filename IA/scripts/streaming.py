@@ -0,0 +1,213 @@
+"""Out-of-core passes over enrollments.csv, for 01 / 02 --chunksize
+
+enrollments.csv is read `chunksize` rows at a time (schema.iter_enrollments)
+and never held whole:
+
+  EnrollmentSummary     the statistics 01_prepare_data.py prints, accumulated
+                        chunk by chunk (also used on the whole table)
+  write_feature_store   02_create_features.py's feature store, in three passes:
+    1. per-student / per-course counts (aggregates.ChunkedAggregates) and the
+       label counts, which fix the size of every output file
+    2. features of each chunk -> features.raw.tmp (float64, on disk) and
+       StandardScaler.partial_fit; labels and split indices are appended to
+       their .npy files
+    3. features.raw.tmp scaled block by block into features.npy (float32)
+
+If a pass fails, every output file and features.raw.tmp are closed and
+deleted: no half-written feature store is left behind.
+
+Every output has a known shape after pass 1, so NpyWriter writes the .npy
+header first and then appends blocks with plain file writes: unlike a
+np.lib.format.open_memmap output, written pages do not stay mapped in the
+process. Resident memory is one chunk plus the per-student / per-course
+tables and the skill index, whatever the number of enrollments. The scaler ends up with
+the same mean and variance as a fit on the whole table (up to rounding). The
+split is stratified within each chunk: 70/15/15 of its completed and of its
+in-progress rows, shuffled with a seed derived from the chunk number, so it
+is reproducible but not the same rows as the in-memory train_test_split.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from aggregates import ChunkedAggregates
+from feature_store import FEATURES_FILE, LABELS_FILE, SPLITS, split_file
+from features import FEATURE_COLUMNS, enrollment_features
+from schema import iter_enrollments
+
+RAW_FILE = 'features.raw.tmp'
+SPLIT_FRACTIONS = (0.70, 0.15)
+PROGRESS_BINS = [0, 25, 50, 75, 100]
+PROGRESS_LABELS = ['0-25%', '26-50%', '51-75%', '76-100%']
+
+
+class EnrollmentSummary:
+    """Row counts, progress statistics, missing values and distinct ids of the enrollments"""
+
+    def __init__(self):
+        self.rows = 0
+        self.head = None
+        self.missing = None
+        self.completed = 0
+        self.progress_min = None
+        self.progress_max = None
+        self.progress_sum = 0.0
+        self.progress_bins = None
+        self.student_ids = np.empty(0, dtype=np.int64)
+        self.course_ids = np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def of(cls, chunks):
+        summary = cls()
+        for chunk in chunks:
+            summary.add(chunk)
+        return summary
+
+    def add(self, chunk):
+        progress = chunk['progress_percentage']
+        bins = pd.cut(progress, bins=PROGRESS_BINS, labels=PROGRESS_LABELS, right=True).value_counts().sort_index()
+        if self.head is None:
+            self.head = chunk.head()
+            self.missing = chunk.isna().sum()
+            self.progress_min, self.progress_max = progress.min(), progress.max()
+            self.progress_bins = bins
+        else:
+            self.missing += chunk.isna().sum()
+            self.progress_min = min(self.progress_min, progress.min())
+            self.progress_max = max(self.progress_max, progress.max())
+            self.progress_bins += bins
+        self.rows += len(chunk)
+        self.completed += int(chunk['completed_at'].notna().sum())
+        self.progress_sum += float(progress.sum())
+        self.student_ids = np.union1d(self.student_ids, chunk['student_id'].to_numpy())
+        self.course_ids = np.union1d(self.course_ids, chunk['course_id'].to_numpy())
+
+    @property
+    def columns(self):
+        return list(self.head.columns)
+
+    @property
+    def dtypes(self):
+        return dict(self.head.dtypes)
+
+    @property
+    def progress_mean(self):
+        return self.progress_sum / self.rows
+
+
+def split_sizes(labels):
+    """{'train', 'val', 'test'} row counts of a chunk, 70/15/15 of each label"""
+    sizes = dict.fromkeys(SPLITS, 0)
+    for count in np.bincount(labels, minlength=2):
+        n_train = int(round(count * SPLIT_FRACTIONS[0]))
+        n_val = int(round(count * SPLIT_FRACTIONS[1]))
+        sizes['train'] += n_train
+        sizes['val'] += n_val
+        sizes['test'] += int(count) - n_train - n_val
+    return sizes
+
+
+def split_chunk(labels, chunk_no, seed=42):
+    """{'train', 'val', 'test'}: sorted positions within the chunk, in the proportions of split_sizes"""
+    rng = np.random.default_rng([seed, chunk_no])
+    parts = {name: [] for name in SPLITS}
+    for label in (0, 1):
+        rows = rng.permutation(np.flatnonzero(labels == label))
+        n_train = int(round(len(rows) * SPLIT_FRACTIONS[0]))
+        n_val = int(round(len(rows) * SPLIT_FRACTIONS[1]))
+        parts['train'].append(rows[:n_train])
+        parts['val'].append(rows[n_train:n_train + n_val])
+        parts['test'].append(rows[n_train + n_val:])
+    return {name: np.sort(np.concatenate(chunks)) for name, chunks in parts.items()}
+
+
+class NpyWriter:
+    """.npy file of a known dtype and shape, written front to back one block at a time"""
+
+    def __init__(self, path, dtype, shape):
+        self.dtype = np.dtype(dtype)
+        self.size = int(np.prod(shape))
+        self.written = 0
+        self.file = open(path, 'wb')
+        np.lib.format.write_array_header_1_0(self.file, {
+            'descr': np.lib.format.dtype_to_descr(self.dtype), 'fortran_order': False, 'shape': tuple(shape)
+        })
+
+    def write(self, block):
+        block = np.ascontiguousarray(block, dtype=self.dtype)
+        self.file.write(block.tobytes())
+        self.written += block.size
+
+    def close(self):
+        self.file.close()
+        if self.written != self.size:
+            raise ValueError(f'{self.file.name}: wrote {self.written} of {self.size} values')
+
+    def abort(self):
+        """Close and delete the partly written file"""
+        self.file.close()
+        try:
+            os.remove(self.file.name)
+        except FileNotFoundError:
+            pass
+
+
+def labels_of(chunk):
+    return chunk['completed_at'].notna().to_numpy().astype(np.uint8)
+
+
+def write_feature_store(data_dir, chunksize, skill_index):
+    """Build the feature store of data_dir from enrollments.csv in chunks; returns (scaler, aggregates, sizes)"""
+    # Pass 1: aggregates and output sizes
+    aggregates = ChunkedAggregates()
+    sizes = dict.fromkeys(SPLITS, 0)
+    for chunk in iter_enrollments(data_dir, chunksize):
+        aggregates.add(chunk)
+        for name, size in split_sizes(labels_of(chunk)).items():
+            sizes[name] += size
+    students, courses = aggregates.tables()
+    n = aggregates.rows
+
+    n_features = len(FEATURE_COLUMNS)
+    raw_path = os.path.join(data_dir, RAW_FILE)
+    scaler = StandardScaler()
+    writers = []
+    try:
+        labels = NpyWriter(os.path.join(data_dir, LABELS_FILE), np.uint8, (n,))
+        writers.append(labels)
+        splits = {}
+        for name, size in sizes.items():
+            splits[name] = NpyWriter(os.path.join(data_dir, split_file(name)), np.int64, (size,))
+            writers.append(splits[name])
+        features = NpyWriter(os.path.join(data_dir, FEATURES_FILE), np.float32, (n, n_features))
+        writers.append(features)
+
+        # Pass 2: raw features to a scratch file, labels and splits to their .npy files
+        start = 0
+        with open(raw_path, 'wb') as raw:
+            for chunk_no, chunk in enumerate(iter_enrollments(data_dir, chunksize)):
+                X = enrollment_features(chunk, skill_index, students, courses)
+                scaler.partial_fit(X)
+                X.to_numpy(dtype=np.float64).tofile(raw)
+                chunk_labels = labels_of(chunk)
+                labels.write(chunk_labels)
+                for name, rows in split_chunk(chunk_labels, chunk_no).items():
+                    splits[name].write(rows + start)
+                start += len(chunk)
+
+        # Pass 3: scaled float32 features
+        with open(raw_path, 'rb') as raw:
+            for _ in range(0, n, chunksize):
+                block = np.fromfile(raw, dtype=np.float64, count=chunksize * n_features).reshape(-1, n_features)
+                features.write(scaler.transform(pd.DataFrame(block, columns=FEATURE_COLUMNS)))
+        for writer in writers:
+            writer.close()
+    except BaseException:
+        for writer in writers:
+            writer.abort()
+        raise
+    finally:
+        if os.path.exists(raw_path):
+            os.remove(raw_path)
+    return scaler, aggregates, sizes
@@ -0,0 +1,59 @@
+"""Top-N selection over score arrays, without sorting every candidate
+
+top_k() returns the k best (id, score) pairs, best first, as two aligned
+arrays: no per-candidate dicts. It partitions around the k-th largest score
+in O(n) and only sorts the k selected entries. Ties are broken by position
+(the earlier candidate wins), the same order a stable descending sort gives,
+so results do not depend on the partition algorithm.
+
+NumPy is optional, as in heuristic_scorer: without it, lists are ranked
+with heapq and lists are returned.
+"""
+
+import heapq
+
+try:
+    import numpy as np
+except ImportError:  # standalone server without NumPy
+    np = None
+
+
+def top_k(scores, k, ids=None):
+    """(ids, scores) of the k highest scores, best first
+
+    ids defaults to the positions in scores. k larger than the number of
+    scores returns them all; k <= 0 returns nothing.
+    """
+    if np is None:
+        return _top_k_python(list(scores), k, ids)
+
+    scores = np.asarray(scores)
+    n = len(scores)
+    k = max(0, min(int(k), n))
+    if k == 0:
+        positions = np.empty(0, dtype=np.intp)
+    elif k == n:
+        positions = np.lexsort((np.arange(n), -scores))
+    else:
+        # Everything above the k-th largest score, then the earliest ties with it
+        kth = np.partition(scores, n - k)[n - k]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - len(above)]
+        selected = np.concatenate([above, ties])
+        positions = selected[np.lexsort((selected, -scores[selected]))]
+
+    top_ids = positions if ids is None else np.asarray(ids)[positions]
+    return top_ids, scores[positions]
+
+
+def _top_k_python(scores, k, ids):
+    k = max(0, min(int(k), len(scores)))
+    positions = heapq.nsmallest(k, range(len(scores)), key=lambda i: (-scores[i], i))
+    top_ids = positions if ids is None else [ids[i] for i in positions]
+    return top_ids, [scores[i] for i in positions]
+
+
+def ranked(ids, scores, k, id_key='course_id', score_key='success_probability'):
+    """top_k() as the [{course_id, success_probability}, ...] lists the APIs return"""
+    top_ids, top_scores = top_k(scores, k, ids)
+    return [{id_key: int(i), score_key: float(s)} for i, s in zip(top_ids, top_scores)]